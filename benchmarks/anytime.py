@@ -0,0 +1,45 @@
+"""
+Compare how long MCTS decisions take with a fixed number of iterations
+and with a deadline, over the first moves of games from opening hands of
+experiments/full_game.py's DECK. Reports the fastest, median and slowest
+decision for each; with a deadline, the slowest decision should overrun it
+by at most one iteration.
+
+Run from the repository root:
+
+    python -m benchmarks.anytime
+"""
+import contextlib
+import io
+import random
+import statistics
+import time
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+def latencies(seed: int, decisions: int, n_iters: int | None, seconds: float | None) -> list:
+    searcher = search.MCTSSearcher(opening_hand(seed), {}, search.staff_victory, 1.5, n_iters=n_iters, reuse=True)
+    random.seed(seed)
+    times = []
+    for _ in range(decisions):
+        if search.staff_victory(searcher.root.game_state):
+            break
+        start = time.monotonic()
+        deadline = None if seconds is None else start + seconds
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.choose(deadline=deadline)
+        times.append(time.monotonic() - start)
+    return times
+
+
+def main(n_iters=100, seconds=1.0, decisions=6, seeds=2):
+    for label, limits in ((f"n_iters={n_iters}", (n_iters, None)),
+                          (f"deadline {seconds}s", (None, seconds))):
+        times = [t for seed in range(seeds) for t in latencies(seed, decisions, *limits)]
+        print(f"{label}: fastest {min(times):.2f}s, median {statistics.median(times):.2f}s, "
+              f"slowest {max(times):.2f}s over {len(times)} decisions")
+
+
+if __name__ == "__main__":
+    main()
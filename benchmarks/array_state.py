@@ -0,0 +1,47 @@
+"""
+Compare copy time and per-state memory of the GameState backends on a
+60-card state built from experiments/full_game.py's DECK.
+
+Requires numpy. Run from the repository root:
+
+    python -m benchmarks.array_state
+"""
+import random
+import timeit
+import tracemalloc
+from mtg_ai import game, decklist
+from mtg_ai.array_state import ArrayGameState
+from experiments.full_game import DECK
+
+BACKENDS = {
+    'eager': lambda: game.GameState([0]),
+    'copy-on-write': lambda: game.GameState([0], copy_on_write=True),
+    'arrays': lambda: ArrayGameState([0]),
+}
+
+
+def full_deck_state(make_state) -> game.GameState:
+    random.seed(0)
+    gs = make_state()
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    return gs
+
+
+def bytes_per_copy(gs: game.GameState, n: int = 200) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copies = [gs.copy() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(copies)
+
+
+def main(number=2000):
+    for name, make_state in BACKENDS.items():
+        gs = full_deck_state(make_state)
+        copy_time = timeit.timeit(gs.copy, number=number) / number
+        print(f"{name}: copy {1e6 * copy_time:.2f}us, {bytes_per_copy(gs):.0f} bytes per state")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Time reading card attributes through Card.attrs, and possible_actions, on
+states from random games with experiments/full_game.py's DECK, with and
+without a Kaysa (whose static abilities change the power and toughness of
+green creatures) on the field.
+
+Run from the repository root:
+
+    python -m benchmarks.attrs
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search, zones
+from experiments.full_game import DECK
+
+
+def states(count: int, kaysa: bool, seed: int = 0):
+    random.seed(seed)
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    if kaysa:
+        decklist.Kaysa(gs, owner=0).zone = zones.Field(0)
+    result = []
+    while len(result) < count:
+        result.append(gs)
+        possible = actions.possible_actions(gs) or [search.END_TURN]
+        action = random.choice(possible)
+        gs = gs.take_action(action, random.choice(action.choices(gs))).resolve_stack()
+    return result
+
+
+def read_attrs(gs: game.GameState):
+    for card in gs.in_zone(zones.Field()):
+        attrs = card.attrs
+        attrs.types, attrs.keywords, attrs.power, attrs.toughness
+
+
+def main(count=200, repeat=5):
+    for kaysa in (False, True):
+        label = "with Kaysa" if kaysa else "without Kaysa"
+        sample = states(count, kaysa)
+        fields = sum(len(gs.in_zone(zones.Field())) for gs in sample)
+        elapsed = timeit.timeit(lambda: [read_attrs(gs) for gs in sample], number=repeat)
+        print(f"{label}: 4 attrs of a card on the field {1e9 * elapsed / (repeat * fields):.0f}ns", end=", ")
+        elapsed = timeit.timeit(lambda: [actions.possible_actions(gs) for gs in sample], number=repeat)
+        print(f"possible_actions {1e6 * elapsed / (repeat * count):.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measure chance nodes (MCTSSearcher(chance_samples=...)) on the first move
+from opening hands of experiments/full_game.py's DECK: how many chance
+nodes the search makes, how many distinct outcomes their samples group
+into, how often a chance node's outcomes come from the cache, and the time
+per decision against a search without chance nodes.
+
+Run from the repository root:
+
+    python -m benchmarks.chance
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+def chance_nodes(root: search.HistoryNode):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.chance:
+            yield node
+        stack.extend(node.children)
+
+
+def run(seeds, n_iters: int, chance_samples: int | None):
+    elapsed = nodes = outcomes = sampled = 0
+    for seed in seeds:
+        searcher = search.MCTSSearcher(opening_hand(seed), {}, search.staff_victory, 1.5, n_iters=n_iters,
+                                       chance_samples=chance_samples)
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.explore()
+        elapsed += time.perf_counter() - start
+        found = list(chance_nodes(searcher.root))
+        nodes += len(found)
+        outcomes += sum(len(node.children) for node in found)
+        sampled += len(searcher.outcomes)
+    return elapsed / len(seeds), nodes, outcomes, sampled
+
+
+def main():
+    seeds = range(4)
+    n_iters = 200
+    baseline, *_ = run(seeds, n_iters, None)
+    print(f"no chance nodes: {baseline:.2f}s per decision")
+    for samples in (8, 32):
+        elapsed, nodes, outcomes, sampled = run(seeds, n_iters, samples)
+        print(f"{samples} samples: {elapsed:.2f}s per decision, {nodes} chance nodes, "
+              f"{outcomes / max(nodes, 1):.1f} outcomes each, "
+              f"{nodes - sampled} of {nodes} outcome lists from the cache")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare picking a random choice by listing every choice (random.choice on
+list(choices)) with sampling one from the lazy choice set (choices.sample),
+for Saruli Caretaker's ability with many creatures to tap and for Collected
+Company's search, and time random playouts with experiments/full_game.py's
+DECK, which now sample their moves.
+
+Run from the repository root:
+
+    python -m benchmarks.choices
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, zones, search, choices
+from experiments.full_game import opening_hand
+
+
+def saruli_choices(creatures: int):
+    gs = game.GameState([0])
+    saruli = decklist.Saruli(gs)
+    saruli.zone = zones.Field(0)
+    for _ in range(creatures):
+        decklist.WallOfOmens(gs).zone = zones.Field(0)
+    return saruli.attrs.activated[0].get_choices(gs)
+
+
+def company_choices():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.WallOfRoots] * 20)
+    company = decklist.CollectedCompany(gs, owner=0)
+    company.zone = zones.Hand(0)
+    return company.effect.get_choices(gs)
+
+
+def playouts(count: int, seed: int = 0):
+    random.seed(seed)
+    searcher = search.MCTSSearcher(game.GameState([0]), {}, search.staff_victory, C=1)
+    for i in range(count):
+        searcher.playout(search.HistoryNode(opening_hand(seed + i)), 4)
+
+
+def main(repeat=2000):
+    for label, options in [("Saruli, 20 creatures", saruli_choices(20)),
+                           ("Saruli, 60 creatures", saruli_choices(60)),
+                           ("Collected Company", company_choices())]:
+        listed = timeit.timeit(lambda: random.choice(list(options)), number=repeat)
+        sampled = timeit.timeit(lambda: choices.sample(options), number=repeat)
+        print(f"{label} ({len(options)} choices): list and pick {1e6 * listed / repeat:.1f}us, "
+              f"sample {1e6 * sampled / repeat:.1f}us ({listed / sampled:.1f}x)")
+    count = 20
+    elapsed = timeit.timeit(lambda: playouts(count), number=1)
+    print(f"playouts to turn 4: {1e3 * elapsed / count:.1f}ms each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare the peak memory and time of search.bfs from an opening hand of
+experiments/full_game.py's DECK with a breadth-first search that queues
+whole HistoryNodes and game states (as search.bfs used to), and report
+how much of the compact search's memory goes to the queued nodes.
+
+Run from the repository root:
+
+    python -m benchmarks.compact_bfs [timeout]
+"""
+import collections
+import sys
+import time
+import tracemalloc
+from mtg_ai import game, search
+from experiments.full_game import opening_hand
+
+
+def queued_bfs(initial: game.GameState, condition, timeout: int) -> search.SearchResult:
+    queue = collections.deque([search.HistoryNode(initial)])
+    seen = {initial}
+    for i in range(timeout):
+        next_node = queue.popleft()
+        next_state = search.advance(next_node.game_state)
+        if condition(next_state):
+            return search.SearchResult(search.HistoryNode(next_state, next_node), queue, i)
+        for action, choice in search.legal_moves(next_state):
+            child = next_state.take_action(action, choice)
+            node = search.HistoryNode(child, next_node, action, choice)
+            if condition(child):
+                return search.SearchResult(node, queue, i)
+            elif child not in seen:
+                queue.append(node)
+            seen.add(child)
+    return search.SearchResult(None, queue, i)
+
+
+def measure(label: str, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label}: {result.n_iters} states expanded, {len(result.remaining)} queued, "
+          f"{elapsed:.1f}s, peak {peak / 2**20:.1f}MiB")
+    return result
+
+
+def main(timeout: int = 1500):
+    measure("queued states", lambda: queued_bfs(opening_hand(1), search.staff_victory, timeout))
+    result = measure("compact", lambda: search.bfs(opening_hand(1), search.staff_victory, timeout))
+    table = result.remaining.table
+    print(f"  the compact search's {len(table)} nodes take {len(table) * 16 / 2**10:.0f}KiB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
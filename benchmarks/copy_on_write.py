@@ -0,0 +1,42 @@
+"""
+Compare eager and copy-on-write GameState copies on a 60-card state built
+from experiments/full_game.py's DECK.
+
+Run from the repository root:
+
+    python -m benchmarks.copy_on_write
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search
+from experiments.full_game import DECK
+
+
+def full_deck_state(copy_on_write: bool, seed: int = 0) -> game.GameState:
+    random.seed(seed)
+    gs = game.GameState([0], copy_on_write=copy_on_write)
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    return gs
+
+
+def playout(gs: game.GameState, max_turns: int = 5) -> game.GameState:
+    while gs.turn_number < max_turns:
+        possible = actions.possible_actions(gs) or [search.END_TURN]
+        action = random.choice(possible)
+        choice = random.choice(action.choices(gs))
+        gs = gs.take_action(action, choice).resolve_stack()
+    return gs
+
+
+def main(number=2000, playouts=20):
+    for copy_on_write in (False, True):
+        gs = full_deck_state(copy_on_write)
+        label = "copy-on-write" if copy_on_write else "eager"
+        copy_time = timeit.timeit(gs.copy, number=number) / number
+        random.seed(1)
+        playout_time = timeit.timeit(lambda: playout(gs), number=playouts) / playouts
+        print(f"{label}: copy {1e6 * copy_time:.2f}us, random playout to turn 5 {1e3 * playout_time:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
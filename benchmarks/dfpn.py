@@ -0,0 +1,33 @@
+"""
+Compare dfpn (depth-first proof-number search) with bfs on "can this
+opening hand win by turn T?": opening hands of experiments/full_game.py's
+DECK, asked about each turn up to 5.
+
+bfs finds the earliest win, or runs out of time, whatever T is; dfpn
+answers for one T at a time, with a proof when the answer is no. Reports
+each search's answer, the states it expanded and its time.
+
+Run from the repository root:
+
+    python -m benchmarks.dfpn
+"""
+import time
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+def main(seeds: int = 5, turns: int = 5, seconds: float = 10):
+    for seed in range(seeds):
+        start = time.perf_counter()
+        result = search.bfs(opening_hand(seed), search.staff_victory, deadline=time.monotonic() + seconds)
+        found = "none found" if result.final_state is None else f"turn {result.final_state.game_state.turn_number}"
+        print(f"seed {seed}: bfs {found}, {result.n_iters} states, {time.perf_counter() - start:.2f}s")
+        for turn in range(1, turns + 1):
+            start = time.perf_counter()
+            result = search.dfpn(opening_hand(seed), search.staff_victory, turn, deadline=time.monotonic() + seconds)
+            answer = {True: "win", False: "no win", None: "unknown"}[result.win]
+            print(f"  by turn {turn}: dfpn {answer}, {result.n_iters} states, {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
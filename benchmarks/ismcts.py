@@ -0,0 +1,49 @@
+"""
+Compare the throughput of MCTSSearcher, which plays every iteration with
+the real order of the library, and ISMCTSSearcher, which plays each one
+with a determinization that shuffles it, choosing the first move from
+opening hands of experiments/full_game.py's DECK.
+
+Reports the MCTS iterations per second of each; the determinizations are
+sampled in batches, so information-set search should stay within 2x of
+the perfect-information searcher.
+
+Run from the repository root:
+
+    python -m benchmarks.ismcts
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+def throughput(searcher_class, seeds, n_iters: int, **kwargs) -> float:
+    iterations = elapsed = 0
+    for seed in seeds:
+        searcher = searcher_class(opening_hand(seed), {}, search.staff_victory, 1.5, n_iters=n_iters, **kwargs)
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.choose()
+        elapsed += time.perf_counter() - start
+        iterations += sum(child.visits for child in searcher.root.children)
+    return iterations / elapsed
+
+
+def main():
+    seeds = range(4)
+    n_iters = 200
+    perfect = throughput(search.MCTSSearcher, seeds, n_iters)
+    print(f"perfect information: {perfect:.1f} iterations/s")
+    for batch_size, per_determinization in [(8, 8), (16, 4), (4, 16)]:
+        hidden = throughput(search.ISMCTSSearcher, seeds, n_iters, batch_size=batch_size,
+                            iterations_per_determinization=per_determinization)
+        print(f"information sets, {batch_size} determinizations x {per_determinization} iterations: "
+              f"{hidden:.1f} iterations/s ({hidden / perfect:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
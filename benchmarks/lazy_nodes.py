@@ -0,0 +1,71 @@
+"""
+Compare the peak memory and time of an MCTS search from
+experiments/run_mcts.py's position when every child's game state is computed
+as soon as its parent is expanded (as HistoryNode.expand used to), when it's
+computed the first time the child is selected, and when at most a few
+hundred states are kept at once (max_states).
+
+Run from the repository root:
+
+    python -m benchmarks.lazy_nodes [n_iters]
+"""
+import random
+import sys
+import time
+import tracemalloc
+from mtg_ai import game, decklist, search, zones
+
+
+class EagerNode(search.HistoryNode):
+    __slots__ = ()
+
+    def expand(self):
+        if not self.children:
+            state = self.game_state
+            self.children = [EagerNode(state.take_action(action, choice), self, action, choice)
+                             for action, choice in search.legal_moves(state)]
+        return self.children
+
+
+def position() -> game.GameState:
+    gs = game.GameState([0])
+    for card in (decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.WallOfRoots, decklist.Battlement):
+        card(gs).zone = zones.Hand(0)
+    decklist.build_deck(gs, 0, [decklist.Axebane, decklist.WallOfOmens, decklist.Staff, decklist.Forest])
+    return gs
+
+
+def nodes(root: search.HistoryNode):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+def run(label: str, n_iters: int, eager: bool = False, max_states=None):
+    random.seed(0)
+    searcher = search.MCTSSearcher(position(), {}, search.staff_victory, 1.2,
+                                   n_iters=n_iters, max_states=max_states)
+    if eager:
+        searcher.root = EagerNode(searcher.root.game_state)
+    tracemalloc.start()
+    start = time.perf_counter()
+    searcher.choose()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tree = list(nodes(searcher.root))
+    stored = sum(node.materialized for node in tree)
+    print(f"{label}: {len(tree)} nodes, {stored} states stored, "
+          f"peak {peak / 1e6:.1f}MB, {elapsed:.1f}s")
+
+
+def main(n_iters=300):
+    run("eager", n_iters, eager=True)
+    run("lazy", n_iters)
+    run("lazy, max_states=50", n_iters, max_states=50)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
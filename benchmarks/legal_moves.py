@@ -0,0 +1,59 @@
+"""
+Compare listing the moves of a state with possible_actions and each action's
+choices against actions.legal_moves, which reuses the moves cached on the
+state's parent, on the children of states along a random line of play with
+experiments/full_game.py's DECK.
+
+Run from the repository root:
+
+    python -m benchmarks.legal_moves
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search
+from experiments.full_game import DECK
+
+
+def children(copy_on_write: bool, count: int, seed: int = 0):
+    """
+    (parent, action, choice) for :count: moves along a random line of play,
+    with the parent's moves already listed
+    """
+    random.seed(seed)
+    gs = game.GameState([0], copy_on_write=copy_on_write)
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    result = []
+    while len(result) < count:
+        action, choice = random.choice(search.legal_moves(gs))
+        result.append((gs, action, choice))
+        gs = gs.take_action(action, choice).resolve_stack()
+    return result
+
+
+def listed(gs: game.GameState):
+    return [(action, choice) for action in actions.possible_actions(gs) for choice in action.choices(gs)]
+
+
+def from_scratch(gs: game.GameState):
+    gs.move_cache = {}
+    return actions.legal_moves(gs)
+
+
+def main(count=300, repeat=5):
+    for copy_on_write in (False, True):
+        label = "copy-on-write" if copy_on_write else "eager"
+        trials = children(copy_on_write, count)
+        # every child gets listed once per run, so each run starts from the parent's cache
+        runs = [[parent.take_action(action, choice) for parent, action, choice in trials]
+                for _ in range(3 * repeat)]
+        old = timeit.timeit(lambda: [listed(gs) for gs in runs.pop()], number=repeat)
+        uncached = timeit.timeit(lambda: [from_scratch(gs) for gs in runs.pop()], number=repeat)
+        cached = timeit.timeit(lambda: [actions.legal_moves(gs) for gs in runs.pop()], number=repeat)
+        n = count * repeat
+        print(f"{label}: possible_actions + choices {1e6 * old / n:.1f}us, "
+              f"legal_moves from scratch {1e6 * uncached / n:.1f}us, "
+              f"legal_moves from the parent's cache {1e6 * cached / n:.1f}us ({old / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Time the Mana operations that run in the innermost loop of playouts, and
+possible_actions on states from random games with experiments/full_game.py's DECK.
+
+Run from the repository root:
+
+    python -m benchmarks.mana
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search
+from mtg_ai.mana import Mana
+from experiments.full_game import DECK
+
+
+def states(count: int, seed: int = 0):
+    random.seed(seed)
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    result = []
+    while len(result) < count:
+        result.append(gs)
+        possible = actions.possible_actions(gs) or [search.END_TURN]
+        action = random.choice(possible)
+        gs = gs.take_action(action, random.choice(action.choices(gs))).resolve_stack()
+    return result
+
+
+def main(number=100000):
+    pool = Mana(green=3, gold=1, colorless=1)
+    costs = [Mana(green=1, generic=2), Mana(white=1, blue=1), Mana(generic=3), Mana(green=2, gold=1)]
+    cost = costs[0]
+
+    def isub():
+        paid = pool.copy()
+        paid -= cost
+
+    operations = {
+        'copy': pool.copy,
+        '+=': lambda: pool.copy().__iadd__(cost),
+        'copy, -=': isub,
+        'can_pay': lambda: pool.can_pay(cost),
+        f'can_pay_many ({len(costs)} costs)': lambda: pool.can_pay_many(costs),
+        'mana_value': lambda: pool.mana_value,
+        '==': lambda: pool == cost,
+    }
+    for name, operation in operations.items():
+        elapsed = timeit.timeit(operation, number=number)
+        print(f"Mana {name}: {1e9 * elapsed / number:.0f}ns")
+
+    sample = states(200)
+    elapsed = timeit.timeit(lambda: [actions.possible_actions(gs) for gs in sample], number=5)
+    print(f"possible_actions: {1e6 * elapsed / (5 * len(sample)):.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare the states per second expanded by search.bfs and by
+search.parallel_bfs with 1, 2 and 4 worker processes, from an opening
+hand of experiments/full_game.py's DECK, and check that they all find the
+same result.
+
+Parallel workers rebuild the states they're sent by replaying moves, and
+pass every child through a queue, so a worker is slower than bfs on its
+own; they only pay off with more cores than that overhead costs
+(os.cpu_count()).
+
+Run from the repository root:
+
+    python -m benchmarks.parallel_bfs [timeout]
+"""
+import os
+import sys
+import time
+from mtg_ai import game, search
+from experiments.full_game import opening_hand
+
+
+def summary(result: search.SearchResult):
+    final = result.final_state
+    return result.n_iters, len(result.remaining), final and game.canonical_key(final.game_state)
+
+
+def main(timeout: int = 2000):
+    print(f"{os.cpu_count()} cores")
+    start = time.perf_counter()
+    serial = search.bfs(opening_hand(1), search.staff_victory, timeout)
+    baseline = (serial.n_iters + 1) / (time.perf_counter() - start)
+    print(f"bfs: {baseline:.0f} states/s")
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        parallel = search.parallel_bfs(opening_hand(1), search.staff_victory, timeout, workers=workers)
+        rate = (parallel.n_iters + 1) / (time.perf_counter() - start)
+        same = "same result" if summary(parallel) == summary(serial) else "DIFFERENT RESULT"
+        print(f"{workers} workers: {rate:.0f} states/s ({rate / baseline:.2f}x), {same}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
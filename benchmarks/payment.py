@@ -0,0 +1,115 @@
+"""
+Count the lines of play that lead up to the next action that isn't a mana
+ability (casting a spell, playing a land, ...), when mana abilities are
+activated one at a time and when they're activated by :payment.payments():'s
+macro-actions (`possible_actions(..., payments=True)`), on states with five
+to eight untapped mana sources reached by random play with
+experiments/full_game.py's DECK. Then search the same states with
+MCTSSearcher with and without `payments=True` for a few seconds each, and
+report the moves from the root, the children of each expanded node and the
+nodes expanded per decision.
+
+Run from the repository root:
+
+    python -m benchmarks.payment
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import game, decklist, actions, search, payment
+from experiments.full_game import DECK
+
+
+def sources(gs: game.GameState) -> int:
+    return len({source.uid for source in
+                (activation.source for activation in payment.activations(gs, gs.active_player))})
+
+
+def states(count: int, min_sources: int = 5, max_sources: int = 8, seed: int = 0):
+    """
+    :count: states at the start of a turn with :min_sources: to :max_sources: untapped mana sources
+    """
+    random.seed(seed)
+    result = []
+    while len(result) < count:
+        gs = game.GameState([0])
+        decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+        while gs.turn_number < 12 and len(result) < count:
+            possible = actions.possible_actions(gs) or [search.END_TURN]
+            action = random.choice(possible)
+            gs = gs.take_action(action, random.choice(action.choices(gs))).resolve_stack()
+            if action is search.END_TURN and min_sources <= sources(gs) <= max_sources:
+                result.append(gs)
+    return result
+
+
+def lines(gs: game.GameState, payments: bool, counts: dict) -> int:
+    """
+    The number of sequences of moves from :gs: up to and including the first
+    move that isn't a mana ability. Equal states are followed by the same
+    number of sequences, so each state's count is only computed once.
+    """
+    if gs in counts:
+        return counts[gs]
+    count = 0
+    for action in actions.possible_actions(gs, payments=payments):
+        for choice in action.get_choices(gs):
+            if payment.is_mana_ability(action):
+                count += lines(gs.take_action(action, choice), payments, counts)
+            else:
+                count += 1
+    counts[gs] = count
+    return count
+
+
+def search_states(positions, payments: bool, seconds: float):
+    """
+    The moves from the root, the children of each expanded node, the nodes
+    expanded and the time per decision of an MCTS search of each of
+    :positions:, five turns ahead, that stops after the first iteration past
+    :seconds:, on average.
+    """
+    moves = expanded = children = elapsed = 0
+    for seed, gs in enumerate(positions):
+        searcher = search.MCTSSearcher(gs, {}, search.staff_victory, 1.5, max_turns=gs.turn_number + 5,
+                                       n_iters=None, payments=payments)
+        moves += len(search.legal_moves(gs, payments))
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.choose(deadline=time.monotonic() + seconds)
+        elapsed += time.perf_counter() - start
+        stack = [searcher.root]
+        while stack:
+            node = stack.pop()
+            if node.children:
+                expanded += 1
+                children += len(node.children)
+                stack.extend(node.children)
+    return moves / len(positions), children / expanded, expanded / len(positions), elapsed / len(positions)
+
+
+def main(count=10, seconds=5.0):
+    totals = {False: 0, True: 0}
+    elapsed = {False: 0.0, True: 0.0}
+    for gs in states(count):
+        counts = {}
+        for payments in (False, True):
+            start = time.perf_counter()
+            counts[payments] = lines(gs, payments, {})
+            elapsed[payments] += time.perf_counter() - start
+            totals[payments] += counts[payments]
+        print(f"{sources(gs)} sources, {len(gs.in_zone(game.zones.Hand(0)))} cards in hand: "
+              f"{counts[False]} lines one at a time, {counts[True]} with payments")
+    print(f"total: {totals[False]} lines one at a time ({elapsed[False]:.1f}s), "
+          f"{totals[True]} with payments ({elapsed[True]:.1f}s, {totals[False] / totals[True]:.1f}x fewer)")
+    positions = states(count)
+    for payments in (False, True):
+        moves, branching, expanded, elapsed = search_states(positions, payments, seconds)
+        print(f"MCTS, payments={payments}: {moves:.1f} moves from the root, {branching:.1f} children "
+              f"per expanded node, {expanded:.0f} nodes expanded in {elapsed:.1f}s per decision")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Measure how MCTS iterations per second scale with the number of worker
+processes in RootParallelSearcher, from an opening hand of
+experiments/full_game.py's DECK. Each worker runs n_iters iterations, so
+perfect scaling multiplies iterations per second by the number of workers
+(up to the number of cores: os.cpu_count()).
+
+Run from the repository root:
+
+    python -m benchmarks.root_parallel
+"""
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+def main(n_iters=40, max_workers=8):
+    print(f"{os.cpu_count()} cores")
+    workers = 1
+    baseline = None
+    while workers <= max_workers:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            # start the processes before timing
+            list(executor.map(abs, range(workers)))
+            searcher = search.RootParallelSearcher(opening_hand(0), {}, search.staff_victory, 1.5, n_iters=n_iters,
+                                                   workers=workers, executor=executor)
+            random.seed(0)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                searcher.explore()
+            elapsed = time.perf_counter() - start
+        rate = workers * n_iters / elapsed
+        baseline = baseline or rate
+        print(f"{workers} workers: {rate:.1f} iterations/s ({rate / baseline:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
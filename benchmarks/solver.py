@@ -0,0 +1,77 @@
+"""
+Compare MCTSSearcher with and without the solver (MCTSSearcher(solver=True))
+on small goldfish positions: the opening hand of benchmarks/fetch.py, and
+the states a random playout of an opening hand of
+experiments/full_game.py's DECK reaches at the start of each turn, searched
+up to a horizon a turn or two away.
+
+Reports the iterations and time per decision, and how many of the roots
+were proven. A root that's proven stops the search early.
+
+Run from the repository root:
+
+    python -m benchmarks.solver
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import game, decklist, search, choices as lazy
+from experiments.full_game import opening_hand
+
+
+def fetch_position() -> game.GameState:
+    gs = game.GameState([0])
+    decklist.build_deck(
+        gs, 0,
+        [decklist.WindsweptHeath, decklist.WindsweptHeath, decklist.WallOfRoots, decklist.WallOfRoots, decklist.Battlement,
+         decklist.Axebane, decklist.WallOfOmens, decklist.Staff, decklist.Forest, decklist.Forest, decklist.Forest],
+        hand_size=5,
+    )
+    gs.land_drops = 1
+    return gs
+
+
+def turn_starts(seed: int, turns: int = 4):
+    state = opening_hand(seed)
+    random.seed(seed)
+    starts = [state]
+    while state.turn_number < turns:
+        action, options = random.choice(search.actions_with_choices(state))
+        state = state.take_action(action, lazy.sample(options)).resolve_stack()
+        if state.turn_number > starts[-1].turn_number:
+            starts.append(state)
+    return starts
+
+
+def run(positions, n_iters: int, solver: bool):
+    elapsed = iterations = proven = 0
+    for seed, (position, horizon) in enumerate(positions):
+        searcher = search.MCTSSearcher(position, {}, search.staff_victory, 1.5, n_iters=n_iters,
+                                       max_turns=horizon, solver=solver)
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.choose()
+        elapsed += time.perf_counter() - start
+        iterations += searcher.root.visits
+        proven += searcher.root.proven is not None
+    return elapsed / len(positions), iterations / len(positions), proven
+
+
+def main(n_iters: int = 2000, seeds: int = 3):
+    suites = {
+        "fetch, horizon 2": [(fetch_position(), 2)],
+        "fetch, horizon 3": [(fetch_position(), 3)],
+        "turn starts, next turn": [(state, state.turn_number + 1)
+                                   for seed in range(seeds) for state in turn_starts(seed)],
+    }
+    for name, positions in suites.items():
+        for solver in (False, True):
+            elapsed, iterations, proven = run(positions, n_iters, solver)
+            print(f"{name}, solver={solver}: {elapsed:.2f}s and {iterations:.0f} iterations per decision, "
+                  f"{proven}/{len(positions)} roots proven")
+
+
+if __name__ == "__main__":
+    main()
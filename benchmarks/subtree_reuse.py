@@ -0,0 +1,78 @@
+"""
+Compare playing the first moves of a game with a fresh MCTSSearcher for
+every decision (as experiments/full_game.py used to) and with one searcher
+that keeps the chosen subtree between decisions (reuse=True), from an
+opening hand of experiments/full_game.py's DECK.
+
+Both share a transposition table across decisions. Reports the MCTS
+iterations run per decision, the time per decision, and how many nodes
+of the tree are carried over to the next decision.
+
+Run from the repository root:
+
+    python -m benchmarks.subtree_reuse
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+class CountingSearcher(search.MCTSSearcher):
+    iterations_run = 0
+
+    def explore_node(self, node):
+        self.iterations_run += 1
+        super().explore_node(node)
+
+
+def tree_size(root: search.HistoryNode) -> int:
+    size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+
+def play(seed: int, reuse: bool, n_iters: int, decisions: int):
+    state = opening_hand(seed)
+    random.seed(seed)
+    statistics = {}
+    searcher = CountingSearcher(state, statistics, search.staff_victory, 1.5, n_iters=n_iters, reuse=reuse)
+    iterations = carried = 0
+    for _ in range(decisions):
+        if search.staff_victory(state):
+            break
+        if not reuse:
+            searcher = CountingSearcher(state, statistics, search.staff_victory, 1.5, n_iters=n_iters)
+        searcher.iterations_run = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            chosen = searcher.choose()
+        iterations += searcher.iterations_run
+        if reuse:
+            carried += tree_size(searcher.root)
+        state = chosen.game_state
+    return iterations, carried
+
+
+def main(n_iters=100, decisions=8, seeds=2):
+    for reuse in (False, True):
+        iterations = carried = 0
+        start = time.perf_counter()
+        for seed in range(seeds):
+            run_iterations, run_carried = play(seed, reuse, n_iters, decisions)
+            iterations += run_iterations
+            carried += run_carried
+        elapsed = time.perf_counter() - start
+        label = "reused tree" if reuse else "fresh trees"
+        print(f"{label}: {iterations / (seeds * decisions):.1f} iterations per decision, "
+              f"{elapsed / (seeds * decisions):.2f}s per decision, "
+              f"{carried / (seeds * decisions):.0f} nodes carried over")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compare MCTS iterations per second for MCTSSearcher and for
+ThreadedMCTSSearcher with 1, 2 and 4 threads, from an opening hand of
+experiments/full_game.py's DECK.
+
+Playouts are pure Python, so threads only run them in parallel on a
+free-threaded (no-GIL) CPython with several cores; elsewhere expect the
+threaded searcher to be no faster than the single-threaded one, and a
+little slower for its locking.
+
+Run from the repository root:
+
+    python -m benchmarks.threaded
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from mtg_ai import search
+from experiments.full_game import opening_hand
+
+
+def rate(searcher: search.MCTSSearcher) -> float:
+    random.seed(0)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        searcher.explore()
+    return searcher.root.stats.visits / (time.perf_counter() - start)
+
+
+def main(n_iters=100):
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{os.cpu_count()} cores, GIL {'enabled' if gil else 'disabled'}")
+    baseline = rate(search.MCTSSearcher(opening_hand(0), {}, search.staff_victory, 1.5, n_iters=n_iters))
+    print(f"single-threaded: {baseline:.1f} iterations/s")
+    for threads in (1, 2, 4):
+        threaded = rate(search.ThreadedMCTSSearcher(opening_hand(0), {}, search.staff_victory, 1.5,
+                                                    n_iters=n_iters, threads=threads))
+        print(f"{threads} threads: {threaded:.1f} iterations/s ({threaded / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+How many MCTS iterations it takes to find the right moves in
+benchmarks/fetch.py's position (play Windswept Heath, then crack it), with
+the transposition table (statistics={}) and without it (statistics=None):
+for each number of iterations, how many of a set of seeds choose the right
+move, and how many nodes and distinct statistics the tree ended up with.
+
+Run from the repository root:
+
+    python -m benchmarks.transpositions
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import game, search, decklist, actions, zones
+
+
+def position() -> game.GameState:
+    gs = game.GameState([0])
+    decklist.build_deck(
+        gs, 0,
+        [decklist.WindsweptHeath, decklist.WindsweptHeath, decklist.WallOfRoots, decklist.WallOfRoots, decklist.Battlement,
+         decklist.Axebane, decklist.WallOfOmens, decklist.Staff, decklist.Forest, decklist.Forest, decklist.Forest],
+        hand_size=5,
+    )
+    gs.land_drops = 1
+    return gs
+
+
+def fetch_played() -> game.GameState:
+    gs = position()
+    heath = next(card for card in gs.in_zone(zones.Hand(0)) if card.attrs.name == "Windswept Heath")
+    return gs.take_action(actions.PlayLand(heath))
+
+
+def plays_fetch(node: search.HistoryNode) -> bool:
+    return (isinstance(node.action, actions.PlayLand)
+            and node.game_state.get(node.action.card).attrs.name == "Windswept Heath")
+
+
+def cracks_fetch(node: search.HistoryNode) -> bool:
+    return isinstance(node.action, actions.ActivatedAbility) and bool(node.game_state.in_zone(zones.Grave()))
+
+
+def nodes(root: search.HistoryNode):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+def main(iterations=(1, 3, 10, 30, 100), seeds=10):
+    for step, start_at, is_right in (("play the fetch", position, plays_fetch),
+                                     ("crack the fetch", fetch_played, cracks_fetch)):
+        print(step)
+        compare(start_at, is_right, iterations, seeds)
+
+
+def compare(start_at, is_right, iterations, seeds):
+    for n_iters in iterations:
+        for label, table in (("no table", lambda: None), ("transposition table", dict)):
+            right = 0
+            nodes_seen = stats_seen = 0
+            start = time.perf_counter()
+            for seed in range(seeds):
+                random.seed(seed)
+                searcher = search.MCTSSearcher(start_at(), table(), search.staff_victory, 1.2, n_iters=n_iters)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    right += is_right(searcher.choose())
+                visited = [node for node in nodes(searcher.root) if node.stats is not None]
+                nodes_seen += len(visited)
+                stats_seen += len({id(node.stats) for node in visited})
+            elapsed = time.perf_counter() - start
+            print(f"  n_iters={n_iters}, {label}: right {right}/{seeds}, "
+                  f"{nodes_seen / seeds:.0f} nodes visited, {stats_seen / seeds:.0f} distinct statistics, "
+                  f"{elapsed / seeds:.2f}s per search")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Time take_action on a trigger-heavy board: an Arcades the Strategist and
+four Walls of Omens on the field, whose triggers are checked against
+every event, including those of the actions nested in each move.
+
+Run from the repository root:
+
+    python -m benchmarks.triggers
+"""
+import timeit
+from mtg_ai import game, decklist, actions, zones, search
+
+
+def board(triggers: bool) -> game.GameState:
+    """
+    The trigger-heavy board, or (if not :triggers:) the same board with
+    Steel Walls, which have no abilities, in place of the cards with triggers
+    """
+    gs = game.GameState([0])
+    walls = [decklist.Arcades] + [decklist.WallOfOmens] * 4 if triggers else [decklist.SteelWall] * 5
+    for card_type in walls + [decklist.Forest] * 4 + [decklist.Saruli]:
+        card_type(gs, owner=0).zone = zones.Field(0)
+    for card_type in [decklist.Forest, decklist.WallOfRoots, decklist.Axebane]:
+        card_type(gs, owner=0).zone = zones.Hand(0)
+    decklist.build_deck(gs, 0, [decklist.Forest] * 10)
+    return gs
+
+
+def in_place(gs: game.GameState, action, choice):
+    mark = gs.mark()
+    gs.take_action(action, choice, copy=False)
+    gs.undo(mark)
+
+
+def main(number=200):
+    for triggers in (False, True):
+        gs = board(triggers)
+        moves = [(action, choice) for action in actions.possible_actions(gs) + [search.END_TURN]
+                 for choice in action.get_choices(gs)]
+        copied = timeit.timeit(lambda: [gs.take_action(action, choice) for action, choice in moves], number=number)
+        undone = timeit.timeit(lambda: [in_place(gs, action, choice) for action, choice in moves], number=number)
+        label = "Arcades and 4 Walls of Omens" if triggers else "5 Steel Walls"
+        n = number * len(moves)
+        print(f"{label}: take_action {1e6 * copied / n:.1f}us per move, "
+              f"in place + undo {1e6 * undone / n:.1f}us ({len(moves)} moves)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare trying an action on a copy of a state (take_action) with trying it
+in place and rolling it back (mark / take_action(copy=False) / undo), on
+states along a random line of play with experiments/full_game.py's DECK.
+
+Run from the repository root:
+
+    python -m benchmarks.undo
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search
+from experiments.full_game import DECK
+
+
+def steps(copy_on_write: bool, count: int, seed: int = 0):
+    """
+    :count: (state, action, choice) triples along a random line of play from a 60-card state
+    """
+    random.seed(seed)
+    gs = game.GameState([0], copy_on_write=copy_on_write)
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    result = []
+    while len(result) < count:
+        possible = actions.possible_actions(gs) or [search.END_TURN]
+        action = random.choice(possible)
+        choice = random.choice(action.choices(gs))
+        # each state gets its own copy, so trying actions in place can't affect the others
+        result.append((gs.copy(), action, choice))
+        gs = gs.take_action(action, choice).resolve_stack()
+    return result
+
+
+def try_in_place(gs: game.GameState, action, choice):
+    mark = gs.mark()
+    gs.take_action(action, choice, copy=False)
+    gs.undo(mark)
+
+
+def main(count=500, repeat=5):
+    for copy_on_write in (False, True):
+        label = "copy-on-write" if copy_on_write else "eager"
+        trials = steps(copy_on_write, count)
+        copied = timeit.timeit(lambda: [gs.take_action(a, c) for gs, a, c in trials], number=repeat)
+        in_place = timeit.timeit(lambda: [try_in_place(gs, a, c) for gs, a, c in trials], number=repeat)
+        n = count * repeat
+        print(f"{label}: take_action {1e6 * copied / n:.2f}us, "
+              f"in place + undo {1e6 * in_place / n:.2f}us ({copied / in_place:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
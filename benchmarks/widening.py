@@ -0,0 +1,74 @@
+"""
+Compare MCTSSearcher with and without progressive widening
+(MCTSSearcher(widening=(k, alpha))) on wide positions: for each seed, the
+state with the most legal moves on a random playout of an opening hand of
+experiments/full_game.py's DECK.
+
+Reports the time per decision, the nodes in the tree, how many of them
+have had their game state computed, the moves kept without a node, and
+the depth of the tree.
+
+Run from the repository root:
+
+    python -m benchmarks.widening
+"""
+import contextlib
+import io
+import random
+import time
+from mtg_ai import game, search, choices as lazy
+from experiments.full_game import opening_hand
+
+
+def widest(seed: int, turns: int = 6) -> game.GameState:
+    state = opening_hand(seed)
+    random.seed(seed)
+    widest, moves = state, 0
+    while state.turn_number < turns:
+        if len(search.legal_moves(state)) > moves:
+            widest, moves = state, len(search.legal_moves(state))
+        action, options = random.choice(search.actions_with_choices(state))
+        state = state.take_action(action, lazy.sample(options)).resolve_stack()
+    return widest
+
+
+def tree_stats(root: search.HistoryNode):
+    nodes = states = pending = depth = 0
+    stack = [(root, 0)]
+    while stack:
+        node, level = stack.pop()
+        nodes += 1
+        states += node.materialized
+        pending += len(node.pending or ())
+        depth = max(depth, level)
+        stack.extend((child, level + 1) for child in node.children)
+    return nodes, states, pending, depth
+
+
+def run(positions, n_iters: int, widening):
+    elapsed = 0
+    totals = [0, 0, 0, 0]
+    for seed, position in enumerate(positions):
+        searcher = search.MCTSSearcher(position, {}, search.staff_victory, 1.5, n_iters=n_iters,
+                                       widening=widening)
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.explore()
+        elapsed += time.perf_counter() - start
+        totals = [total + value for total, value in zip(totals, tree_stats(searcher.root))]
+    return elapsed / len(positions), [total / len(positions) for total in totals]
+
+
+def main():
+    positions = [widest(seed) for seed in range(4)]
+    print("moves from each position:", [len(search.legal_moves(position)) for position in positions])
+    n_iters = 200
+    for widening in (None, (1, 0.5), (2, 0.5)):
+        elapsed, (nodes, states, pending, depth) = run(positions, n_iters, widening)
+        print(f"widening {widening}: {elapsed:.2f}s per decision, {nodes:.0f} nodes, "
+              f"{states:.0f} states computed, {pending:.0f} moves waiting, depth {depth:.1f}")
+
+
+if __name__ == '__main__':
+    main()
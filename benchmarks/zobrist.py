@@ -0,0 +1,51 @@
+"""
+Compare GameState.zobrist_hash, which only rehashes the objects an action
+changed, with hashing canonical_key from scratch, on a 60-card state built
+from experiments/full_game.py's DECK.
+
+Run from the repository root:
+
+    python -m benchmarks.zobrist
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search
+from mtg_ai.game import canonical_key
+from experiments.full_game import DECK
+
+
+def successors(copy_on_write: bool, count: int, seed: int = 0):
+    """
+    :count: (parent, action, choice) triples along a random line of play from a 60-card state
+    """
+    random.seed(seed)
+    gs = game.GameState([0], copy_on_write=copy_on_write)
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    steps = []
+    while len(steps) < count:
+        possible = actions.possible_actions(gs) or [search.END_TURN]
+        action = random.choice(possible)
+        choice = random.choice(action.choices(gs))
+        steps.append((gs, action, choice))
+        gs = gs.take_action(action, choice).resolve_stack()
+    return steps
+
+
+def main(count=2000):
+    for copy_on_write in (False, True):
+        label = "copy-on-write" if copy_on_write else "eager"
+        steps = successors(copy_on_write, count)
+        for parent, _, _ in steps:
+            parent.zobrist_hash()
+        # as in bfs: each child is hashed once its parent has been
+        children = [parent.take_action(action, choice) for parent, action, choice in steps]
+        incremental = timeit.timeit(lambda: [child.zobrist_hash() for child in children], number=1)
+        children = [parent.take_action(action, choice) for parent, action, choice in steps]
+        from_scratch = timeit.timeit(lambda: [hash(canonical_key(child)) for child in children], number=1)
+        print(f"{label}: zobrist_hash {1e6 * incremental / count:.2f}us per state, "
+              f"hash(canonical_key) {1e6 * from_scratch / count:.2f}us "
+              f"({from_scratch / incremental:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare GameState.in_zone (backed by the zone index) with the linear scan it
+replaced, on a 60-card state built from experiments/full_game.py's DECK.
+
+Run from the repository root:
+
+    python -m benchmarks.zone_index
+"""
+import timeit
+from mtg_ai import game, decklist, zones
+from experiments.full_game import DECK
+
+
+def scan_in_zone(gs, zone):
+    return sorted([c for c in gs.objects if zone.contains(c)],
+                  key=lambda card: card.zone.position or float('-inf'))
+
+
+def full_deck_state() -> game.GameState:
+    gs = game.GameState([0])
+    (hand, deck) = decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    for card in deck[-5:]:
+        card.zone = zones.Field(0)
+    return gs
+
+
+def main(number=2000):
+    gs = full_deck_state()
+    queries = [zones.Hand(0), zones.Field(0), zones.Deck(0), zones.Stack(), zones.Field()]
+    for zone in queries:
+        assert gs.in_zone(zone) == scan_in_zone(gs, zone)
+        indexed = timeit.timeit(lambda: gs.in_zone(zone), number=number)
+        scanned = timeit.timeit(lambda: scan_in_zone(gs, zone), number=number)
+        print(f"{type(zone).__name__}({zone.owner}): "
+              f"index {1e6 * indexed / number:.2f}us, scan {1e6 * scanned / number:.2f}us "
+              f"({scanned / indexed:.1f}x)")
+
+    copies = timeit.timeit(gs.copy, number=number // 10)
+    print(f"GameState.copy: {1e6 * copies / (number // 10):.2f}us")
+
+
+if __name__ == "__main__":
+    main()
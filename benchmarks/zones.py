@@ -0,0 +1,60 @@
+"""
+Count the zones looked up and the Zone objects allocated while playing
+random games with experiments/full_game.py's DECK, and time Zone.contains.
+
+Before zones were interned every lookup allocated a new Zone; now a Zone is
+only allocated the first time each (kind, owner, position) is seen.
+
+Run from the repository root:
+
+    python -m benchmarks.zones
+"""
+import random
+import timeit
+from mtg_ai import game, decklist, actions, search, zones
+from experiments.full_game import DECK
+
+
+def count_lookups(games: int = 20, max_turns: int = 5):
+    lookups = 0
+    intern = zones.ZoneType.__call__
+
+    def counting(cls, owner=None, position=None):
+        nonlocal lookups
+        lookups += 1
+        return intern(cls, owner, position)
+
+    zones.ZoneType.__call__ = counting
+    try:
+        allocated = len(zones._ZONES)
+        steps = 0
+        for seed in range(games):
+            random.seed(seed)
+            gs = game.GameState([0])
+            decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+            while gs.turn_number < max_turns:
+                possible = actions.possible_actions(gs) or [search.END_TURN]
+                action = random.choice(possible)
+                gs = gs.take_action(action, random.choice(action.choices(gs))).resolve_stack()
+                steps += 1
+        allocated = len(zones._ZONES) - allocated
+    finally:
+        zones.ZoneType.__call__ = intern
+    return steps, lookups, allocated
+
+
+def main(number=200000):
+    steps, lookups, allocated = count_lookups()
+    print(f"{steps} actions: {lookups / steps:.1f} zone lookups per action, "
+          f"{allocated} Zone objects allocated in total")
+
+    gs = game.GameState([0])
+    card = decklist.Forest(gs)
+    card.zone = zones.Deck(0, 12)
+    for zone in (zones.Deck(0, 12), zones.Deck(0), zones.Hand(0)):
+        elapsed = timeit.timeit(lambda: zone.contains(card), number=number)
+        print(f"{zone}.contains: {1e9 * elapsed / number:.0f}ns")
+
+
+if __name__ == "__main__":
+    main()
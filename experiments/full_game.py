@@ -4,6 +4,7 @@ from mtg_ai import search
 from mtg_ai.game import GameState
 from mtg_ai.decklist import WindsweptHeath, TempleGarden, Forest, Island, Plains, BreedingPool, Saruli, WallOfRoots, SylvanCaryatid, Battlement, Axebane, TrophyMage, Staff, Duskwatch, Arcades, CollectedCompany, build_deck
 import logging
+import random
 
 # logging.basicConfig(level=logging.DEBUG,filename="fullgame.log",filemode='w')
 logger = logging.getLogger(__name__)
@@ -30,6 +31,18 @@ CARDS = [
 
 DECK = [ cardtype for cardtype, i in CARDS for _ in range(i) ]
 
+def opening_hand(seed: int) -> GameState:
+    """
+    A copy-on-write game state with a seven-card hand from DECK, shuffled
+    the same way for the same :seed: (without touching the :random: module's
+    own generator)
+    """
+    deck = list(DECK)
+    random.Random(seed).shuffle(deck)
+    gs = GameState([0], copy_on_write=True)
+    build_deck(gs, 0, deck, hand_size=7)
+    return gs
+
 def play_game(limit) -> search.SearchResult:
     player = 0
     gs = GameState([player])
@@ -49,14 +62,16 @@ def play_mcts_game(limit: int) -> SearchResult:
         'n_iters': 250
     }
 
+    # one searcher for the whole game, so each search starts from the last one's subtree
+    searcher = search.MCTSSearcher(current.game_state, statistics,search.staff_victory,reuse=True,**params)
     while not search.staff_victory(current.game_state) and current.game_state.turn_number < params['max_turns']:
         print(f"hand: {[card.attrs.name for card in current.game_state.in_zone(mtg_ai.zones.Hand())]}")
         print(f"field: {[card.attrs.name for card in current.game_state.in_zone(mtg_ai.zones.Field())]}")
         print(f"mana: {current.game_state.mana_pool}")
         print(f"land drops: {current.game_state.land_drops}")
-        searcher = search.MCTSSearcher(current.game_state, statistics,search.staff_victory,**params)
+        choices = [str(node.action) for node in searcher.expand(searcher.root)]
         current = searcher.choose()
-        print(f"choices: {[str(node.action) for node in searcher.root.children]}")
+        print(f"choices: {choices}")
         print(f"(t{current.game_state.turn_number}: {current.action}, {current.choice})")
 
     
@@ -1,9 +1,8 @@
-from typing import List, TYPE_CHECKING, Callable
-from mtg_ai.game import GameState, Action, ChoiceSet, Event, StackAbility, CardType, StaticEffect, \
+from typing import List, TYPE_CHECKING, Callable, Tuple
+from mtg_ai.game import GameState, Action, Choice, ChoiceSet, Event, StackAbility, CardType, StaticEffect, \
     GameObject
-from mtg_ai import zones
+from mtg_ai import zones, payment, choices as lazy
 from mtg_ai.mana import Mana
-from itertools import product
 import mtg_ai.getters as getters
 from mtg_ai.getters import Get
 
@@ -11,30 +10,138 @@ if TYPE_CHECKING:
     from cards import Card
 
 
-def possible_actions(game_state: GameState) -> List[Action]:
+#: when the moves listed from each zone have to be listed again (see :legal_moves():)
+GROUP_INPUTS = {
+    'hand': {zones.Hand},
+    'field': {zones.Field, 'sick'},
+}
+
+#: what else the choices of each kind of move depend on; None for anything at all
+MOVE_INPUTS = {
+    'land': {'land_drops'},
+    'spell': {'mana', zones.Stack, zones.Deck, zones.Field},
+    'mana ability': set(),
+    'ability': None,
+}
+
+
+def possible_actions(game_state: GameState, payments: bool = False) -> List[Action]:
     """
     List the actions available to the player with priority
     in the current game state
+
+    If :payments: is set, mana abilities (see :payment.is_mana_ability():)
+    aren't listed by themselves; instead, each action that costs mana is
+    listed once for every distinct way to pay for it (see :payment.payments():),
+    as a :PayWith: that activates those abilities and then takes the action.
+    """
+    return [action for action, _ in actions_with_choices(game_state, payments)]
+
+
+def legal_moves(game_state: GameState, payments: bool = False) -> List[Tuple[Action, Choice]]:
+    """
+    Every (action, choice) pair available to the player with priority: each
+    of :possible_actions(): with each of its choices, found in one pass.
+
+    The moves are cached on the game state (:GameState.move_cache:) and
+    handed down to its copies, which only enumerate again the moves whose
+    inputs (:GROUP_INPUTS: and :MOVE_INPUTS:) changed since. Moves made
+    with :payments: aren't cached.
+    """
+    return [(action, choice) for action, choices in actions_with_choices(game_state, payments)
+            for choice in choices]
+
+
+def actions_with_choices(game_state: GameState, payments: bool = False) -> List[Tuple[Action, ChoiceSet]]:
+    """
+    :possible_actions():, each with its choice set. The choice sets may be
+    lazy (see :mtg_ai.choices:), so picking one move at random with
+    :choices.sample(): doesn't list the others.
     """
-    player = game_state.players[game_state.active_player]
     if len(game_state.triggers) > 0:
-        return [
-            StackTriggers()
-        ]
-        
-    hand = game_state.in_zone(zones.Hand(player))
-    actions = [PlayLand(card) if CardType.Land in card.attrs.types else CastSpell(card) for card in hand ]
-    field = game_state.in_zone(zones.Field(player))
-    field_abilities = [ability for card in field for ability in card.attrs.activated]
-    actions += field_abilities
+        return [(StackTriggers(), [{}])]
+
+    player = game_state.players[game_state.active_player]
+    if payments:
+        entries = [(action, action.get_choices(game_state)) for action in _payment_actions(game_state, player)]
+    else:
+        entries = _cached_moves(game_state, player)
     if len(game_state.in_zone(zones.Stack())) > 0:
-        actions.append(ResolveStack())
-    return list(
-        filter(
-            lambda action: len(action.get_choices(game_state)) > 0, 
-             actions
-        )
-    )
+        resolve = ResolveStack()
+        entries.append((resolve, resolve.get_choices(game_state)))
+    return [(action, choices) for action, choices in entries if choices]
+
+
+def _payment_actions(game_state: GameState, player) -> List[Action]:
+    hand = game_state.in_zone(zones.Hand(player))
+    is_land = [CardType.Land in card.attrs.types for card in hand]
+    field_abilities = [ability for card in game_state.in_zone(zones.Field(player))
+                       for ability in card.attrs.activated]
+    actions = [PlayLand(card) for card, land in zip(hand, is_land) if land]
+    costly = [CastSpell(card) for card, land in zip(hand, is_land) if not land]
+    costly += [ability for ability in field_abilities if not payment.is_mana_ability(ability)]
+    for action in costly:
+        cost = payment.mana_cost(action, game_state)
+        if cost is None:
+            actions.append(action)
+            continue
+        actions += [PayWith(action, paid) if paid else action
+                    for paid in payment.payments(game_state, cost, player)]
+    return actions
+
+
+def _cached_moves(game_state: GameState, player) -> List[Tuple[Action, ChoiceSet]]:
+    """
+    The actions from the hand and the field, each with its choices, reusing
+    what's still up to date in :game_state.move_cache:
+    """
+    cache, changed = game_state.move_cache, game_state.changed_inputs
+    if not cache or changed:
+        groups = {}
+        for group, inputs in GROUP_INPUTS.items():
+            entries = cache.get(group)
+            if entries is None or changed & inputs:
+                entries = _list_moves(game_state, player, group)
+            groups[group] = _refresh(game_state, entries, changed)
+        cache = game_state.move_cache = groups
+        game_state.changed_inputs = set()
+    return [(action, choices) for entries in cache.values() for _, action, choices in entries]
+
+
+def _list_moves(game_state: GameState, player, group: str) -> list:
+    """
+    The actions listed from :group: ('hand' or 'field'), with their kind
+    (see :MOVE_INPUTS:) and no choices yet
+    """
+    if group == 'hand':
+        return [('land', PlayLand(card), None) if CardType.Land in card.attrs.types
+                else ('spell', CastSpell(card), None)
+                for card in game_state.in_zone(zones.Hand(player))]
+    return [('mana ability' if payment.is_mana_ability(ability) else 'ability', ability, None)
+            for card in game_state.in_zone(zones.Field(player)) for ability in card.attrs.activated]
+
+
+def _refresh(game_state: GameState, entries: list, changed: set) -> list:
+    """
+    :entries: with the choices of the ones that are out of date enumerated again
+    """
+    def stale(kind, choices):
+        inputs = MOVE_INPUTS[kind]
+        return choices is None or (bool(changed) if inputs is None else bool(changed & inputs))
+
+    spells = [action for kind, action, choices in entries if kind == 'spell' and stale(kind, choices)]
+    # CastSpell has no choices when the spell can't be paid for, so check every cost at once
+    affordable = iter(game_state.mana_pool.can_pay_many(
+        [game_state.get(spell.card).attrs.cost for spell in spells]))
+    refreshed = []
+    for kind, action, choices in entries:
+        if stale(kind, choices):
+            if kind == 'spell' and not next(affordable):
+                choices = []
+            else:
+                choices = action.get_choices(game_state)
+        refreshed.append((kind, action, choices))
+    return refreshed
 
 
 class Draw(Action):
@@ -204,7 +311,7 @@ class ActivatedAbility(Action):
     def choices(self, game_state: GameState):
         costs = self.cost.get_choices(game_state)
         effects = self.effect.get_choices(game_state)
-        return [{'costs_choice': c, 'effects_choice': e} for (c,e) in product(costs, effects)]
+        return lazy.Product([costs, effects], lambda ce: {'costs_choice': ce[0], 'effects_choice': ce[1]})
 
     def do(self, game_state: GameState, costs_choice, effects_choice):
         game_state = game_state.take_action(self.cost, costs_choice)
@@ -260,7 +367,7 @@ class CastSpell(Action):
             # todo: compute all the ways to pay given the mana available?
             mana_choices = {'mana': card.attrs.cost}
             effect_choices = card.effect.get_choices(game_state)
-            return [mana_choices | {"effect_choices":ch} for ch in effect_choices]
+            return lazy.Mapped(effect_choices, lambda ch: mana_choices | {"effect_choices":ch})
         else:
             return []
 
@@ -272,6 +379,39 @@ class CastSpell(Action):
         card.effect.set_targets(game_state, **effect_choices)
         return Event(self,game_state,source=card,cause=card)
 
+class PayWith(Action):
+    """
+    Activate some mana abilities, then take an action that costs mana.
+    """
+
+    def __init__(self, action: Action, payment: 'payment.Payment'):
+        super().__init__()
+        self.action = action
+        self.payment = payment
+
+    def pay(self, game_state: GameState) -> GameState | None:
+        """
+        Activate the abilities in :self.payment: on :game_state: in place, or
+        return None if one of them can't be activated
+        """
+        for ability, choice in self.payment:
+            if choice not in ability.get_choices(game_state):
+                return None
+            game_state = game_state.take_action(ability, choice, copy=False)
+        return game_state
+
+    def choices(self, game_state: GameState):
+        paid = self.pay(game_state.copy())
+        return [] if paid is None else self.action.get_choices(paid)
+
+    def do(self, game_state: GameState, **choices):
+        game_state = self.pay(game_state)
+        game_state = game_state.take_action(self.action, choices)
+        return Event(self, game_state)
+
+    def __str__(self) -> str:
+        return f"{self.action} paying with ({', '.join(str(ability) for ability, _ in self.payment)})"
+
 class PlayLand(Action):
     def __init__(self, card):
         super().__init__()
@@ -313,9 +453,13 @@ class Search(Action):
     def choices(self, game_state):
         available = self.search_in(game_state)
         choices = self.search_for(available)
-        available = set(available)
-        options = [{'found': c, 'rest': available.difference(c)} for c in choices]
-        return options 
+
+        def rest(found):
+            # in the order they were searched, rather than a set's: where they
+            # go mustn't depend on the process's string hashing
+            chosen = {id(card) for card in found}
+            return tuple(card for card in available if id(card) not in chosen)
+        return lazy.Mapped(choices, lambda c: {'found': c, 'rest': rest(c)})
     
     def do(self, game_state: GameState, found, rest):
         for card in found:
@@ -363,7 +507,7 @@ class AddCounter(Action):
     
     def do(self,game_state):
         card = game_state.get(self.card)
-        card.counters[self.counter] += 1
+        card.add_counter(self.counter)
 
 class ResolveStack(Action):
     def __init__(self):
@@ -426,11 +570,22 @@ class Target(Action, GameObject):
         self.set(target)
         return Event(self, game_state)
 
+    def snapshot(self) -> tuple:
+        return (self.zone, self.params['target'].uid if self.is_set else None)
+
+    def restore(self, zone, target):
+        super().restore(zone)
+        if target is not None:
+            self.set(self.game_state.objects[target])
+
     def set(self, target: GameObject):
+        self.game_state.record(setattr, self, 'params', self.params.copy())
         self.bind(target=target)
 
     def unset(self):
-        self.params.pop("target", None)
+        if self.is_set:
+            self.game_state.record(setattr, self, 'params', self.params.copy())
+            self.params.pop("target")
 
     @property
     def is_set(self) -> bool:
@@ -442,3 +597,14 @@ class Target(Action, GameObject):
                         search_zone=self.search_zone)
         target.params = self.params.copy()
         return target
+
+    def share(self, game_state: GameState):
+        target = object.__new__(Target)
+        target.game_state = game_state
+        target.uid = self.uid
+        target._zone = self._zone
+        target.targets = self.targets
+        target.criteria = self.criteria
+        target.search_zone = self.search_zone
+        target.params = self.params.copy()
+        return target
@@ -0,0 +1,279 @@
+"""
+A struct-of-arrays GameState backend.
+
+ArrayGameState keeps the mutable state of every card (zone, tapped,
+summoning sickness, counters) in NumPy arrays indexed by uid; each card's
+immutable CardAttributes stay on the Card, as in any GameState.
+Copying a state copies those arrays and the list of object references;
+Card objects are thin views onto a row of the arrays (ArrayCardState), so
+decklist cards and actions work unchanged.
+
+Requires the optional `arrays` dependencies (numpy).
+"""
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from mtg_ai import zones
+from mtg_ai.game import GameState
+from mtg_ai.cards import Card, CardState
+
+#: zone type of each zone_kind code; 0 means the card isn't in a zone
+ZONE_KINDS: List[Optional[type]] = [None, zones.Grave, zones.Hand, zones.Deck, zones.Field, zones.Stack]
+ZONE_CODES: Dict[type, int] = {kind: code for code, kind in enumerate(ZONE_KINDS) if kind is not None}
+NO_OWNER = -1
+NO_POSITION = -1
+
+#: counter name -> row of CardColumns.counters, shared by every ArrayGameState
+COUNTER_KINDS: Dict[str, int] = {}
+
+# rows of CardColumns.table
+ZONE_KIND, ZONE_OWNER, POSITION, TAPPED, SICK = range(5)
+N_FIELDS = 5 #: rows before the first counter
+
+
+class CardColumns:
+    """
+    The per-card arrays of an ArrayGameState.
+
+    Every column is a row of one int16 array, :table:, so that copying all of
+    them is a single memcpy: zone kind, zone owner, position, tapped, summoning
+    sickness, then one row per kind of counter (see :COUNTER_KINDS:). Column i
+    holds the state of the object with uid i; columns of objects that aren't
+    cards are left empty.
+    """
+    __slots__ = ('table',)
+
+    def __init__(self, size: int = 0):
+        self.table = np.zeros((N_FIELDS + len(COUNTER_KINDS), size), dtype=np.int16)
+        self.table[ZONE_OWNER] = NO_OWNER
+        self.table[POSITION] = NO_POSITION
+
+    def __len__(self) -> int:
+        return self.table.shape[1]
+
+    @property
+    def tapped(self) -> np.ndarray:
+        return self.table[TAPPED]
+
+    @property
+    def sick(self) -> np.ndarray:
+        return self.table[SICK]
+
+    @property
+    def counters(self) -> np.ndarray:
+        return self.table[N_FIELDS:]
+
+    def copy(self) -> 'CardColumns':
+        new = object.__new__(CardColumns)
+        new.table = self.table.copy()
+        return new
+
+    def grow(self, size: int):
+        """
+        Make room for at least :size: cards
+        """
+        old_size = len(self)
+        if size <= old_size:
+            return
+        grown = CardColumns(max(size, 2 * old_size))
+        grown.table = np.vstack([grown.table, np.zeros((len(self.table) - len(grown.table), len(grown)), dtype=np.int16)])
+        grown.table[:, :old_size] = self.table
+        self.table = grown.table
+
+    def counter_row(self, counter: str) -> int:
+        """
+        The row of :table: for :counter:, adding one if this is a new kind of counter
+        """
+        row = N_FIELDS + COUNTER_KINDS.setdefault(counter, len(COUNTER_KINDS))
+        if row >= len(self.table):
+            extra = np.zeros((row + 1 - len(self.table), len(self)), dtype=np.int16)
+            self.table = np.vstack([self.table, extra])
+        return row
+
+    def zone(self, uid: int) -> zones.Zone | None:
+        kind, owner, position = self.table[:POSITION + 1, uid].tolist()
+        if not kind:
+            return None
+        return ZONE_KINDS[kind](
+            None if owner == NO_OWNER else owner,
+            None if position == NO_POSITION else position)
+
+    def set_zone(self, uid: int, zone: zones.Zone | None):
+        if zone is None:
+            self.table[:POSITION + 1, uid] = (0, NO_OWNER, NO_POSITION)
+        else:
+            self.table[:POSITION + 1, uid] = (
+                ZONE_CODES[type(zone)],
+                NO_OWNER if zone.owner is None else zone.owner,
+                NO_POSITION if zone.position is None else zone.position)
+
+
+#: the columns of a state with no cards. It has no rows, so nothing can write to it
+NO_CARDS = CardColumns()
+
+
+class ArrayCounters(MutableMapping):
+    """
+    A card's row of CardColumns.counters, as a dict. Like CardState.counters,
+    counters the card doesn't have read as 0.
+    """
+    __slots__ = ('_columns', '_uid')
+
+    def __init__(self, columns: CardColumns, uid: int):
+        self._columns = columns
+        self._uid = uid
+
+    def __getitem__(self, counter: str) -> int:
+        column = COUNTER_KINDS.get(counter)
+        table = self._columns.table
+        if column is None or N_FIELDS + column >= len(table):
+            return 0
+        return int(table[N_FIELDS + column, self._uid])
+
+    def __setitem__(self, counter: str, value: int):
+        row = self._columns.counter_row(counter)
+        self._columns.table[row, self._uid] = value
+
+    def __delitem__(self, counter: str):
+        self[counter] = 0
+
+    def __iter__(self) -> Iterator[str]:
+        counts = self._columns.counters[:, self._uid]
+        return iter([name for name, column in COUNTER_KINDS.items() if column < len(counts) and counts[column]])
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._columns.counters[:, self._uid]))
+
+
+class ArrayCardState:
+    """
+    Stands in for a Card's CardState, reading and writing the card's row of
+    its game state's CardColumns.
+
+    Each view belongs to a single Card, so Card._cow_state never forks it.
+    """
+    __slots__ = ('_columns', '_uid', '_owner')
+
+    def __init__(self, columns: CardColumns, uid: int, owner: Card):
+        self._columns = columns
+        self._uid = uid
+        self._owner = owner
+
+    @property
+    def zone(self) -> zones.Zone | None:
+        return self._columns.zone(self._uid)
+
+    @zone.setter
+    def zone(self, zone: zones.Zone | None):
+        self._columns.set_zone(self._uid, zone)
+
+    @property
+    def tapped(self) -> bool:
+        return bool(self._columns.table[TAPPED, self._uid])
+
+    @tapped.setter
+    def tapped(self, value: bool):
+        self._columns.table[TAPPED, self._uid] = value
+
+    @property
+    def counters(self) -> ArrayCounters:
+        return ArrayCounters(self._columns, self._uid)
+
+    @counters.setter
+    def counters(self, value):
+        self._columns.counters[:, self._uid] = 0
+        counters = self.counters
+        for counter, amount in value.items():
+            counters[counter] = amount
+
+    def copy(self) -> CardState:
+        """
+        A detached CardState with the same values as this row
+        """
+        state = CardState(zone=self.zone, tapped=self.tapped)
+        state.counters.update(self.counters)
+        return state
+
+    def share(self, card: Card) -> 'ArrayCardState':
+        return ArrayCardState(card.game_state.columns, card.uid, card)
+
+
+class SummoningSickView:
+    """
+    The `sick` column of a game state's CardColumns, as a set of cards.
+    """
+    __slots__ = ('_game_state',)
+
+    def __init__(self, game_state: 'ArrayGameState'):
+        self._game_state = game_state
+
+    def add(self, card: Card):
+        if card not in self:
+            self._game_state.columns.table[SICK, card.uid] = True
+            self._game_state.record(self.discard, card)
+            self._game_state.input_changed('sick')
+
+    def discard(self, card: Card):
+        if card in self:
+            self._game_state.columns.table[SICK, card.uid] = False
+            self._game_state.record(self.add, card)
+            self._game_state.input_changed('sick')
+
+    def clear(self):
+        sick = self._game_state.columns.sick
+        if sick.any():
+            self._game_state.record(sick.__setitem__, slice(None), sick.copy())
+            self._game_state.input_changed('sick')
+            sick[:] = False
+
+    def __contains__(self, card) -> bool:
+        sick = self._game_state.columns.sick
+        uid = getattr(card, 'uid', None)
+        return uid is not None and uid < len(sick) and bool(sick[uid])
+
+    def __iter__(self) -> Iterator[Card]:
+        game_state = self._game_state
+        return iter([game_state.objects[int(uid)] for uid in np.flatnonzero(game_state.columns.sick)])
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._game_state.columns.sick))
+
+
+class ArrayGameState(GameState):
+    """
+    A GameState whose per-card state is stored in NumPy arrays (see :CardColumns:).
+
+    Always copy-on-write: a copy copies the arrays, and Card views are
+    created in the new state the first time each card is looked up.
+    """
+    __slots__ = ('columns',)
+
+    def __init__(self, players, **kwargs):
+        self.columns = NO_CARDS # replaced by the first card or by _copy_objects
+        kwargs['copy_on_write'] = True
+        super().__init__(players, **kwargs)
+
+    @property
+    def summoning_sick(self) -> SummoningSickView:
+        return SummoningSickView(self)
+
+    @summoning_sick.setter
+    def summoning_sick(self, cards):
+        self.columns.sick[:] = False
+        for card in cards:
+            self.columns.table[SICK, card.uid] = True
+
+    def _copy_objects(self, new_game_state: 'ArrayGameState'):
+        new_game_state.columns = self.columns.copy()
+        new_game_state.objects = self.objects.copy(new_game_state)
+
+    def register_card(self, card: Card):
+        state = card._state
+        if self.columns is NO_CARDS:
+            self.columns = CardColumns()
+        self.columns.grow(card.uid + 1)
+        card._state = ArrayCardState(self.columns, card.uid, card)
+        card._state.zone = state.zone
+        card._state.tapped = state.tapped
+        card._state.counters = state.counters
+        super().register_card(card)
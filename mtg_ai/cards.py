@@ -1,4 +1,5 @@
 from collections import defaultdict
+from operator import attrgetter
 from mtg_ai import game, actions, mana, zones, getters
 from typing import Iterable, Optional, List, Callable
 from mtg_ai.mana import Mana
@@ -28,6 +29,14 @@ class CardState:
             counters=defaultdict(lambda: 0, self.counters),
         )
         return new
+
+    def share(self, card: 'Card') -> 'CardState':
+        """
+        Share this state with another card. Neither card owns it afterwards,
+        so whichever one is changed first forks it.
+        """
+        self._owner = None
+        return self
  
 class CardAttributes:
     """
@@ -58,14 +67,26 @@ class CardAttributes:
         self._activated = activated or []
         self._keywords = keywords or []
 
+    # read-only views of the fields, for when no static effect applies (see Card.attrs)
+    name = property(attrgetter('_name'))
+    cost = property(attrgetter('_cost'))
+    types = property(attrgetter('_types'))
+    subtypes = property(attrgetter('_subtypes'))
+    power = property(attrgetter('_power'))
+    toughness = property(attrgetter('_toughness'))
+    static = property(attrgetter('_static'))
+    activated = property(attrgetter('_activated'))
+    keywords = property(attrgetter('_keywords'))
+
 
 class _CardAttrsProxy:
     """
     Lightweight view of a CardAttributes in the context of a specific Card.
 
-    Created on each access to Card.attrs.  Provides pass-through access to
-    all immutable attributes plus game-state-aware computation of power and
-    toughness (applying active static effects from the card's game state).
+    Created by Card.attrs, at most once per Card, when its game state has
+    active static effects. Provides pass-through access to the attributes no
+    static effect changes, and game-state-aware values of the others (see
+    GameState.attribute).
     """
     __slots__ = ('_def', '_card')
 
@@ -80,10 +101,10 @@ class _CardAttrsProxy:
         
         if base is None:
             return None
-        for effect in card.game_state.active_statics:
-            if effect.matches(name,card):
-                base = effect.modification(card.game_state, base)
-        return base
+        game_state = card.game_state
+        if name not in game_state.static_effects:
+            return base
+        return game_state.attribute(card, name, base)
 
 
 class Card(game.GameObject):
@@ -102,8 +123,6 @@ class Card(game.GameObject):
         counters: dict of counters on this card
     """
 
-    cards = {}
-
     def __init__(self,
                  name: str,
                  game_state: 'game.GameState',
@@ -136,6 +155,8 @@ class Card(game.GameObject):
         )
         self._state = CardState(zone=zone, tapped=tapped)
         self._state._owner = self
+        self._attrs = None
+        game_state.register_card(self)
 
         if self._def._types & game.SPELL_TYPES:
             dest = actions.MoveTo(zone=zones.Grave(self.owner)).bind(card=self)
@@ -150,8 +171,12 @@ class Card(game.GameObject):
     # ── attrs proxy ────────────────────────────────────────────────────────────
 
     @property
-    def attrs(self) -> _CardAttrsProxy:
-        return _CardAttrsProxy(self._def, self)
+    def attrs(self) -> CardAttributes | _CardAttrsProxy:
+        if self.game_state is None or not self.game_state.static_effects:
+            return self._def
+        if self._attrs is None:
+            self._attrs = _CardAttrsProxy(self._def, self)
+        return self._attrs
 
     # ── mutable state properties (all trigger CoW) ─────────────────────────────
 
@@ -162,8 +187,11 @@ class Card(game.GameObject):
     @zone.setter
     def zone(self, zone: 'zones.Zone'):
         self._cow_state()
+        old_zone = self._state.zone
         self._state.zone = zone
         if self.game_state is not None:
+            self.game_state.record(setattr, self, 'zone', old_zone)
+            self.game_state.update_zone_index(self, old_zone, zone)
             for sa in self._def._static:
                 sa.on_move(self.game_state)
 
@@ -174,6 +202,9 @@ class Card(game.GameObject):
     @tapped.setter
     def tapped(self, value: bool):
         self._cow_state()
+        if self.game_state is not None:
+            self.game_state.record(setattr, self, 'tapped', self._state.tapped)
+            self.game_state.invalidate_hash(self)
         self._state.tapped = value
 
     @property
@@ -183,8 +214,20 @@ class Card(game.GameObject):
     @counters.setter
     def counters(self, value):
         self._cow_state()
+        if self.game_state is not None:
+            if self.game_state.journal is not None:
+                self.game_state.record(setattr, self, 'counters', defaultdict(lambda: 0, self._state.counters))
+            self.game_state.invalidate_hash(self)
         self._state.counters = value
 
+    def add_counter(self, counter: str, amount: int = 1):
+        self._cow_state()
+        if self.game_state is not None:
+            if self.game_state.journal is not None:
+                self.game_state.record(setattr, self, 'counters', defaultdict(lambda: 0, self._state.counters))
+            self.game_state.invalidate_hash(self)
+        self._state.counters[counter] += amount
+
     # ── Copy-on-Write ──────────────────────────────────────────────────────────
 
     def _cow_state(self):
@@ -245,6 +288,19 @@ class Card(game.GameObject):
             return 0
         return self._def._cost.mana_value
 
+    # ── Pickling ───────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> tuple:
+        return (self.zone, self.tapped, {k: v for k, v in self.counters.items() if v != 0})
+
+    def restore(self, zone, tapped, counters):
+        if zone is not None:
+            self.zone = zone
+        if tapped:
+            self.tapped = tapped
+        for counter, amount in counters.items():
+            self.add_counter(counter, amount)
+
     # ── Copy ───────────────────────────────────────────────────────────────────
 
     def copy(self, game_state: 'game.GameState') -> 'Card':
@@ -254,15 +310,28 @@ class Card(game.GameObject):
         _def (CardAttributes) is shared — the flyweight is never re-allocated.
         _state (CardState) is copied; the new card immediately owns its state.
         """
-        card = object.__new__(type(self))
+        card = self.share(game_state)
         # replicate what GameObject.__init__ would do (append pattern)
-        card.game_state = game_state
         card.uid = len(game_state.objects)
         game_state.objects.append(card)
-        card.owner = self.owner
-        card._def = self._def              # shared flyweight — never copied
         card._state = self._state.copy()  # only the small mutable state is copied
         card._state._owner = card
+        return card
+
+    def share(self, game_state: 'game.GameState') -> 'Card':
+        """
+        Return a copy of this card for game_state that shares this card's _state.
+
+        Neither card owns the shared CardState afterwards, so whichever one is
+        changed first forks it (see _cow_state).
+        """
+        card = object.__new__(type(self))
+        card.game_state = game_state
+        card.uid = self.uid
+        card.owner = self.owner
+        card._def = self._def              # shared flyweight — never copied
+        card._state = self._state.share(card)
+        card._attrs = None
         card.effect = self.effect
         return card
 
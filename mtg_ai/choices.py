@@ -0,0 +1,137 @@
+"""
+Choice sets that don't list their choices until they're asked to.
+
+The choices of an action made of other actions (:game.And:,
+:actions.ActivatedAbility:, targets) are every combination of the choices
+of its parts, and a search (:getters.UpTo:) can find any few of the cards
+it looks through, so these choice sets can be far larger than anything
+that will look at them: a random playout only ever takes one choice. The
+classes here are built from their parts instead. They are sequences that
+know their length without listing their choices, and can :sample(): a
+uniformly random choice without listing the rest.
+
+A choice set can also be a plain list; :sample(): handles both.
+"""
+import random
+from collections.abc import Sequence
+from itertools import combinations, product
+from math import comb, prod
+from typing import Any, Callable
+
+
+def sample(choices: Sequence, rng=random) -> Any:
+    """
+    A uniformly random element of :choices:, a list or a :LazyChoices:
+    """
+    if isinstance(choices, LazyChoices):
+        return choices.sample(rng)
+    return rng.choice(choices)
+
+
+class LazyChoices(Sequence):
+    """
+    Base class for choice sets that make their choices as they're iterated.
+
+    Subclasses implement `__len__`, `__iter__` and :sample():. Indexing
+    lists every choice the first time (except for the first one, which is
+    what most callers ask for).
+    """
+    _listed = None
+
+    def __getitem__(self, index):
+        if self._listed is None:
+            if index == 0:
+                for choice in self:
+                    return choice
+                raise IndexError(index)
+            self._listed = list(self)
+        return self._listed[index]
+
+    def sample(self, rng=random) -> Any:
+        """
+        A uniformly random choice
+        """
+        return self[rng.randrange(len(self))]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, LazyChoices)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} choices)"
+
+
+class Product(LazyChoices):
+    """
+    A choice for every combination of a choice from each of :parts:, made by
+    calling :build: with the tuple of choices
+    """
+
+    def __init__(self, parts: Sequence[Sequence], build: Callable[[tuple], Any] = tuple):
+        self.parts = [part if isinstance(part, Sequence) else list(part) for part in parts]
+        self.build = build
+
+    def __len__(self):
+        return prod(len(part) for part in self.parts)
+
+    def __iter__(self):
+        return map(self.build, product(*self.parts))
+
+    def sample(self, rng=random):
+        return self.build(tuple(sample(part, rng) for part in self.parts))
+
+
+class Mapped(LazyChoices):
+    """
+    :function: applied to each choice in :base:
+    """
+
+    def __init__(self, base: Sequence, function: Callable[[Any], Any]):
+        self.base = base if isinstance(base, Sequence) else list(base)
+        self.function = function
+
+    def __len__(self):
+        return len(self.base)
+
+    def __iter__(self):
+        return map(self.function, self.base)
+
+    def sample(self, rng=random):
+        return self.function(sample(self.base, rng))
+
+
+class Subsets(LazyChoices):
+    """
+    Every way to choose between 1 and :n: of :items:, from the most items to
+    the fewest, and then an empty choice ({}), as :getters.UpTo: lists them
+    """
+
+    def __init__(self, items: Sequence, n: int):
+        self.items = list(items)
+        self.n = n
+
+    def sizes(self) -> range:
+        return range(min(self.n, len(self.items)), 0, -1)
+
+    def __len__(self):
+        return sum(comb(len(self.items), size) for size in self.sizes()) + 1
+
+    def __iter__(self):
+        for size in self.sizes():
+            yield from combinations(self.items, size)
+        yield {}
+
+    def sample(self, rng=random):
+        # pick a size with probability proportional to how many subsets have
+        # it, then a subset of that size
+        index = rng.randrange(len(self))
+        for size in self.sizes():
+            count = comb(len(self.items), size)
+            if index < count:
+                chosen = sorted(rng.sample(range(len(self.items)), size))
+                return tuple(self.items[i] for i in chosen)
+            index -= count
+        return {}
@@ -0,0 +1,235 @@
+"""
+Compact node storage for breadth-first search.
+
+A breadth-first search that queues whole game states runs out of memory
+long before it runs out of states. Here a node is two integers instead:
+the index of its parent, and the index of the move that led to it in its
+parent's list of moves. Its state is rebuilt when it's needed by replaying
+those moves from the root (see :Replayer:); taking an action is
+deterministic, so replaying always rebuilds the same state.
+
+Nodes are numbered in the order they're found, which in a breadth-first
+search is the order they're expanded in, so the frontier is every node
+after a cursor and needs no storage of its own. A :NodeTable: keeps the
+nodes in memory until there are too many, then moves them to a
+memory-mapped temporary file.
+"""
+import collections
+import mmap
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, List, Tuple
+
+ROOT = -1   #: the parent and move index of the root
+
+
+class NodeTable:
+    """
+    (parent, move) pairs of 64-bit integers, kept in memory until there are
+    more than :max_in_memory: of them and in a memory-mapped temporary file
+    after that
+    """
+
+    def __init__(self, max_in_memory: int = 1 << 22):
+        self.max_in_memory = max_in_memory
+        self.records = array('q')   # parent, move, parent, move, ...
+        self.file = None
+        self.map = None
+        self.length = 0
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Whether the nodes have been moved to a file
+        """
+        return self.file is not None
+
+    def append(self, parent: int, move: int) -> int:
+        """
+        Add a node, and return its index
+        """
+        if self.spilled:
+            if 2 * self.length + 2 > len(self.records):
+                self._remap(2 * len(self.records))
+            self.records[2 * self.length] = parent
+            self.records[2 * self.length + 1] = move
+        else:
+            self.records.append(parent)
+            self.records.append(move)
+            if self.length + 1 > self.max_in_memory:
+                self._spill()
+        self.length += 1
+        return self.length - 1
+
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self.records[2 * index], self.records[2 * index + 1]
+
+    def __len__(self):
+        return self.length
+
+    def _spill(self):
+        data = self.records.tobytes()
+        self.file = tempfile.TemporaryFile()
+        self.file.write(data)
+        self.file.flush()
+        self._remap(2 * len(self.records))
+
+    def _remap(self, slots: int):
+        if self.map is not None:
+            self.records.release()
+            self.map.close()
+        self.file.truncate(slots * 8)
+        self.map = mmap.mmap(self.file.fileno(), slots * 8)
+        self.records = memoryview(self.map).cast('q')
+
+    def close(self):
+        """
+        Delete the file the nodes were moved to, if they were
+        """
+        if self.map is not None:
+            self.records.release()
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+        self.records = array('q')
+        self.length = 0
+
+    def __del__(self):
+        self.close()
+
+
+class Replayer:
+    """
+    Rebuilds the states of the nodes in :table: from :root:, keeping the
+    expansions of the :capacity: most recently used nodes.
+
+    :expand: takes a node's state to the state its moves are taken in and
+    the list of those moves, (action, choice) pairs. The children of a node
+    are found one after another, so they're expanded one after another too,
+    and only their parent has to be rebuilt.
+    """
+
+    def __init__(self, root: Any, table: NodeTable, expand: Callable[[Any], Tuple[Any, List]], capacity: int = 256):
+        self.root = root
+        self.table = table
+        self.expand = expand
+        self.capacity = capacity
+        self.expanded_nodes: collections.OrderedDict[int, Tuple[Any, List]] = collections.OrderedDict()
+
+    def state(self, index: int) -> Any:
+        """
+        The state of node :index:
+        """
+        if index == 0:
+            return self.root
+        parent, move = self.table[index]
+        state, moves = self.expansion(parent)
+        return state.take_action(*moves[move])
+
+    def expansion(self, index: int) -> Tuple[Any, List]:
+        """
+        :expand: applied to the state of node :index:
+        """
+        # walk up to the nearest node with a known expansion (or the root),
+        # then expand each node on the way back down
+        path = []
+        node = index
+        while node not in self.expanded_nodes and node != 0:
+            path.append(node)
+            node = self.table[node][0]
+        if node in self.expanded_nodes:
+            self.expanded_nodes.move_to_end(node)
+            known = self.expanded_nodes[node]
+        else:
+            known = self._remember(0, self.expand(self.root))
+        for node in reversed(path):
+            state, moves = known
+            known = self._remember(node, self.expand(state.take_action(*moves[self.table[node][1]])))
+        return known
+
+    def path(self, index: int) -> List[Tuple[Any, Any]]:
+        """
+        The move that led to each node from the root to node :index: (None
+        for the root), and the node's state
+        """
+        nodes = []
+        while index != ROOT:
+            nodes.append(index)
+            index = self.table[index][0]
+        path = [(None, self.root)]
+        for node in reversed(nodes[:-1]):
+            parent, move = self.table[node]
+            state, moves = self.expansion(parent)
+            path.append((moves[move], state.take_action(*moves[move])))
+        return path
+
+    def _remember(self, index: int, expansion: Tuple[Any, List]) -> Tuple[Any, List]:
+        self.expanded_nodes[index] = expansion
+        if len(self.expanded_nodes) > self.capacity:
+            self.expanded_nodes.popitem(last=False)
+        return expansion
+
+
+class PathReplayer:
+    """
+    Rebuilds states from :root: given the path that leads to them, a tuple of
+    move indices as in :Replayer:, keeping the expansions of the :capacity:
+    most recently used paths. For processes that don't have the
+    :NodeTable: the paths come from.
+    """
+
+    def __init__(self, root: Any, expand: Callable[[Any], Tuple[Any, List]], capacity: int = 4096):
+        self.root = root
+        self.expand = expand
+        self.capacity = capacity
+        self.expanded_paths: collections.OrderedDict[tuple, Tuple[Any, List]] = collections.OrderedDict()
+
+    def expansion(self, path: tuple) -> Tuple[Any, List]:
+        """
+        :expand: applied to the state :path: leads to
+        """
+        known = len(path)
+        while known > 0 and path[:known] not in self.expanded_paths:
+            known -= 1
+        if path[:known] in self.expanded_paths:
+            self.expanded_paths.move_to_end(path[:known])
+            expansion = self.expanded_paths[path[:known]]
+        else:
+            expansion = self._remember((), self.expand(self.root))
+        for length in range(known + 1, len(path) + 1):
+            state, moves = expansion
+            expansion = self._remember(path[:length], self.expand(state.take_action(*moves[path[length - 1]])))
+        return expansion
+
+    def _remember(self, path: tuple, expansion: Tuple[Any, List]) -> Tuple[Any, List]:
+        self.expanded_paths[path] = expansion
+        if len(self.expanded_paths) > self.capacity:
+            self.expanded_paths.popitem(last=False)
+        return expansion
+
+
+class Pending(Sequence):
+    """
+    The nodes of a :NodeTable: from :start: on, each made into something
+    else by :build: (given its index) when it's asked for
+    """
+
+    def __init__(self, table: NodeTable, start: int, build: Callable[[int], Any]):
+        self.table = table
+        self.start = start
+        self.stop = len(table)
+        self.build = build
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.build(self.start + index)
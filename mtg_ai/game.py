@@ -1,9 +1,12 @@
+from bisect import insort
 from enum import Enum
-from itertools import chain, product
-from typing import TypeVar, Optional, List, Dict, Any, TYPE_CHECKING, Set, Callable, Tuple
+from hashlib import blake2b
+from itertools import chain
+import pickle
+from typing import TypeVar, Optional, List, Dict, Any, TYPE_CHECKING, Set, FrozenSet, Callable, Tuple, Sequence
 from . import zones
 from .mana import Mana
-from . import getters
+from . import getters, choices as lazy
 
 if TYPE_CHECKING:
     from actions import Trigger, Target
@@ -14,8 +17,15 @@ GenericStackObject = TypeVar('GenericStackObject')
 GenericGameObject = TypeVar('GenericGameObject', bound='GameObject')
 
 class HashKind(Enum):
-    FULL = 0
-    VISIBLE = 1
+    """
+    What a search's statistics table keys a state by (see :state_key():)
+    """
+    FULL = 0        #: everything about the state (:canonical_key:)
+    VISIBLE = 1     #: only what its player can see (:visible_key:)
+
+
+#: zones whose order the players can't see
+HIDDEN_ZONES = (zones.Deck,)
 
 
 def canonical_key(gs: 'GameState') -> tuple:
@@ -38,25 +48,88 @@ def canonical_key(gs: 'GameState') -> tuple:
       correct for unordered zones (Field, Hand, Grave) and still distinguishes
       ordered zones (Deck, Stack) because their position values differ.
     """
-    m = gs.mana_pool
-    mana_key = (m.white, m.blue, m.black, m.red, m.green,
-                m.gold, m.colorless, m.generic)
+    return _scalar_key(gs) + (_objects_key(gs, ()),)
+
+
+def visible_key(gs: 'GameState') -> tuple:
+    """
+    :canonical_key: less what the player can't see, the order of the cards
+    in each library: their positions are normalised to -1, so states that
+    differ only in how a library is ordered have the same visible key. What
+    is in a library is still part of the key, since a player knows their
+    decklist.
+    """
+    return _scalar_key(gs) + (_objects_key(gs, HIDDEN_ZONES),)
+
+
+def state_key(gs: 'GameState') -> tuple:
+    """
+    The key :gs:'s :hash_kind: asks for: its :visible_key: if that's
+    :HashKind.VISIBLE:, else its :canonical_key:
+    """
+    if gs.hash_kind is HashKind.VISIBLE:
+        return visible_key(gs)
+    return canonical_key(gs)
+
+
+def _objects_key(gs: 'GameState', hidden: tuple) -> tuple:
+    sick = {card.uid for card in gs.summoning_sick}
 
     def obj_key(obj):
-        zone = obj.zone
-        zone_class = type(zone).__name__ if zone is not None else ''
-        zone_owner = -1 if (zone is None or zone.owner is None) else zone.owner
-        zone_pos   = -1 if (zone is None or zone.position is None) else zone.position
-        tapped     = getattr(obj, 'tapped', False)
-        sick       = obj in gs.summoning_sick
-        counters   = tuple(sorted(
-            (k, v) for k, v in getattr(obj, 'counters', {}).items() if v != 0
-        ))
-        return (type(obj).__name__, zone_class, zone_owner, zone_pos,
-                tapped, sick, counters)
-
-    objects_key = tuple(sorted(obj_key(obj) for obj in gs.objects))
-    return (gs.turn_number, gs.land_drops, gs.active_player, mana_key, objects_key)
+        name, zone_class, zone_owner, zone_pos, tapped, counters = object_key(obj)
+        if isinstance(obj.zone, hidden):
+            zone_pos = -1
+        return (name, zone_class, zone_owner, zone_pos,
+                tapped, obj.uid in sick, counters)
+
+    return tuple(sorted(obj_key(obj) for obj in gs.objects))
+
+
+def _scalar_key(gs: 'GameState') -> tuple:
+    return (gs.turn_number, gs.land_drops, gs.active_player, gs.mana_pool.as_tuple())
+
+
+def object_key(obj: 'GameObject') -> tuple:
+    """
+    :canonical_key:'s description of a single object, less its summoning sickness
+    (which belongs to the game state, not the object).
+    """
+    zone = obj.zone
+    zone_class = type(zone).__name__ if zone is not None else ''
+    zone_owner = -1 if (zone is None or zone.owner is None) else zone.owner
+    zone_pos   = -1 if (zone is None or zone.position is None) else zone.position
+    tapped     = getattr(obj, 'tapped', False)
+    counters   = tuple(sorted(
+        (k, v) for k, v in getattr(obj, 'counters', {}).items() if v != 0
+    ))
+    return (type(obj).__name__, zone_class, zone_owner, zone_pos, tapped, counters)
+
+
+HASH_MASK = (1 << 64) - 1
+_ZOBRIST_TABLE: Dict[tuple, int] = {}
+
+def zobrist_value(key: tuple) -> int:
+    """
+    The random 64-bit number for :key: (a tuple of plain Python values).
+
+    Values are filled in the first time each key is seen, from a digest of
+    the key, so they are the same in every process.
+    """
+    try:
+        return _ZOBRIST_TABLE[key]
+    except KeyError:
+        value = int.from_bytes(blake2b(repr(key).encode(), digest_size=8).digest(), 'little')
+        _ZOBRIST_TABLE[key] = value
+        return value
+
+
+def _sick_hash(value: int) -> int:
+    """
+    Remix an object's hash for the summoning-sick version of that object (splitmix64's finalizer)
+    """
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & HASH_MASK
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & HASH_MASK
+    return value ^ (value >> 31)
 
 
 class GameState:
@@ -69,41 +142,444 @@ class GameState:
     Conceptually, GameStates are immutable. Any change to a GameState should be made
     by calling :GameState.take_action(): with an Action that describes the change to be made;
     this produces a new GameState with those changes.
+
+    GameStates hash and compare by their logical state (see :zobrist_hash(): and
+    :canonical_key():), so equivalent states reached by different lines of play
+    are equal. Don't change a state once it has been put in a set or dict.
+
+    A state can also be changed in place (`take_action(..., copy=False)`) and
+    then rolled back with :undo():; see :mark():.
     """
 
-    __slots__ = ('hash_kind','objects','players', 'mana_pool','turn_number','triggers','summoning_sick', 
-                 'land_drops', 'active_player', 'active_effects')
+    __slots__ = ('hash_kind','objects','players', '_mana_pool','_turn_number','triggers','summoning_sick', 
+                 '_land_drops', '_active_player', 'active_effects', 'zone_index', 'copy_on_write',
+                 '_owned_buckets', '_object_hashes', '_objects_hash', '_stale_hashes', '_owns_hashes',
+                 'journal', '_performing', '_static_effects', '_attribute_cache', '_owns_attributes',
+                 '_trigger_table', 'move_cache', 'changed_inputs')
 
     def __init__(self,players: List[Player], *, 
                 mana_pool: Optional['Mana']=None, 
                 turn_number:int=1,
                 land_drops: int = 1,
                 active_player: Player | None = None,
-                hash_kind:HashKind = HashKind.FULL):
+                hash_kind:HashKind = HashKind.FULL,
+                copy_on_write: bool = False):
+        self.journal: Optional[List[Tuple[Callable, tuple]]] = None #: how to undo each change since :mark(): was first called
+        self._performing = 0 #: the number of actions being performed on this state
         self.hash_kind = hash_kind
-        self.objects = []
+        self.copy_on_write = copy_on_write #: share unchanged objects with copies; see :ObjectTable:
+        self.objects: 'List[GameObject] | ObjectTable' = ObjectTable(self) if copy_on_write else []
         self.players = players
-        self.mana_pool = mana_pool or Mana()
-        self.turn_number = turn_number
+        self._mana_pool = mana_pool or Mana()
+        self._turn_number = turn_number
         self.triggers: List[Tuple[Event, 'TriggeredEffect']] = [] #: triggers waiting to go onto the stack
-        self.summoning_sick: Set[int] = set() #: summoning sick cards
-        self.land_drops = 1 #: the number of lands that can still be played this turn
-        self.active_player = 0
+        self.summoning_sick: CardSet = CardSet(self) #: summoning sick cards
+        self._land_drops = 1
+        self._active_player = 0
         self.active_effects: 'Set[ActiveEffect]' = set()
+        #: (zone type, zone owner) -> uids of the objects in that zone, in :in_zone(): order
+        self.zone_index: Dict[Tuple[type, Player | None], List[int]] = {}
+        self._owned_buckets: FrozenSet[Tuple[type, Player | None]] = frozenset() #: zone_index entries not shared with a copy
+        # incremental hashing; see :zobrist_hash():
+        self._object_hashes: Dict[int, int] = {} #: uid -> zobrist_value of that object
+        self._objects_hash = 0 #: sum of :_object_hashes:
+        self._stale_hashes: Set[int] = set() #: uids of objects that changed since they were hashed
+        self._owns_hashes = True #: whether :_object_hashes: and :_stale_hashes: are shared with a copy
+        # card attributes changed by static effects; see :attribute():
+        self._static_effects: Optional[Dict[str, Tuple['StaticEffect', ...]]] = None #: built from :active_effects: when needed
+        self._attribute_cache: Dict[int, Dict[str, Any]] = {} #: uid -> attribute name -> value
+        self._owns_attributes = True #: whether :_attribute_cache: is shared with a copy
+        #: action type -> the active triggered effects that wait for it; see :triggers_for():
+        self._trigger_table: Dict[type, Tuple['TriggeredEffect', ...]] = {}
+        self.move_cache: Dict[str, list] = {} #: the legal moves, by where they come from; see actions.legal_moves
+        self.changed_inputs: Set[Any] = set() #: what changed since :move_cache: was filled; see :input_changed():
+
+    @property
+    def mana_pool(self) -> Mana:
+        if self.journal is not None:
+            # callers change the pool in place (`mana_pool -= cost`), so while
+            # journaling hand out a copy and keep the old pool for :undo():
+            return self._mana_pool.copy()
+        return self._mana_pool
+
+    @mana_pool.setter
+    def mana_pool(self, value: Mana):
+        self.record(setattr, self, '_mana_pool', self._mana_pool)
+        self.input_changed('mana')
+        self._mana_pool = value
+
+    @property
+    def turn_number(self) -> int:
+        return self._turn_number
+
+    @turn_number.setter
+    def turn_number(self, value: int):
+        self.record(setattr, self, '_turn_number', self._turn_number)
+        self.move_cache = {}
+        self._turn_number = value
+
+    @property
+    def land_drops(self) -> int:
+        """
+        The number of lands that can still be played this turn
+        """
+        return self._land_drops
+
+    @land_drops.setter
+    def land_drops(self, value: int):
+        self.record(setattr, self, '_land_drops', self._land_drops)
+        self.input_changed('land_drops')
+        self._land_drops = value
+
+    @property
+    def active_player(self) -> Player:
+        return self._active_player
+
+    @active_player.setter
+    def active_player(self, value: Player):
+        self.record(setattr, self, '_active_player', self._active_player)
+        self.move_cache = {}
+        self._active_player = value
+
+    def mark(self) -> int:
+        """
+        Start recording changes to this state, if it isn't already, and return
+        a mark that :undo(): can roll the state back to.
+
+        While a state is recording, every change made through the Card and
+        GameObject setters, :mana_pool:, :land_drops:, :turn_number:,
+        :active_player:, :summoning_sick:, :active_effects:, :triggers: and
+        object creation and deletion is logged in :journal:, so a search
+        can run on one state in place (`take_action(..., copy=False)`)
+        instead of copying it at every step.
+
+        Copies of a state don't inherit its journal. A copy-on-write state
+        must not be changed once it has been copied, journal or no.
+        """
+        if self.journal is None:
+            self.journal = []
+        return len(self.journal)
+
+    def undo(self, mark: int):
+        """
+        Undo every change made since :mark(): returned :mark:
+        """
+        journal = self.journal
+        self.journal = None # undoing a change isn't itself recorded
+        try:
+            while len(journal) > mark:
+                undo, args = journal.pop()
+                undo(*args)
+        finally:
+            self.journal = journal
+            # some changes are undone without going through the setters that track them
+            self.move_cache = {}
+
+    def stop_journal(self):
+        """
+        Stop recording changes; marks taken before this can no longer be undone.
+        """
+        self.journal = None
+
+    def record(self, undo: Callable, *args):
+        """
+        Log that calling :undo: with :args: reverts a change, if this state is
+        recording changes (see :mark():)
+        """
+        if self.journal is not None:
+            self.journal.append((undo, args))
+
+    def input_changed(self, what):
+        """
+        Note that :what: changed, so that actions.legal_moves knows which of the
+        moves in :move_cache: are out of date. :what: is a zone type, when an
+        object enters, leaves or changes in a zone of that type, or one of
+        'mana', 'land_drops' and 'sick'.
+        """
+        if self.move_cache:
+            self.changed_inputs.add(what)
+
+    def add_object(self, obj: 'GameObject'):
+        """
+        Add :obj: to :objects:, at the index given by its uid
+        """
+        if obj.uid == len(self.objects):
+            self.objects.append(obj)
+            self.record(self.remove_object, obj)
+        else:
+            self.record(self.add_object, self.objects[obj.uid])
+            self.objects[obj.uid] = obj
+        self.invalidate_hash(obj)
+
+    def remove_object(self, obj: 'GameObject'):
+        """
+        Delete :obj: (which must be the newest object) from :objects:
+        """
+        assert obj.uid == len(self.objects) - 1, "only the newest object can be deleted"
+        self.invalidate_hash(obj)
+        del self.objects[obj.uid]
+        self.record(self.add_object, obj)
 
 
     def copy(self) -> 'GameState':
-        new_game_state = GameState(self.players,mana_pool=self.mana_pool.copy(), turn_number=self.turn_number,
-            land_drops=self.land_drops, hash_kind=self.hash_kind, active_player=self.active_player)
-        new_game_state.objects = [obj.copy(new_game_state) for obj in self.objects]
-        new_game_state.summoning_sick = {new_game_state.get(card) for card in self.summoning_sick}
+        """
+        Copy this game state.
+
+        If :copy_on_write: is set, the copy shares its objects with this state
+        and only copies the ones that are looked up in it (see :ObjectTable:),
+        so this state must not be changed once it has been copied.
+        """
+        new_game_state = type(self)(self.players,mana_pool=self._mana_pool.copy(), turn_number=self.turn_number,
+            land_drops=self.land_drops, hash_kind=self.hash_kind, active_player=self.active_player,
+            copy_on_write=self.copy_on_write)
+        new_game_state._object_hashes = self._object_hashes
+        new_game_state._objects_hash = self._objects_hash
+        new_game_state._stale_hashes = self._stale_hashes
+        new_game_state._owns_hashes = self._owns_hashes = False
+        self._copy_objects(new_game_state)
         new_game_state.triggers = self.triggers.copy()
         new_game_state.active_effects = self.active_effects.copy()
+        new_game_state._static_effects = self._static_effects
+        new_game_state._attribute_cache = self._attribute_cache
+        new_game_state._owns_attributes = self._owns_attributes = False
+        new_game_state._trigger_table = self._trigger_table
+        new_game_state.move_cache = self.move_cache
+        new_game_state.changed_inputs = self.changed_inputs.copy()
+        # a copy starts with one land drop, as player 0
+        if new_game_state.land_drops != self.land_drops:
+            new_game_state.input_changed('land_drops')
+        if new_game_state.active_player != self.active_player:
+            new_game_state.move_cache = {}
+        # the index lists are shared until one of the states changes them
+        new_game_state.zone_index = self.zone_index.copy()
+        self._owned_buckets = frozenset()
         return new_game_state
 
+    def __reduce__(self):
+        """
+        Pickle this state as the class, owner and :GameObject.snapshot(): of
+        each of its objects, since the abilities cards are built with are
+        made of lambdas, which can't be pickled. Unpickling (:_rebuild():)
+        constructs the cards again, which gives them back their abilities,
+        and then restores their snapshots. This relies on constructing the
+        same cards in the same order making the same objects, as it does for
+        the cards in :mtg_ai.decklist:.
+
+        States with triggers waiting to go on the stack can't be pickled.
+        """
+        if self.triggers:
+            raise pickle.PicklingError("can't pickle a game state with triggers waiting to go on the stack")
+        objects = [(type(obj), getattr(obj, 'owner', None), obj.snapshot()) for obj in self.objects]
+        scalars = (self._mana_pool, self.turn_number, self.land_drops, self.active_player)
+        sick = sorted(card.uid for card in self.summoning_sick)
+        return (_rebuild, (type(self), self.players, self.hash_kind, self.copy_on_write, scalars, objects, sick))
+
+    def _copy_objects(self, new_game_state: 'GameState'):
+        """
+        Copy the objects and the per-object state of this game state into :new_game_state:
+        """
+        if self.copy_on_write:
+            new_game_state.objects = self.objects.copy(new_game_state)
+        else:
+            new_game_state.objects = [obj.copy(new_game_state) for obj in self.objects]
+        new_game_state.summoning_sick = self.summoning_sick.copy(new_game_state)
+
+    def register_card(self, card: 'Card'):
+        """
+        Called by `Card.__init__` once :card: has been added to :objects: and given its CardState.
+        """
+        if card.zone is not None:
+            self.update_zone_index(card, None, card.zone)
+
     def in_zone(self, zone: zones.Zone)->List['GameObject']:
-        return sorted([c for c in self.objects if zone.contains(c)],
-        key=lambda card: card.zone.position or float('-inf'))
+        """
+        The objects in :zone:, ordered by position (bottom to top for ordered zones).
+
+        Reads from :zone_index: rather than scanning every object, so this
+        costs O(k) in the number of objects in the zone.
+        """
+        if type(zone).contains is not zones.Zone.contains:
+            # zones that override `contains` (e.g. zones.Any) can't be looked up by type
+            return sorted([c for c in self.objects if zone.contains(c)],
+            key=lambda card: card.zone.position or float('-inf'))
+
+        kind = type(zone)
+        if zone.owner is not None:
+            uids = self.zone_index.get((kind, zone.owner), ())
+        else:
+            buckets = [uids for (k, _owner), uids in self.zone_index.items() if k is kind]
+            if len(buckets) == 1:
+                uids = buckets[0]
+            else:
+                uids = sorted(chain.from_iterable(buckets), key=self._position_key)
+
+        objects = self.objects
+        if zone.position is None:
+            return [objects[uid] for uid in uids]
+        return [objects[uid] for uid in uids if objects[uid].zone.position == zone.position]
+
+    def _position_key(self, uid: int):
+        return (self.objects[uid].zone.position or float('-inf'), uid)
+
+    def update_zone_index(self, obj: 'GameObject', old_zone: zones.Zone | None, new_zone: zones.Zone | None):
+        """
+        Move :obj: from :old_zone:'s entry in the zone index to :new_zone:'s.
+
+        Called by the `zone` setters of GameObjects; :obj: must already be in :new_zone:.
+        """
+        self.invalidate_hash(obj)
+        self.invalidate_attributes(obj)
+        if old_zone is not None:
+            self.input_changed(type(old_zone))
+            self._own_bucket((type(old_zone), old_zone.owner)).remove(obj.uid)
+        if new_zone is not None:
+            self.input_changed(type(new_zone))
+            bucket = self._own_bucket((type(new_zone), new_zone.owner))
+            insort(bucket, obj.uid, key=self._position_key)
+
+    def _own_bucket(self, key) -> List[int]:
+        if key not in self._owned_buckets:
+            self.zone_index[key] = self.zone_index.get(key, []).copy()
+            self._owned_buckets |= {key}
+        return self.zone_index[key]
+
+    def invalidate_hash(self, obj: 'GameObject'):
+        """
+        Called whenever :obj: is created or its zone, tapped status or counters change.
+        """
+        if self.move_cache:
+            self.input_changed(type(getattr(obj, 'zone', None)))
+        uid = obj.uid
+        if uid in self._stale_hashes:
+            return
+        if not self._owns_hashes:
+            self._object_hashes = self._object_hashes.copy()
+            self._stale_hashes = self._stale_hashes.copy()
+            self._owns_hashes = True
+        self._objects_hash -= self._object_hashes.pop(uid, 0)
+        self._stale_hashes.add(uid)
+
+    def invalidate_attributes(self, obj: 'GameObject'):
+        """
+        Forget the attributes of :obj: computed by :attribute():; called when its zone changes.
+        """
+        # copies made before the move still share the cache, so it's copied
+        # even if :obj: has no entry, or this state's new entries would be theirs too
+        self._own_attributes()
+        self._attribute_cache.pop(obj.uid, None)
+
+    def _own_attributes(self):
+        if not self._owns_attributes:
+            self._attribute_cache = self._attribute_cache.copy()
+            self._owns_attributes = True
+
+    def add_effect(self, effect: 'ActiveEffect'):
+        self.active_effects.add(effect)
+        self.record(self.remove_effect, effect)
+        self._effects_changed()
+
+    def remove_effect(self, effect: 'ActiveEffect'):
+        self.active_effects.discard(effect)
+        self.record(self.add_effect, effect)
+        self._effects_changed()
+
+    def _effects_changed(self):
+        self._static_effects = None
+        self._trigger_table = {}
+        self.move_cache = {}
+        self._attribute_cache = {}
+        self._owns_attributes = True
+
+    @property
+    def static_effects(self) -> Dict[str, Tuple['StaticEffect', ...]]:
+        """
+        The active static effects, by the name of the attribute they change
+        """
+        if self._static_effects is None:
+            by_name = {}
+            for active in self.active_effects:
+                if active.is_static:
+                    by_name.setdefault(active.effect.property_name, []).append(active.effect)
+            self._static_effects = {name: tuple(effects) for name, effects in by_name.items()}
+        return self._static_effects
+
+    def triggers_for(self, action_type: type) -> Tuple['TriggeredEffect', ...]:
+        """
+        The active triggered effects waiting for actions of type :action_type:.
+
+        The answer for each type is kept in :_trigger_table: until
+        :active_effects: changes, so events that nothing is waiting for cost
+        one dict lookup. Copies share the table, which is only ever added to.
+        """
+        try:
+            return self._trigger_table[action_type]
+        except KeyError:
+            found = self._trigger_table[action_type] = tuple(
+                active.effect for active in self.active_effects
+                if active.is_trigger and issubclass(action_type, active.effect.when))
+            return found
+
+    def attribute(self, card: 'Card', name: str, base: Any) -> Any:
+        """
+        The value of :card:'s attribute :name:, whose printed value is :base:,
+        once the active static effects have changed it.
+
+        Values are cached until :active_effects: or the card's zone changes,
+        so static effects' conditions and modifications should only depend
+        on the card they apply to and its zone.
+        """
+        try:
+            return self._attribute_cache[card.uid][name]
+        except KeyError:
+            pass
+        value = base
+        for effect in self.static_effects.get(name, ()):
+            if effect.condition(card):
+                value = effect.modification(self, value)
+        # the cache and its entries may be shared with copies, whose cards may
+        # be in other zones, so both are copied rather than changed
+        self._own_attributes()
+        entry = self._attribute_cache.get(card.uid)
+        self._attribute_cache[card.uid] = {name: value} if entry is None else {**entry, name: value}
+        return value
+
+    def zobrist_hash(self) -> int:
+        """
+        A 64-bit hash of this state's :canonical_key:.
+
+        Each object contributes the :zobrist_value: of its :object_key:, and
+        the contributions are summed (rather than xor-ed, so that identical
+        cards don't cancel out). The sum is kept up to date as objects change,
+        so only the objects that changed since the last call are rehashed.
+        Summoning sickness, the mana pool, land drops and the turn are
+        hashed on every call; they cost O(1) each.
+        """
+        if self._stale_hashes:
+            if not self._owns_hashes:
+                self._object_hashes = self._object_hashes.copy()
+                self._owns_hashes = True
+            objects = self.objects
+            total = self._objects_hash
+            for uid in self._stale_hashes:
+                if uid < len(objects): # else the object has been deleted
+                    value = self._object_hashes[uid] = zobrist_value(object_key(objects[uid]))
+                    total += value
+            self._objects_hash = total & HASH_MASK
+            self._stale_hashes = set()
+        total = self._objects_hash + zobrist_value(_scalar_key(self))
+        for card in self.summoning_sick:
+            total += _sick_hash(self._object_hashes[card.uid])
+        return total & HASH_MASK
+
+    def __hash__(self) -> int:
+        return self.zobrist_hash()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GameState):
+            return NotImplemented
+        # canonical_key settles hash collisions
+        return self is other or (self.zobrist_hash() == other.zobrist_hash()
+                                 and canonical_key(self) == canonical_key(other))
 
     def get(self, obj: GenericGameObject | getters.Getter) -> GenericGameObject:
         try:
@@ -130,16 +606,16 @@ class GameState:
         else:
             card.zone = zones.Stack(owner=owner, position=0)
 
-    def resolve_stack(self) -> 'GameState':
+    def resolve_stack(self, copy: bool = True) -> 'GameState':
         """
-        Resolve the top of the stack
+        Resolve the top of the stack, in a copy of this state unless :copy: is False
         """
         stack = self.in_zone(zones.Stack())
         if stack:
             top = stack.pop()
             chosen = top.effect.get_choices(self)
 
-            new_state = self.take_action(top.effect, chosen[0])
+            new_state = self.take_action(top.effect, chosen[0], copy=copy)
 
             top.effect.unset_targets(new_state)
             return new_state
@@ -154,23 +630,40 @@ class GameState:
         state, preserving the initial state. Otherwise, the changes are made in place.
         This is meant to be a mechanism for saving space.
 
+        Actions that take further actions while they are being performed
+        (see :Action:) change the state being acted on in place, so an
+        action is never copied more than once.
+
         Returns:
             A game state with the changes made
         """
 
         choices = choices or {}
-        new_state = self.copy() if copy else self
-        event = action.perform(new_state, **choices)
+        new_state = self.copy() if copy and not self._performing else self
+        new_state._performing += 1
+        try:
+            event = action.perform(new_state, **choices)
+        finally:
+            new_state._performing -= 1
         new_state = event.game_state
-        new_state.triggers.extend(
-            (event,trigger) for trigger in new_state.active_triggers if trigger.matches(event)
-        )
+        waiting = new_state.triggers_for(type(event.action))
+        if not waiting:
+            return new_state
+        triggered = [(event,trigger) for trigger in waiting if trigger.condition(event)]
+        if triggered:
+            new_state.record(new_state._truncate_triggers, len(new_state.triggers))
+            new_state.triggers.extend(triggered)
         return new_state
 
     def stack_triggers(self):
         for (event, trigger) in self.triggers:
             trigger.do(self, event)
-        self.triggers.clear()
+        if self.triggers:
+            self.record(self.triggers.extend, self.triggers.copy())
+            self.triggers.clear()
+
+    def _truncate_triggers(self, length: int):
+        del self.triggers[length:]
     
     @property
     def active_triggers(self) -> List['TriggeredEffect']:
@@ -178,39 +671,173 @@ class GameState:
 
     @property
     def active_statics(self) -> List['StaticEffect']:
-        return [active.effect for active in self.active_effects if active.is_static]
+        return [effect for effects in self.static_effects.values() for effect in effects]
+
+def _rebuild(cls, players, hash_kind, copy_on_write, scalars, objects, sick) -> GameState:
+    """
+    Unpickle a game state; see :GameState.__reduce__:
+    """
+    game_state = cls(players, hash_kind=hash_kind, copy_on_write=copy_on_write)
+    for uid, (obj_type, owner, _) in enumerate(objects):
+        # objects that another object makes as it's constructed (such as a
+        # card's targets) already exist
+        if uid == len(game_state.objects):
+            obj_type(game_state, owner=owner)
+    if [type(obj) for obj in game_state.objects] != [obj_type for obj_type, _, _ in objects]:
+        raise pickle.UnpicklingError("constructing the objects again didn't make the same objects")
+    for obj, (_, _, snapshot) in zip(game_state.objects, objects):
+        obj.restore(*snapshot)
+    for uid in sick:
+        game_state.summoning_sick.add(game_state.objects[uid])
+    mana_pool, turn_number, land_drops, active_player = scalars
+    game_state.mana_pool = mana_pool
+    game_state.turn_number = turn_number
+    game_state.land_drops = land_drops
+    game_state.active_player = active_player
+    return game_state
+
 
 class GameObject:
     """
     Base class for every object that can change between game states, and
     which needs to maintain a persistent identity as it does so.
 
-    Classes that inherit from GameObject need to implement :copy():
+    Classes that inherit from GameObject need to implement :copy(): and :share():
     """
     def __init__(self, game_state: GameState, uid: Optional[int]=None):
         self.game_state = game_state
-        if uid is None:
-            self.uid = len(game_state.objects)
-            game_state.objects.append(self)
-        else:
-            self.uid = uid
-            game_state.objects[uid] = self
+        self.uid = len(game_state.objects) if uid is None else uid
         self._zone : Optional[zones.Zone] = None
+        game_state.add_object(self)
     
     def copy(self, game_state: GameState) -> 'GameObject':
+        """
+        Return a copy of this object registered in :game_state:
+        """
         raise NotImplementedError()
 
+    def share(self, game_state: GameState) -> 'GameObject':
+        """
+        Return a copy of this object that belongs to :game_state: and shares
+        any mutable state with this object until one of them changes it.
+
+        The copy keeps this object's uid; unlike :copy(): it is not added to
+        `game_state.objects`.
+        """
+        raise NotImplementedError()
+
+    def snapshot(self) -> tuple:
+        """
+        The arguments to :restore(): that give a newly constructed copy of
+        this object the same state as this one (see :GameState.__reduce__:)
+        """
+        return (self.zone,)
+
+    def restore(self, zone):
+        if zone is not None:
+            self.zone = zone
+
     @property
     def zone(self) -> zones.Zone | None:
         return self._zone
 
     @zone.setter
     def zone(self, value):
+        old_zone = self._zone
+        self.game_state.record(setattr, self, 'zone', old_zone)
         self._zone = value
+        self.game_state.update_zone_index(self, old_zone, value)
+
+
+class ObjectTable:
+    """
+    The `objects` of a copy-on-write GameState.
+
+    Copying a table only copies its list of references, so a new table
+    starts out pointing at its parent's GameObjects. The first time an
+    object is looked up it is replaced with :GameObject.share(): for this
+    table's game state. Objects an action never touches are never copied,
+    so the cost of copying a state scales with the number of objects that
+    change, not with the size of the game.
+    """
+    __slots__ = ('game_state', 'items')
+
+    def __init__(self, game_state: GameState, items: Optional[List[GameObject]] = None):
+        self.game_state = game_state
+        self.items = items if items is not None else []
+
+    def copy(self, game_state: GameState) -> 'ObjectTable':
+        return ObjectTable(game_state, self.items.copy())
+
+    def __getitem__(self, uid: int) -> GameObject:
+        obj = self.items[uid]
+        if obj.game_state is not self.game_state:
+            obj = self.items[uid] = obj.share(self.game_state)
+        return obj
+
+    def __setitem__(self, uid: int, obj: GameObject):
+        self.items[uid] = obj
+
+    def __delitem__(self, uid: int):
+        del self.items[uid]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return (self[uid] for uid in range(len(self.items)))
+
+    def append(self, obj: GameObject):
+        self.items.append(obj)
+
+class CardSet:
+    """
+    A set of cards in a game state, stored by uid.
+
+    Cards hash and compare by name, zone and tapped status, so a set of
+    Cards can't hold two copies of the same card; a CardSet can. Any
+    GameState's copy of a card can be used to look it up.
+    """
+    __slots__ = ('game_state', 'uids')
+
+    def __init__(self, game_state: GameState, uids: Optional[Set[int]] = None):
+        self.game_state = game_state
+        self.uids = uids if uids is not None else set()
+
+    def copy(self, game_state: GameState) -> 'CardSet':
+        return CardSet(game_state, self.uids.copy())
+
+    def add(self, card: 'Card'):
+        if card.uid not in self.uids:
+            self.uids.add(card.uid)
+            self.game_state.record(self.uids.discard, card.uid)
+            self.game_state.input_changed('sick')
+
+    def discard(self, card: 'Card'):
+        if card.uid in self.uids:
+            self.uids.discard(card.uid)
+            self.game_state.record(self.uids.add, card.uid)
+            self.game_state.input_changed('sick')
+
+    def clear(self):
+        if self.uids:
+            self.game_state.record(self.uids.update, self.uids.copy())
+            self.game_state.input_changed('sick')
+            self.uids.clear()
+
+    def __contains__(self, card) -> bool:
+        return getattr(card, 'uid', None) in self.uids
+
+    def __iter__(self):
+        objects = self.game_state.objects
+        return iter([objects[uid] for uid in sorted(self.uids)])
+
+    def __len__(self) -> int:
+        return len(self.uids)
 
 T = TypeVar('T')
 type Choice[T] = Dict[str, T]
-type ChoiceSet[T] = List[Choice[T]]
+type ChoiceSet[T] = Sequence[Choice[T]]
 
 class Event:
     def __init__(self, action, game_state: GameState, source=None, cause=None, ):
@@ -230,9 +857,9 @@ class Action:
     as one of the keyword parameters in its implementation of :Action.do():
 
     Classes that inherit from Action must also implement :Action.choices():.
-    This method should take a game state and return a list. Each element of that
-    list should be a dict whose keys are the keyword arguments for that class's
-    :do(): method.
+    This method should take a game state and return a list, or a lazy choice set
+    (see :mtg_ai.choices:). Each element of it should be a dict whose keys are
+    the keyword arguments for that class's :do(): method.
 
     If an action is composed of other actions, it should either call :Action.perform():
     or :GameState.take_action(): to perform those actions, rather than invoke :Action.do():
@@ -244,7 +871,9 @@ class Action:
         self.targets: List['Target'] = []
  
     def bind(self, **kwargs):
-         self.params |= kwargs
+         # a new dict rather than an update in place, so that copies sharing
+         # the old one (and threads reading it) never see it change
+         self.params = self.params | kwargs
          return self
 
     def choices[T](self,game_state) -> ChoiceSet[T]:
@@ -279,13 +908,14 @@ class Action:
         not_yet_set: List['Target'] = [t for t in targets if not t.is_set]
         if not_yet_set:
             target_choices = [target.choices(game_state) for target in not_yet_set]
-            combinations = list(product(*target_choices))
-            return [{'targets': tgtlist} for tgtlist in combinations]
+            return lazy.Product(target_choices, lambda tgtlist: {'targets': tgtlist})
         else:
             # cls.choices() should not let you choose anything set in self.params
             choices: ChoiceSet[T] = self.choices(game_state)
-            return [{c: choice[c] for c in choice.keys() - self.params.keys()}
-                    for choice in choices]
+            if not self.params:
+                return choices
+            bound = self.params.keys()
+            return lazy.Mapped(choices, lambda choice: {c: choice[c] for c in choice.keys() - bound})
 
  
     def perform(self, game_state, **kwargs) -> Event:
@@ -325,9 +955,7 @@ class And(Action):
 
     def choices(self,game_state):
         subchoices = [action.get_choices(game_state) for action in self.actions]
-        combinations = list(product(*subchoices))
-        return [{'choices': option }
-        for option in combinations]
+        return lazy.Product(subchoices, lambda option: {'choices': option})
     
     def do(self, game_state, choices=None):
         if choices is None:
@@ -371,7 +999,9 @@ class StackAbility(GameObject):
             return [{}]
 
         def do(self, game_state):
-            del game_state.objects[self.obj.uid]
+            obj = game_state.get(self.obj)
+            obj.zone = None
+            game_state.remove_object(obj)
 
     def __init__(self,game_state: GameState,
                  effect):
@@ -383,7 +1013,18 @@ class StackAbility(GameObject):
             game_state=game_state,
             effect=self.effect
         )
-        ability.zone=self.zone
+        ability._zone = self.zone # already in the copied zone index
+        ability.effect = self.effect
+        return ability
+
+    def snapshot(self) -> tuple:
+        raise pickle.PicklingError("can't pickle a game state with abilities on the stack")
+
+    def share(self, game_state: GameState) -> 'StackAbility':
+        ability = object.__new__(StackAbility)
+        ability.game_state = game_state
+        ability.uid = self.uid
+        ability._zone = self.zone
         ability.effect = self.effect
         return ability
 
@@ -487,9 +1128,10 @@ class StaticAbility:
     def on_move(self, game_state: GameState):
         card = game_state.get(self.active_effect.source)
         if self.active_zone.contains(card):
-            game_state.active_effects.add(self.active_effect)
+            if self.active_effect not in game_state.active_effects:
+                game_state.add_effect(self.active_effect)
         elif self.active_effect in game_state.active_effects:
-            game_state.active_effects.remove(self.active_effect)
+            game_state.remove_effect(self.active_effect)
 
 class CardType(str, Enum):
     Land = "land"
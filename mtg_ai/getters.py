@@ -1,6 +1,6 @@
 from typing import Protocol, TypeVar
-from itertools import chain, combinations, tee
 from . import zones
+from .choices import Subsets
 
 T = TypeVar('T')
 
@@ -84,7 +84,7 @@ class ActivePlayer:
 class UpTo:
     """
     Get every way to choose n or fewer items from a list that satisfy a predicate
-    Returns an iterator that enumerates all possibilities from most choices
+    Returns a :choices.Subsets: that enumerates all possibilities from most choices
     to fewest choices
     """
     def __init__(self, n, predicate):
@@ -92,8 +92,4 @@ class UpTo:
         self.predicate = predicate
     
     def __call__(self, iterable):
-        iter_filtered = enumerate(tee(filter(self.predicate, iterable), self.n))
-        return chain(chain.from_iterable(
-            combinations(filtered,self.n - i) 
-            for (i,filtered) in iter_filtered
-        ), [{}])
+        return Subsets(filter(self.predicate, iterable), self.n)
@@ -1,20 +1,83 @@
-from dataclasses import dataclass, asdict
+from typing import Iterable, List
 
 COLORS = ('white', 'blue', 'black', 'red', 'green', 'colorless')
+FIELDS = ('white', 'blue', 'black', 'red', 'green', 'gold', 'colorless', 'generic')
+
+# A Mana is packed into one int, with a 16-bit lane per field in FIELDS order.
+# Each lane holds the field's value plus BIAS, so values can range over
+# [-BIAS, BIAS); that leaves the top bit of every lane free to act as a guard
+# bit that catches borrows when lanes are compared.
+LANE_BITS = 16
+LANE_MASK = (1 << LANE_BITS) - 1
+BIAS = 1 << 12
+SHIFTS = {field: i * LANE_BITS for i, field in enumerate(FIELDS)}
+
+def _lanes(fields, value):
+    return sum(value << SHIFTS[field] for field in fields)
+
+ZERO = _lanes(FIELDS, BIAS)                           #: Mana()
+ONES = _lanes(FIELDS, 1)
+GUARDS = _lanes(FIELDS, 1 << (LANE_BITS - 1))         #: the top bit of every lane
+COLOR_LANES = _lanes(COLORS, LANE_MASK)               #: every bit of the COLORS lanes
+COLOR_GUARDS = GUARDS & COLOR_LANES
+COLOR_ZERO = ZERO & COLOR_LANES
+GENERIC_ORDER = list(reversed(COLORS)) + ['gold']     #: the order generic costs are paid in
+
+
+def _mana_value(packed: int) -> int:
+    # multiplying by ONES sums every lane into the top one
+    return (((packed * ONES) >> SHIFTS['generic']) & LANE_MASK) - len(FIELDS) * BIAS
+
+
+def _lane(packed: int, field: str) -> int:
+    return ((packed >> SHIFTS[field]) & LANE_MASK) - BIAS
+
+
+def _field(name: str) -> property:
+    shift = SHIFTS[name]
+
+    def get(self) -> int:
+        return ((self._packed >> shift) & LANE_MASK) - BIAS
+
+    def set(self, value: int):
+        self._packed += (value - get(self)) << shift
+
+    return property(get, set)
+
 
-@dataclass(unsafe_hash=True,slots=True)
 class Mana:
-    white: int = 0
-    blue: int = 0
-    black: int = 0
-    red: int = 0
-    green: int = 0
-    gold: int = 0 # stand-in for mana of any color
-    colorless: int = 0
-    generic: int = 0
+    """
+    An amount of mana, or a mana cost.
+
+    Fields are read and written like attributes (`mana.green += 1`), but are
+    stored together in one packed int, so adding, comparing, hashing and
+    copying are a handful of int operations.
+    """
+    __slots__ = ('_packed',)
+
+    def __init__(self, white: int = 0, blue: int = 0, black: int = 0, red: int = 0,
+                 green: int = 0, gold: int = 0, colorless: int = 0, generic: int = 0):
+        self._packed = (ZERO + white + (blue << 16) + (black << 32) + (red << 48) + (green << 64)
+                        + (gold << 80) + (colorless << 96) + (generic << 112))
+
+    white = _field('white')
+    blue = _field('blue')
+    black = _field('black')
+    red = _field('red')
+    green = _field('green')
+    gold = _field('gold') # stand-in for mana of any color
+    colorless = _field('colorless')
+    generic = _field('generic')
+
+    def as_tuple(self) -> tuple:
+        """
+        The value of every field, in FIELDS order
+        """
+        packed = self._packed
+        return tuple(((packed >> shift) & LANE_MASK) - BIAS for shift in SHIFTS.values())
 
     def __str__(self):
-        return f"Mana({','.join(f'{k}={v}' for k,v in asdict(self).items() if v)})"
+        return f"Mana({','.join(f'{k}={v}' for k,v in zip(FIELDS, self.as_tuple()) if v)})"
 
     def __repr__(self):
         return str(self)
@@ -39,9 +102,7 @@ class Mana:
         return mana
 
     def __iadd__(self, other):
-        for field in asdict(self):
-            current = getattr(self,field)
-            setattr(self,field,current + getattr(other, field))
+        self._packed += other._packed - ZERO
         return self
 
     def __isub__(self, cost):
@@ -49,89 +110,96 @@ class Mana:
         Use the mana in `self` to pay the mana cost `cost`
         """
 
-        # step one: pay for colored costs with colored mana
-        for field in asdict(self):
-            if field == 'generic':
-                continue
-            if field == 'gold':
-                continue
-            current = getattr(self,field)
-            setattr(self,field,current - getattr(cost, field))
+        # step one: pay for colored costs with colored mana (every COLORS lane at once)
+        packed = self._packed + COLOR_ZERO - (cost._packed & COLOR_LANES)
 
         # step two: pay remaining colored costs with gold mana
-        gold = cost.gold
-        for field in COLORS:
-            if color_cost := getattr(self, field):
-                amt = min(color_cost, gold)
-                setattr(self, field, color_cost-amt)
-                gold -= amt
-            break
-        
-        generic_cost = cost.generic
-        # step four: pay generic costs, starting with colorless mana
-        for field in list(reversed(COLORS)) + ['gold']:
-            value = getattr(self, field)
-            amt = min(generic_cost, value)
-            setattr(self, field, value - amt)
-            generic_cost -= amt 
+        gold = _lane(cost._packed, 'gold')
+        if color_cost := _lane(packed, COLORS[0]):
+            amt = min(color_cost, gold)
+            packed -= amt << SHIFTS[COLORS[0]]
+            gold -= amt
+
+        generic_cost = _lane(cost._packed, 'generic')
+        # step four: pay generic costs, starting with colorless mana.
+        # With no generic cost this only changes fields that are negative
+        if generic_cost or ((packed | GUARDS) - ZERO) & GUARDS != GUARDS:
+            for field in GENERIC_ORDER:
+                value = _lane(packed, field)
+                amt = min(generic_cost, value)
+                packed -= amt << SHIFTS[field]
+                generic_cost -= amt
+        self._packed = packed
         return self
-    
+
     def __add__(self, other) -> 'Mana':
         new = self.copy()
         new += other
         return new
 
     def __sub__(self, other) -> 'Mana':
-        new = self.copy() 
+        new = self.copy()
         new -= other
         return new
 
     def __imul__(self, amount):
-        for field in asdict(self):
+        for field in FIELDS:
             setattr(self, field, getattr(self, field) * amount)
         return self
 
     def __mul__(self, amount):
-        copy = self.copy() 
+        copy = self.copy()
         copy *= amount
         return copy
 
     @property
     def mana_value(self):
-        return sum(getattr(self, field)
-         for field in
-         asdict(self)
-     )
+        return _mana_value(self._packed)
 
     def __eq__(self, other):
         if not isinstance(other, type(self)):
             return False
+        return self._packed == other._packed
 
-        return all(
-            getattr(self, field) == getattr(other, field)
-             for field in asdict(self)
-        )
+    def __hash__(self):
+        return hash(self._packed)
 
     def can_pay(self, other)->bool:
         """
-        Returns whether `self` can pay the cost `other` 
+        Returns whether `self` can pay the cost `other`
         """
-        gold_available = self.gold
-        for field in COLORS:
-            self_color = getattr(self, field)
-            other_color = getattr(other, field)
-            if self_color >= other_color:
-                continue
-            # else
-            other_color -= self_color
-            if gold_available > other_color:
-                gold_available -= other_color
-                continue
-            # else
-            return False
+        packed = self._packed
+        return _can_pay(packed | COLOR_GUARDS, _lane(packed, 'gold'), _mana_value(packed), other._packed)
 
-        return self.mana_value >= other.mana_value        
+    def can_pay_many(self, costs: Iterable['Mana']) -> List[bool]:
+        """
+        :can_pay(): for each of :costs:, e.g. the cost of every card in hand
+        """
+        packed = self._packed
+        guarded, gold, value = packed | COLOR_GUARDS, _lane(packed, 'gold'), _mana_value(packed)
+        return [_can_pay(guarded, gold, value, cost._packed) for cost in costs]
 
     def copy(self):
-        return Mana(**asdict(self))
-    
+        new = object.__new__(Mana)
+        new._packed = self._packed
+        return new
+
+
+def _can_pay(guarded: int, gold: int, value: int, cost: int) -> bool:
+    """
+    Whether a pool can pay :cost:, given the pool with COLOR_GUARDS set (:guarded:),
+    its gold mana and its mana value
+    """
+    # each COLORS lane of `difference` is (pool - cost + the guard bit), so the
+    # guard bit is clear exactly where the pool is short of that color
+    difference = guarded - (cost & COLOR_LANES)
+    if difference & COLOR_GUARDS != COLOR_GUARDS:
+        # gold mana pays for what's missing, and must be left over afterwards
+        missing = 0
+        for field in COLORS:
+            lane = (difference >> SHIFTS[field]) & LANE_MASK
+            if lane < 1 << (LANE_BITS - 1):
+                missing += (1 << (LANE_BITS - 1)) - lane
+        if gold <= missing:
+            return False
+    return value >= _mana_value(cost)
@@ -0,0 +1,226 @@
+"""
+Find the ways to pay a mana cost with the mana abilities of the permanents
+a player controls.
+
+Activating mana abilities one at a time makes a search branch on every
+order they can be activated in, though only the set of abilities used
+matters. :payments(): lists each set that can pay a cost once, leaving out
+sets that are no better than another one, so that a search can take
+"activate these abilities, then cast this spell" as a single step (see
+:actions.PayWith:).
+"""
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+from mtg_ai import actions, zones
+from mtg_ai.game import GameState, Action, Player, And, object_key
+from mtg_ai.mana import Mana, FIELDS, LANE_BITS, BIAS
+
+if TYPE_CHECKING:
+    from mtg_ai.cards import Card
+
+#: the mana abilities to activate, with the choice to activate each of them with, in order
+Payment = Tuple[Tuple['actions.ActivatedAbility', Dict[str, Any]], ...]
+
+
+class Activation(NamedTuple):
+    """
+    One way to activate a mana ability
+    """
+    ability: 'actions.ActivatedAbility'
+    choice: Dict[str, Any]
+    source: 'Card'                  #: the card with the ability
+    taps: FrozenSet[int]            #: uids of the cards the ability taps
+    mana: Mana                      #: the mana it adds
+
+
+def is_mana_ability(ability: Action) -> bool:
+    """
+    Whether :ability: adds mana at the cost of tapping cards (and, perhaps,
+    putting counters on them), which are the abilities :payments(): understands
+    """
+    return (isinstance(ability, actions.ActivatedAbility)
+            and isinstance(ability.effect, actions.AddMana)
+            and _taps_only(ability.cost))
+
+
+def _taps_only(cost: Action) -> bool:
+    if isinstance(cost, And):
+        return all(_taps_only(action) for action in cost.actions)
+    return isinstance(cost, (actions.TapSymbol, actions.Tap, actions.AddCounter))
+
+
+def _tapped(game_state: GameState, cost: Action, choice: Dict[str, Any]) -> FrozenSet[int]:
+    """
+    The uids of the cards that paying :cost: with :choice: taps
+    """
+    if isinstance(cost, And):
+        return frozenset().union(*(_tapped(game_state, action, ch)
+                                   for action, ch in zip(cost.actions, choice['choices'])))
+    if isinstance(cost, actions.TapSymbol):
+        return frozenset((game_state.get(cost.card).uid,))
+    if isinstance(cost, actions.Tap):
+        return frozenset((choice['card'].uid,))
+    return frozenset()
+
+
+def mana_cost(action: Action, game_state: GameState) -> Optional[Mana]:
+    """
+    The mana that has to be paid to take :action:, or None if it doesn't cost mana
+    """
+    if isinstance(action, actions.CastSpell):
+        return game_state.get(action.card).attrs.cost
+    if isinstance(action, actions.ActivatedAbility):
+        return mana_cost(action.cost, game_state)
+    if isinstance(action, actions.PayMana):
+        return action.mana(game_state)
+    if isinstance(action, And):
+        costs = [cost for cost in (mana_cost(part, game_state) for part in action.actions) if cost is not None]
+        if costs:
+            total = Mana()
+            for cost in costs:
+                total += cost
+            return total
+    return None
+
+
+def activations(game_state: GameState, player: Player) -> List[Activation]:
+    """
+    Every way :player: can activate a mana ability right now
+    """
+    result = []
+    for card in game_state.in_zone(zones.Field(player)):
+        for ability in card.attrs.activated:
+            if not is_mana_ability(ability):
+                continue
+            for choice in ability.get_choices(game_state):
+                result.append(Activation(ability, choice, card,
+                                         _tapped(game_state, ability.cost, choice['costs_choice']),
+                                         ability.effect.mana(game_state)))
+    return result
+
+
+#: (cost, pool, shape of the available activations) -> indices of the activations in each payment
+_PAYMENTS: Dict[tuple, List[Tuple[int, ...]]] = {}
+
+
+def payments(game_state: GameState, cost: Mana, player: Optional[Player] = None) -> List[Payment]:
+    """
+    The distinct ways for :player: (by default, the active player) to pay
+    :cost: with the mana pool and their mana abilities.
+
+    Each payment is a set of mana abilities that, together with the pool,
+    pays :cost:, and which has no other payment that taps only some of the
+    same cards and leaves at least as much mana over. Payments that only
+    differ by which of two identical cards they tap are listed once. If the
+    pool can pay :cost: by itself, the only payment is the empty one; if
+    :cost: can't be paid, there are none.
+
+    Results are memoized on the cost, the pool and the untapped mana sources,
+    up to swapping identical cards, so the search for payments only runs
+    once for each combination of them.
+    """
+    if player is None:
+        player = game_state.players[game_state.active_player]
+    pool = game_state.mana_pool
+    if pool.can_pay(cost):
+        return [()]
+
+    found = activations(game_state, player)
+    # number the cards the abilities tap in a canonical order, so that states
+    # that only differ by swapping identical cards get the same key
+    cards = {uid for activation in found for uid in activation.taps}
+    cards.update(activation.source.uid for activation in found)
+    signature = {uid: _card_signature(game_state, uid) for uid in cards}
+    rank = {uid: i for i, uid in enumerate(sorted(cards, key=signature.__getitem__))}
+    shapes = [(rank[a.source.uid], a.source.attrs.activated.index(a.ability),
+               tuple(sorted(rank[uid] for uid in a.taps)), a.mana.as_tuple()) for a in found]
+    order = sorted(range(len(found)), key=shapes.__getitem__)
+    found = [found[i] for i in order]
+    shapes = [shapes[i] for i in order]
+
+    key = (cost.as_tuple(), pool.as_tuple(), tuple(shapes))
+    try:
+        chosen = _PAYMENTS[key]
+    except KeyError:
+        chosen = _PAYMENTS[key] = _solve(cost, pool, [
+            (a.taps, a.mana, (signature[a.source.uid], shape[1], tuple(sorted(signature[uid] for uid in a.taps))))
+            for a, shape in zip(found, shapes)])
+    return [tuple((found[i].ability, found[i].choice) for i in indices) for indices in chosen]
+
+
+def _card_signature(game_state: GameState, uid: int) -> tuple:
+    card = game_state.objects[uid]
+    return object_key(card) + (card in game_state.summoning_sick,)
+
+
+def _solve(cost: Mana, pool: Mana,
+           options: List[Tuple[FrozenSet[int], Mana, tuple]]) -> List[Tuple[int, ...]]:
+    """
+    The indices into :options: of each payment of :cost: (see :payments():).
+
+    Each option is the set of cards an activation taps, the mana it adds and
+    a description of it that is the same for activations of identical cards.
+
+    Swapping identical cards turns one payment into another that's listed
+    once, so the search takes options in order of their descriptions and
+    only tries the first of the options with the same description that it
+    can still activate at each step, and payments are compared by the kinds
+    of cards they tap rather than by the cards.
+    """
+    #: description of a payment -> (its options, the kinds of cards it taps, the mana left over)
+    candidates = {}
+
+    def total(chosen) -> Mana:
+        mana = pool.copy()
+        for i in chosen:
+            mana += options[i][1]
+        return mana
+
+    def search(start: int, chosen: List[int], tapped: FrozenSet[int], mana: Mana):
+        if mana.can_pay(cost):
+            # a set that still pays without one of its abilities isn't worth activating
+            if not any(total(chosen[:i] + chosen[i + 1:]).can_pay(cost) for i in range(len(chosen) - 1)):
+                description = tuple(sorted(options[i][2] for i in chosen))
+                if description not in candidates:
+                    kinds = Counter(kind for i in chosen for kind in options[i][2][2])
+                    candidates[description] = (tuple(sorted(chosen)), kinds, (mana - cost).as_tuple())
+            return
+        if len(chosen) > limit:
+            # paying takes one ability per mana of the cost, and one more for
+            # gold mana over what it stands in for: the others aren't needed
+            return
+        tried = set()
+        for position in range(start, len(order)):
+            i = order[position]
+            taps, added, description = options[i]
+            if taps & tapped or description in tried:
+                continue
+            tried.add(description)
+            chosen.append(i)
+            search(position + 1, chosen, tapped | taps, mana + added)
+            chosen.pop()
+
+    order = sorted(range(len(options)), key=lambda i: options[i][2])
+    limit = cost.mana_value
+    search(0, [], frozenset(), pool)
+
+    # leave out payments that tap more cards than another one for no more mana.
+    # Each payment is packed into one int like a Mana, with a lane for each
+    # kind of card it taps and one for each kind of mana it doesn't leave
+    # over, so another one is no worse when subtracting it borrows from no lane
+    shifts = {kind: i * LANE_BITS for i, kind in enumerate(
+        dict.fromkeys(kind for _, kinds, _ in candidates.values() for kind in kinds))}
+    offset = len(shifts) * LANE_BITS
+    guards = sum(1 << (LANE_BITS - 1) << (i * LANE_BITS) for i in range(len(shifts) + len(FIELDS)))
+    packed = []
+    for chosen, kinds, left in candidates.values():
+        lanes = sum(count << shifts[kind] for kind, count in kinds.items())
+        lanes += sum((BIAS - value) << (offset + i * LANE_BITS) for i, value in enumerate(left))
+        packed.append((kinds.total(), lanes, chosen))
+    kept = []
+    # a payment that's left out is also worse than one that's kept, which taps fewer cards
+    for count, lanes, chosen in sorted(packed):
+        if not any(other_count < count and ((lanes | guards) - other) & guards == guards
+                   for other_count, other, _ in kept):
+            kept.append((count, lanes, chosen))
+    return sorted(chosen for _, _, chosen in kept)
@@ -1,13 +1,22 @@
 from mtg_ai.actions import Search
+import functools
 import math
+import multiprocessing
+import os
 import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from tqdm import trange
 from collections.abc import Iterable
 import collections
 from dataclasses import dataclass,field
+from hashlib import blake2b
+from queue import Empty
 from typing import List, Any, Self, Dict, Callable, Tuple, Optional, TypeVar
-from mtg_ai import actions, decklist, getters, zones
-from mtg_ai.game import GameState, Action, canonical_key
+from mtg_ai import actions, decklist, frontier, getters, zones, choices as lazy
+from mtg_ai.game import GameState, GameObject, Action, HashKind, canonical_key, state_key, visible_key
 import logging
 
 logger = logging.getLogger(__name__, )
@@ -18,29 +27,111 @@ class MCTSInfo:
     visits: int = 0
 
 
+class StateCache:
+    """
+    Keeps the game states of at most :max_states: :HistoryNode:s, dropping
+    the least recently used ones; a node whose state was dropped computes it
+    again from its nearest ancestor that still has one.
+    """
+
+    def __init__(self, max_states: int):
+        self.max_states = max_states
+        self.nodes: collections.OrderedDict[int, 'HistoryNode'] = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def touch(self, node: 'HistoryNode'):
+        """
+        Record that :node:'s state was just used, dropping the coldest state if
+        there are too many
+        """
+        key = id(node)
+        with self.lock:
+            if key in self.nodes:
+                self.nodes.move_to_end(key)
+                return
+            self.nodes[key] = node
+            if len(self.nodes) > self.max_states:
+                _, cold = self.nodes.popitem(last=False)
+                cold._game_state = None
+
+    def forget(self, node: 'HistoryNode'):
+        """
+        Stop keeping track of :node:, keeping its state if it has one
+        """
+        with self.lock:
+            self.nodes.pop(id(node), None)
+
+    def __len__(self):
+        return len(self.nodes)
+
+
 @dataclass(slots=True)
 class HistoryNode:
-    game_state: GameState
+    """
+    A node in a search tree: a game state, and the action and choice that
+    led to it from its parent's state.
+
+    Children made by :expand(): only compute their game state the first time
+    it's asked for (see :game_state:).
+
+    A chance node is reached by a move whose result depends on the order of
+    the library, such as drawing a card; its children are the outcomes of
+    that move rather than moves, each with the :weight: of its outcome (see
+    :MCTSSearcher.resolve_chance():). Outcomes have no action to compute
+    their state from, so they always keep it.
+    """
+    _game_state: GameState | None
     parent: Optional['HistoryNode'] = None
     action: Action | None = None
     choice: Any | None = None
-    stats: MCTSInfo | None = None
+    stats: MCTSInfo | None = None   #: shared by every node for an equivalent state (see :MCTSSearcher:)
     children: List['HistoryNode'] = field(default_factory=list)
+    cache: StateCache | None = None
+    visits: int = 0                 #: how many times the search went through this node, by any path to its state or not
+    chance: bool | None = None      #: whether this is a chance node; None until the search finds out
+    weight: float = 1.0             #: for an outcome of a chance node, its probability
+    pending: List[Tuple[Action, Any]] | None = None    #: with progressive widening, the moves not made children yet, best last
+    proven: float | None = None     #: this node's exact value, once the search has proved it: 0 for a loss, 1/turn for a win
 
+    @property
+    def game_state(self) -> GameState:
+        """
+        The state this node stands for, computed by taking :self.action: with
+        :self.choice: in the parent's state if this node doesn't have it
+        """
+        state = self._game_state
+        if state is None:
+            # replay the moves from the nearest ancestor whose state is known
+            path = []
+            node = self
+            while node._game_state is None:
+                path.append(node)
+                node = node.parent
+            state = node._game_state
+            for node in reversed(path):
+                state = node._game_state = state.take_action(node.action, node.choice)
+                if node.cache is not None:
+                    node.cache.touch(node)
+        elif self.cache is not None and self.parent is not None and self.action is not None:
+            self.cache.touch(self)
+        return state
 
-    def expand(self) -> List['HistoryNode']:
+    @property
+    def materialized(self) -> bool:
+        """
+        Whether this node's game state is currently stored
+        """
+        return self._game_state is not None
+
+    def expand(self, payments: bool = False) -> List['HistoryNode']:
         """
         Produce a list of children of the current game state, labelled by the action taken 
         and the choices made for that action. 
+        With :payments:, the moves are those of :legal_moves(): with :payments:.
         """
         if len(self.children) == 0:
-            state = self.game_state
-            possible = actions.possible_actions(state) or [END_TURN]
-            choices = [
-                (action,choice) for action in possible for choice in action.choices(state)]
-            children = [state.take_action(action,choice) for (action,choice) in choices]
-            self.children = [HistoryNode(child,self, action, choice)
-                for (child,(action,choice)) in zip(children, choices)
+            self.children = [HistoryNode(None, self, action, choice, cache=self.cache)
+                for (action, choice) in legal_moves(self.game_state, payments)
             ]
         return self.children
 
@@ -60,6 +151,76 @@ class SearchResult:
     n_iters: int
 
 
+@dataclass
+class ProofResult:
+    """
+    What :dfpn(): found: whether :condition: can be met in time (None if
+    the search ran out of budget first), and if it can, the last node of a
+    line of moves that meets it
+    """
+    win: bool | None
+    final_state: HistoryNode | None
+    n_iters: int    #: states expanded
+    n_nodes: int    #: states in the transposition table
+
+
+def memory_in_use() -> int:
+    """
+    Bytes of memory in use: those traced by :tracemalloc: if it's running,
+    otherwise the process's resident set size
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # no /proc (e.g. macOS): the peak resident set size, in bytes there
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@dataclass
+class Budget:
+    """
+    Limits on one MCTS search, which stops as soon as any of them runs out.
+    A limit of None doesn't apply, but at least one has to.
+    """
+    iterations: int | None = None
+    deadline: float | None = None   #: a :time.monotonic(): time to stop by
+    max_nodes: int | None = None    #: nodes in the search tree
+    max_bytes: int | None = None    #: memory the search may take up, as measured by :memory_in_use():
+    started: float = field(default_factory=time.monotonic)
+    base_bytes: int = 0
+
+    def __post_init__(self):
+        if (self.iterations, self.deadline, self.max_nodes, self.max_bytes) == (None, None, None, None):
+            raise ValueError("a search needs at least one limit")
+        if self.max_bytes is not None:
+            self.base_bytes = memory_in_use()
+
+    def exhausted(self, nodes: int, iterations: int | None = None) -> bool:
+        """
+        Whether the search should stop, with :nodes: nodes in its tree after
+        :iterations: iterations (None to ignore the limit on iterations)
+        """
+        return ((iterations is not None and self.iterations is not None and iterations >= self.iterations)
+                or (self.deadline is not None and time.monotonic() >= self.deadline)
+                or (self.max_nodes is not None and nodes >= self.max_nodes)
+                or (self.max_bytes is not None and memory_in_use() - self.base_bytes >= self.max_bytes))
+
+
+@dataclass
+class SearchProgress:
+    """
+    What a search has found so far, as reported to a progress callback
+    """
+    iterations: int
+    elapsed: float
+    best: HistoryNode                   #: the move :MCTSSearcher.choose(): would pick now
+    visits: List[Tuple[HistoryNode, int]]   #: each move from the root, and the visits through it
+
+
 def staff_victory(game: GameState) -> bool:
     field = game.in_zone(zones.Field())
     staff = [card for card in field if card.attrs.name == "Staff of Domination"]
@@ -77,53 +238,508 @@ def staff_victory(game: GameState) -> bool:
     walls = [card for card in field if 'wall' in card.attrs.subtypes]
     return len(walls) >= 5
 
+#: shared by every search, and by every thread of a :ThreadedMCTSSearcher:; it
+#: has no targets, so taking it never binds anything to it
 END_TURN = actions.EndTurn() + actions.Draw(getters.ActivePlayer())
 
+def move_prior(action: Action, choice: Any) -> float:
+    """
+    A cheap guess at how good a move is, from the move alone, for ordering
+    the moves progressive widening makes children of a node (higher first):
+    a search that finds more cards comes before one that finds fewer, and
+    ending the turn comes last
+    """
+    if action is END_TURN:
+        return -1
+    found = 0
+    items = [choice]
+    while items:
+        item = items.pop()
+        if isinstance(item, dict):
+            found += len(item.get('found', ()))
+            items.extend(value for key, value in item.items() if key != 'found')
+        elif isinstance(item, (list, tuple)):
+            items.extend(item)
+    return found
+
+def legal_moves(gs: GameState, payments: bool = False) -> List[Tuple[Action, Any]]:
+    """
+    :actions.legal_moves():, or ending the turn if there's nothing else to do.
+    With :payments:, mana is only spent through pay-then-act macro-actions
+    (see :actions.PayWith:).
+    """
+    return actions.legal_moves(gs, payments) or [(END_TURN, choice) for choice in END_TURN.choices(gs)]
+
+def actions_with_choices(gs: GameState, payments: bool = False) -> List[Tuple[Action, Any]]:
+    """
+    :actions.actions_with_choices():, or ending the turn if there's nothing else to do
+    """
+    return actions.actions_with_choices(gs, payments) or [(END_TURN, END_TURN.get_choices(gs))]
+
+def determinizations(gs: GameState, n: int, fixed: frozenset = frozenset(),
+                     hash_kind: HashKind = HashKind.VISIBLE) -> List[GameState]:
+    """
+    :n: copies of :gs:, each with the cards in each library shuffled, except
+    for those whose uids are in :fixed:, which keep their places. The copies
+    have :hash_kind:, and so do the states reached from them.
+    """
+    libraries = collections.defaultdict(list)
+    for card in gs.in_zone(zones.Deck()):
+        if card.uid not in fixed:
+            libraries[card.zone.owner].append(card)
+    samples = []
+    for _ in range(n):
+        sample = gs.copy()
+        sample.hash_kind = hash_kind
+        for owner, cards in libraries.items():
+            positions = [card.zone.position for card in cards]
+            random.shuffle(positions)
+            for card, position in zip(cards, positions):
+                if position != card.zone.position:
+                    sample.get(card).zone = zones.Deck(owner, position)
+        samples.append(sample)
+    return samples
+
+def revealed(moves: List[Tuple[Action, Any]]) -> frozenset:
+    """
+    The uids of the library cards that the choices of :moves: show, such as
+    the cards a search is looking through
+    """
+    uids = set()
+    items = [choice for _, choice in moves]
+    while items:
+        item = items.pop()
+        if isinstance(item, dict):
+            items.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            items.extend(item)
+        elif isinstance(item, GameObject) and isinstance(item.zone, zones.Deck):
+            uids.add(item.uid)
+    return frozenset(uids)
+
+def _revealed_names(gs: GameState) -> tuple:
+    return tuple(sorted(type(gs.objects[uid]).__name__ for uid in revealed(legal_moves(gs))))
+
 def advance(gs: GameState) -> GameState:
-    possible = actions.possible_actions(gs)
-    possible_choices = [(a,c) for a in possible for c in a.choices(gs) ]
+    possible_choices = actions.legal_moves(gs)
     while len(possible_choices) == 1:
         gs = gs.take_action(possible_choices[0][0], possible_choices[0][1])
-        possible = actions.possible_actions(gs)
-        possible_choices = [(a,c) for a in possible for c in a.choices(gs) ]
+        possible_choices = actions.legal_moves(gs)
     return gs
 
-def bfs(initial: GameState, condition, timeout=int(1e6)) -> SearchResult:    
-    root = HistoryNode(initial)
-    queue = collections.deque([root])
-    seen = {initial}
-    action = None
-    choice = None
+def _advance_and_list(gs: GameState) -> Tuple[GameState, List[Tuple[Action, Any]]]:
+    gs = advance(gs)
+    return gs, legal_moves(gs)
+
+
+def _history(path) -> HistoryNode:
+    node = None
+    for move, state in path:
+        action, choice = move or (None, None)
+        node = HistoryNode(state, node, action, choice)
+    return node
+
+
+def _found(replayer: frontier.Replayer, index: int, move: int) -> HistoryNode:
+    """
+    The node for the state a breadth-first search was looking for: node
+    :index:'s state after its forced moves if :move: is -1, or the state
+    its move :move: leads to. It and its ancestors have their states.
+    """
+    state, moves = replayer.expansion(index)
+    path = replayer.path(index)
+    if move == -1:
+        path[-1] = (path[-1][0], state)
+    else:
+        path.append((moves[move], state.take_action(*moves[move])))
+    return _history(path)
+
+
+def _bfs_result(replayer: frontier.Replayer, final: HistoryNode | None, next_node: int, i: int) -> SearchResult:
+    remaining = frontier.Pending(replayer.table, next_node, lambda index: _history(replayer.path(index)))
+    return SearchResult(final, remaining, i)
+
+
+def bfs(initial: GameState, condition, timeout=int(1e6), deadline: float | None = None,
+        key: Callable[[GameState], Any] = GameState.zobrist_hash, max_in_memory: int = 1 << 22) -> SearchResult:
+    """
+    Breadth-first search for a state that meets :condition:, expanding at
+    most :timeout: states and giving up at :deadline: (a :time.monotonic():
+    time).
+
+    States are only stored while they're being expanded: the queue is a
+    :frontier.NodeTable:, which moves to a memory-mapped file after
+    :max_in_memory: nodes, and states are rebuilt by replaying moves from
+    :initial:. States whose :key: has been seen already aren't queued; the
+    default, a 64-bit :GameState.zobrist_hash:, may rarely mistake a new state
+    for a seen one, which :canonical_key: never does, at more memory per state.
+
+    The final state's :HistoryNode: and its ancestors have their states;
+    the remaining nodes are rebuilt as they're looked at.
+    """
+    nodes = frontier.NodeTable(max_in_memory)
+    nodes.append(frontier.ROOT, frontier.ROOT)
+    replayer = frontier.Replayer(initial, nodes, _advance_and_list)
+    seen = {key(initial)}
+
+    next_node = 0
     for i in range(timeout):
-        next_node  = queue.popleft()
-        next_state = advance(next_node.game_state)
+        if (deadline is not None and time.monotonic() >= deadline) or next_node == len(nodes):
+            return _bfs_result(replayer, None, next_node, i)
+        index = next_node
+        next_node += 1
+        next_state, moves = replayer.expansion(index)
         if condition(next_state):
-            node = HistoryNode(next_state,next_node,action,choice)
-            return SearchResult(node,queue,i)
-        possible = actions.possible_actions(next_state) or [END_TURN]
-        for action in possible:
-            choices = action.choices(next_state)
-            for choice in choices:
-                child = next_state.take_action(action, choice)
-                node = HistoryNode(child,next_node,action, choice)
-                if condition(child):
-                    return SearchResult(node,queue,i)
-                elif child not in seen:
-                    queue.append(node)
-                seen.add(child)
+            return _bfs_result(replayer, _found(replayer, index, -1), next_node, i)
+        for move, (action, choice) in enumerate(moves):
+            child = next_state.take_action(action, choice)
+            if condition(child):
+                return _bfs_result(replayer, _found(replayer, index, move), next_node, i)
+            child_key = key(child)
+            if child_key not in seen:
+                seen.add(child_key)
+                nodes.append(index, move)
     else:
-        return SearchResult(None, queue,i)
+        return _bfs_result(replayer, None, next_node, i)
+
+
+def _partition(key: Any, n: int) -> int:
+    """
+    Which of :n: :parallel_bfs: workers owns states with :key:, the same in every process
+    """
+    if not isinstance(key, int):
+        key = int.from_bytes(blake2b(repr(key).encode(), digest_size=8).digest(), 'little')
+    return key % n
+
+
+def _bfs_worker(me: int, initial: GameState, condition, key, inboxes: list, commands, results, batch_size: int):
+    """
+    One :parallel_bfs: worker: owns the states whose keys :_partition: gives
+    it, and the part of the seen set for them.
+
+    A node is its order in its level of the search, and its path, the moves
+    that lead to it (see :frontier.PathReplayer:). For each level, the
+    coordinator asks each worker to 'expand' its nodes, which sends their
+    children to their owners' :inboxes:, and then to 'collect' the children
+    sent to it, keeping the first of each new state in the search's order.
+    """
+    n = len(inboxes)
+    replayer = frontier.PathReplayer(initial, _advance_and_list)
+    seen = set()
+    level = []
+    accepted = []
+    root_key = key(initial)
+    if _partition(root_key, n) == me:
+        seen.add(root_key)
+        level = [(0, ())]
+    for inbox in inboxes:
+        # the coordinator may stop the search before every child is collected
+        inbox.cancel_join_thread()
+    while True:
+        command, *args = commands.get()
+        if command == 'stop':
+            return
+        if command == 'expand':
+            limit, ranks = args
+            if ranks is not None:
+                level = [(rank, path) for rank, (_, path) in zip(ranks, accepted)]
+            outboxes = [[] for _ in range(n)]
+            goal = None
+            for ordinal, path in level:
+                if ordinal >= limit:
+                    break
+                state, moves = replayer.expansion(path)
+                if condition(state):
+                    goal = (ordinal, -1)
+                    break
+                for move, (action, choice) in enumerate(moves):
+                    child = state.take_action(action, choice)
+                    if condition(child):
+                        goal = (ordinal, move)
+                        break
+                    child_key = key(child)
+                    owner = _partition(child_key, n)
+                    outboxes[owner].append((child_key, (ordinal, move), path + (move,)))
+                    if len(outboxes[owner]) >= batch_size:
+                        inboxes[owner].put(outboxes[owner])
+                        outboxes[owner] = []
+                if goal is not None:
+                    break
+            for owner, outbox in enumerate(outboxes):
+                if outbox:
+                    inboxes[owner].put(outbox)
+                inboxes[owner].put(None)
+            results.put((me, goal))
+        elif command == 'collect':
+            cutoff, = args
+            first = {}
+            finished = 0
+            while finished < n:
+                batch = inboxes[me].get()
+                if batch is None:
+                    finished += 1
+                    continue
+                for child_key, order, path in batch:
+                    if (cutoff is None or order < cutoff) and child_key not in seen:
+                        if child_key not in first or order < first[child_key][0]:
+                            first[child_key] = (order, path)
+            seen.update(first)
+            accepted = sorted(first.values())
+            results.put((me, [order for order, _ in accepted]))
+
+
+def parallel_bfs(initial: GameState, condition, timeout=int(1e6), deadline: float | None = None,
+                 key: Callable[[GameState], Any] = GameState.zobrist_hash, workers: int | None = None,
+                 max_in_memory: int = 1 << 22, batch_size: int = 256) -> SearchResult:
+    """
+    :bfs(): split between :workers: processes, which find the same result.
+
+    The states are partitioned between the workers by :key:, and each
+    worker keeps the seen set for its part. The search goes one level (one
+    move deeper) at a time: every worker expands its nodes of the level and
+    sends each child, in batches, to the worker that owns it, which keeps
+    the first of each new state in the order :bfs: would have found them.
+    Only this process keeps the whole search, as a :frontier.NodeTable:.
+
+    Workers are started with the 'spawn' method, so :condition: and :key:
+    have to be picklable, e.g. module-level functions. :deadline: is only
+    checked between levels.
+    """
+    workers = workers or os.cpu_count()
+    context = multiprocessing.get_context('spawn')
+    inboxes = [context.Queue() for _ in range(workers)]
+    commands = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    processes = [context.Process(target=_bfs_worker, daemon=True,
+                                 args=(me, initial, condition, key, inboxes, commands[me], results, batch_size))
+                 for me in range(workers)]
+    for process in processes:
+        process.start()
+
+    def gather() -> list:
+        replies = [None] * workers
+        for _ in range(workers):
+            while True:
+                try:
+                    me, reply = results.get(timeout=1)
+                    break
+                except Empty:
+                    if not all(process.is_alive() for process in processes):
+                        raise RuntimeError("a parallel_bfs worker stopped")
+            replies[me] = reply
+        return replies
+
+    nodes = frontier.NodeTable(max_in_memory)
+    nodes.append(frontier.ROOT, frontier.ROOT)
+    replayer = frontier.Replayer(initial, nodes, _advance_and_list)
+    # the level's nodes are offset, offset + 1, ..., offset + size - 1
+    offset, size = 0, 1
+    ranks = [None] * workers
+    try:
+        while True:
+            if offset >= timeout:
+                return _bfs_result(replayer, None, timeout, timeout - 1)
+            if size == 0 or (deadline is not None and time.monotonic() >= deadline):
+                return _bfs_result(replayer, None, offset, offset)
+            limit = min(size, timeout - offset)
+            for command, worker_ranks in zip(commands, ranks):
+                command.put(('expand', limit, worker_ranks))
+            goal = min((goal for goal in gather() if goal is not None), default=None)
+            for command in commands:
+                command.put(('collect', goal))
+            found = gather()
+            # number the new nodes in the order bfs would have found them
+            ordered = sorted((order, me, i) for me, orders in enumerate(found) for i, order in enumerate(orders))
+            ranks = [[None] * len(orders) for orders in found]
+            for rank, ((parent, move), me, i) in enumerate(ordered):
+                nodes.append(offset + parent, move)
+                ranks[me][i] = rank
+            if goal is not None:
+                index = offset + goal[0]
+                return _bfs_result(replayer, _found(replayer, index, goal[1]), index + 1, index)
+            if limit < size:
+                return _bfs_result(replayer, None, timeout, timeout - 1)
+            offset, size = offset + size, len(ordered)
+    finally:
+        for command in commands:
+            command.put(('stop',))
+        for process in processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+
+
+_INFINITE = 1 << 62     #: a proof or disproof number that can't be met
+
+
+def _proof_key(gs: GameState, key: Callable[[GameState], Any]) -> Any:
+    # the key leaves out the triggers waiting to go on the stack, which change the moves a state has
+    return key(gs), tuple(str(trigger.action) for _, trigger in gs.triggers)
+
+
+def dfpn(initial: GameState, condition, max_turns: int, max_nodes: int | None = None,
+         deadline: float | None = None, key: Callable[[GameState], Any] = GameState.zobrist_hash) -> ProofResult:
+    """
+    Depth-first proof-number search for a line of moves from :initial: that
+    meets :condition: on or before turn :max_turns:, or a proof that there's
+    none.
+
+    Each state has a proof number, a lower bound on how many states have to
+    be solved to find a line from it, and a disproof number, the same for
+    showing there's none. A state that meets :condition: has a proof number
+    of 0, and one past :max_turns: a disproof number of 0. Taking an action
+    is deterministic, so a line exists from a state if one exists from any
+    of its moves: its proof number is the least of its children's, and its
+    disproof number their sum. The search goes down to the child with the
+    least proof number for as long as the numbers stay under thresholds
+    that say when a sibling has become a better place to look (Nagai's
+    df-pn), so only the states on its current path are kept; the numbers of
+    every state it has looked at are kept in a transposition table, by :key:.
+
+    Stops looking once the table has :max_nodes: states (give or take the
+    states on the current path) or at :deadline: (a :time.monotonic():
+    time), and then doesn't know. If a line was found, the result's
+    :final_state: is its last node, and it and its ancestors have their
+    states.
+    """
+    table: Dict[Any, Tuple[int, int]] = {}
+    on_path = set()
+    expanded = 0
+
+    def out_of_budget() -> bool:
+        return ((max_nodes is not None and len(table) >= max_nodes)
+                or (deadline is not None and time.monotonic() >= deadline))
+
+    def numbers(gs: GameState, gs_key: Any) -> Tuple[int, int]:
+        if gs_key in on_path:
+            # going around in a circle doesn't get any closer to winning
+            return _INFINITE, 0
+        if gs_key in table:
+            return table[gs_key]
+        if gs.turn_number > max_turns:
+            table[gs_key] = (_INFINITE, 0)
+        elif condition(gs):
+            table[gs_key] = (0, _INFINITE)
+        else:
+            return 1, 1
+        return table[gs_key]
+
+    def search(gs: GameState, gs_key: Any, proof_threshold: int, disproof_threshold: int):
+        nonlocal expanded
+        expanded += 1
+        on_path.add(gs_key)
+        children = []
+        for action, choice in legal_moves(gs):
+            child = gs.take_action(action, choice)
+            children.append((child, _proof_key(child, key)))
+        found = [numbers(child, child_key) for child, child_key in children]
+        while True:
+            # other paths may have changed the children's numbers since the last look
+            found = [table.get(child_key, numbers) for (_, child_key), numbers in zip(children, found)]
+            proof = min((proof for proof, _ in found), default=_INFINITE)
+            disproof = min(_INFINITE, sum(disproof for _, disproof in found))
+            if proof >= proof_threshold or disproof >= disproof_threshold or out_of_budget():
+                break
+            best = min(range(len(found)), key=lambda i: found[i][0])
+            second = min((proof for i, (proof, _) in enumerate(found) if i != best), default=_INFINITE)
+            child, child_key = children[best]
+            search(child, child_key, min(proof_threshold, second + 1),
+                   min(_INFINITE, disproof_threshold - disproof + found[best][1]))
+        on_path.discard(gs_key)
+        table[gs_key] = (proof, disproof)
+
+    root_key = _proof_key(initial, key)
+    proof, disproof = numbers(initial, root_key)
+    if proof and disproof:
+        search(initial, root_key, _INFINITE, _INFINITE)
+        proof, disproof = table[root_key]
+    if proof:
+        return ProofResult(None if disproof else False, None, expanded, len(table))
+
+    # follow proven moves until the condition is met
+    path = [(None, initial)]
+    gs = initial
+    while not condition(gs):
+        for action, choice in legal_moves(gs):
+            child = gs.take_action(action, choice)
+            if numbers(child, _proof_key(child, key))[0] == 0:
+                break
+        else:
+            raise AssertionError("a proven state has no proven move")
+        path.append(((action, choice), child))
+        gs = child
+    return ProofResult(True, _history(path), expanded, len(table))
 
 
 class MCTSSearcher:
-    def __init__(self, initial_state: GameState,statistics:Dict[GameState, MCTSInfo], condition: Callable[[GameState],bool],
-        C: float, max_turns: int = 10, n_iters: int=1000):
-        self.root = HistoryNode(initial_state)
+    """
+    Monte Carlo tree search for a line of play that reaches :condition:.
+
+    :statistics: is a transposition table: nodes whose states have the same
+    :canonical_key: (for instance, after tapping two identical lands in
+    either order) share one :MCTSInfo:, so a visit to one counts for all of
+    them. The table can be handed to the next searcher, so the statistics
+    carry over from one choice to the next. Pass None to give every node its
+    own statistics.
+
+    With :reuse:, one searcher plays a whole game: :choose(): moves the root
+    to the node it chose, keeping that node's subtree and dropping the rest,
+    and each search only runs enough iterations to bring the visits through
+    the root up to :n_iters:. Moves made some other way go through :advance():.
+
+    :n_iters: can be None if every :choose(): is given another limit.
+
+    With :chance_samples:, moves whose results depend on the order of the
+    library become chance nodes (see :resolve_chance():), whose outcomes are
+    estimated from that many shuffles of the library.
+
+    With :widening:, a pair (k, alpha), nodes are widened progressively: a
+    node visited n times has only its best floor(k * n ** alpha) moves (at
+    least one) as children, best according to :prior:, a function of a move's
+    action and choice (see :move_prior:). Its other moves are kept as they
+    are, without the game states they lead to, until it has been visited
+    enough to make them children too (see :expand():).
+
+    With :solver:, the search also proves values (MCTS-Solver): a node
+    where :condition: holds is a proven win, worth 1 / its turn, and one past
+    :max_turns: a proven loss, worth 0. A node whose
+    children prove its value (see :prove():) gets it too, up to the root;
+    proven nodes aren't explored again, and once the root is proven,
+    :choose(): returns without searching. So that the tree reaches the end of
+    the game, the solver visits every child of a node before selecting among
+    them, and plays out from the first node it visits on each iteration.
+
+    With :payments:, the tree doesn't activate mana abilities one at a time:
+    each move that costs mana is taken once for every distinct way to pay for
+    it (see :actions.legal_moves():), so the orders of the same abilities
+    don't branch the tree. Playouts still take one move at a time, as listing
+    every payment costs more than a random move does.
+    """
+    def __init__(self, initial_state: GameState,statistics:Optional[Dict[tuple, MCTSInfo]], condition: Callable[[GameState],bool],
+        C: float, max_turns: int = 10, n_iters: int | None = 1000, max_states: int | None = None, reuse: bool = False,
+        chance_samples: int | None = None, widening: Tuple[float, float] | None = None,
+        prior: Callable[[Action, Any], float] = move_prior, solver: bool = False, payments: bool = False):
+        """
+        :max_states: is the most game states to keep in the tree at once (see
+        :StateCache:), or None to keep every state that's been computed
+        """
+        cache = None if max_states is None else StateCache(max_states)
+        self.root = HistoryNode(initial_state, cache=cache)
         self.stats = statistics
+        self.root.stats = self.lookup(self.root)
         self.condition = condition
         self.C = C
         self.max_turns = max_turns
         self.n_iters = n_iters
+        self.reuse = reuse
+        self.n_nodes = 1    #: nodes in the tree under :self.root:
+        self.chance_samples = chance_samples
+        self.widening = widening
+        self.prior = prior
+        self.solver = solver
+        self.payments = payments
+        #: (visible key of a state, its moves, index of one of them) -> that move's outcomes, as (weight, state)
+        self.outcomes: Dict[tuple, List[Tuple[float, GameState]]] = {}
         
 
     def score(self, node: HistoryNode) -> float:
@@ -131,10 +747,170 @@ class MCTSSearcher:
         if info is None:
             return 0.0
 
-        value = info.value / info.visits
-        ucb = self.C * math.sqrt(math.log(node.parent.stats.visits) / info.visits)
+        # the value is that of the node's state, however it was reached, but
+        # only visits through this node make exploring it less urgent; a chance
+        # node's statistics are new and empty while its first visit is under way
+        value = info.value / info.visits if info.visits else 0.0
+        ucb = self.C * math.sqrt(math.log(node.parent.stats.visits) / node.visits)
         return value + ucb
 
+    def lookup(self, node: HistoryNode) -> MCTSInfo:
+        """
+        The statistics for :node:'s state, shared with every equivalent state
+        """
+        if self.stats is None:
+            return MCTSInfo()
+        return self.stats.setdefault(state_key(node.game_state), MCTSInfo())
+
+    def expand(self, node: HistoryNode) -> List[HistoryNode]:
+        """
+        :node.expand():, counting the nodes it adds to the tree.
+
+        With :self.widening:, the first call lists :node:'s moves, best last,
+        into :node.pending:, and each call makes as many of them children as
+        :node.visits: allows.
+        """
+        if self.widening is None:
+            if not node.children:
+                self.n_nodes += len(node.expand(self.payments))
+            return node.children
+        if node.pending is None and not node.children:
+            # sorted is stable, so moves the prior can't tell apart stay in order
+            node.pending = sorted(legal_moves(node.game_state, self.payments), key=lambda move: self.prior(*move), reverse=True)
+            node.pending.reverse()
+        k, alpha = self.widening
+        allowed = max(1, math.floor(k * node.visits ** alpha))
+        while len(node.children) < allowed and node.pending:
+            action, choice = node.pending.pop()
+            node.children.append(HistoryNode(None, node, action, choice, cache=node.cache))
+            self.n_nodes += 1
+        return node.children
+
+    def resolve_chance(self, node: HistoryNode) -> HistoryNode:
+        """
+        :node:, or if it's a chance node, one of its outcomes, picked at
+        random by weight.
+
+        Whether a node is a chance node is worked out the first time it's
+        resolved: it is if taking its move takes cards from the library, or
+        shows some of them, and its own move doesn't already name them (as a
+        fetch's does). Its outcomes are what the
+        move leads to in :self.chance_samples: shuffles of the library,
+        grouped by their :visible_key: and the names of the cards they show,
+        so drawing any of four identical Forests is one outcome with a weight
+        of about four in the size of the library. The outcomes of a move are
+        cached by the visible key of the state it's taken in, so they're only
+        sampled once.
+
+        Shuffling the library doesn't change a state (see :actions.Shuffle:);
+        since every move that reads the library is a chance node, it needn't.
+        """
+        if self.chance_samples is None or node.parent is None:
+            return node
+        if node.chance is None:
+            node.chance = self.is_chance(node)
+            if node.chance:
+                # the node stands for every outcome, so it doesn't share the statistics of its own
+                node.stats = MCTSInfo()
+                node.children = [HistoryNode(state, node, weight=weight)
+                                 for weight, state in self.sample_outcomes(node)]
+                self.n_nodes += len(node.children)
+        if not node.chance:
+            return node
+        # outcomes that have been proven have nothing more to show
+        outcomes = [outcome for outcome in node.children if outcome.proven is None] or node.children
+        return random.choices(outcomes, [outcome.weight for outcome in outcomes])[0]
+
+    def is_chance(self, node: HistoryNode) -> bool:
+        """
+        Whether :node:'s move depends on the order of the library (see :resolve_chance():)
+        """
+        parent = node.parent
+        # a move that names the library cards it takes (as a fetch's does) is
+        # one move for each outcome already, whatever its siblings do
+        if node.action is None or revealed([(node.action, node.choice)]):
+            return False
+        state = node.game_state
+        return (len(state.in_zone(zones.Deck())) != len(parent.game_state.in_zone(zones.Deck()))
+                or bool(revealed(legal_moves(state))))
+
+    def sample_outcomes(self, node: HistoryNode) -> List[Tuple[float, GameState]]:
+        """
+        The outcomes of :node:'s move, as (weight, state), from :self.outcomes: if they're there
+        """
+        parent = node.parent
+        index = next(i for i, child in enumerate(parent.children) if child is node)
+        # the key leaves out triggers waiting to go on the stack, so states
+        # with the same key can have different moves
+        key = (visible_key(parent.game_state), tuple(str(child.action) for child in parent.children), index)
+        if key in self.outcomes:
+            return self.outcomes[key]
+        groups: Dict[tuple, Tuple[int, GameState]] = {}
+        for sample in determinizations(parent.game_state, self.chance_samples, hash_kind=parent.game_state.hash_kind):
+            state = sample.take_action(node.action, node.choice)
+            group = (visible_key(state), _revealed_names(state))
+            count, representative = groups.get(group, (0, state))
+            groups[group] = (count + 1, representative)
+        outcomes = self.outcomes[key] = [(count / self.chance_samples, state) for count, state in groups.values()]
+        return outcomes
+
+    def prove(self, node: HistoryNode) -> bool:
+        """
+        Work out :node:'s value from its children's, if they prove it, and
+        return whether they did.
+
+        A chance node is proven once all of its outcomes are, and is worth
+        their weighted average. Any other node is proven by a child with a
+        proven value that none of its other moves could beat: a move can't win
+        before the turn it's made in, so an unproven child is worth at most
+        1 / its turn (or the node's turn, if the child's state hasn't been
+        computed, or the move isn't a child yet). So a node is proven by a
+        child that wins on the node's own turn, or once all of its children
+        are proven.
+        """
+        children = node.children
+        if not children:
+            return False
+        if node.chance:
+            if any(outcome.proven is None for outcome in children):
+                return False
+            node.proven = (sum(outcome.weight * outcome.proven for outcome in children)
+                           / sum(outcome.weight for outcome in children))
+            return True
+        best = max((child.proven for child in children if child.proven is not None), default=None)
+        if best is None:
+            return False
+        turn = node.game_state.turn_number
+        if node.pending and best < 1 / turn:
+            return False
+        for child in children:
+            if child.proven is None and best < 1 / (child.game_state.turn_number if child.materialized else turn):
+                return False
+        node.proven = best
+        return True
+
+    def propagate_proof(self, node: HistoryNode | None):
+        """
+        Prove :node: and then each of its ancestors, for as long as they can
+        be proven (see :prove():)
+        """
+        while node is not None and node.proven is None and self.prove(node):
+            node = node.parent
+
+    def unproven(self, node: HistoryNode) -> List[HistoryNode]:
+        """
+        :node:'s children that haven't been proven, making pending moves
+        children (see :expand():) if there aren't any
+        """
+        children = [child for child in self.expand(node) if child.proven is None]
+        while not children and node.pending:
+            action, choice = node.pending.pop()
+            child = HistoryNode(None, node, action, choice, cache=node.cache)
+            node.children.append(child)
+            self.n_nodes += 1
+            children = [child]
+        return children
+
     def playout(self, state: HistoryNode, max_turns: int) -> float:
         logger.debug("Random playout")
         current = state.game_state
@@ -142,9 +918,9 @@ class MCTSSearcher:
             if self.condition(current):
                 logger.debug(f"Found victory by turn {current.turn_number}")
                 return 1.0 / current.turn_number
-            possible = actions.possible_actions(current) or [END_TURN]
-            action = random.choice(possible)
-            choice = random.choice(action.choices(current))
+            # pick an action, then one of its choices, without listing the others
+            action, options = random.choice(actions_with_choices(current))
+            choice = lazy.sample(options)
             logger.debug(f"Taking {action} with choices {str(choice)}")
             current = current.take_action(action, choice).resolve_stack()
         # failed to find the desired game state soon enough; count this as a failure
@@ -152,60 +928,136 @@ class MCTSSearcher:
         return 0
 
     def backpropogate(self, state: HistoryNode | None, value: float):
+        updated = set()
         while state:
             if state.stats is None:
-                state.stats = MCTSInfo()
+                state.stats = self.lookup(state)
+            state.visits += 1
             info = state.stats
-            info.value += value
-            info.visits += 1
+            # two nodes on the path can share statistics; count the visit once
+            if id(info) not in updated:
+                updated.add(id(info))
+                info.value += value
+                info.visits += 1
             state = state.parent
 
+    def leaf_value(self, node: HistoryNode) -> float:
+        """
+        The value of :node:, proven if the game ends there, or else from a playout
+        """
+        state = node.game_state
+        if self.condition(state):
+            node.proven = 1.0 / state.turn_number
+        elif state.turn_number > self.max_turns:
+            node.proven = 0
+        else:
+            return self.playout(node, self.max_turns - state.turn_number)
+        return node.proven
+
     def explore_node(self, node: HistoryNode):
-        current = node
+        current = self.resolve_chance(node)
         while not self.condition(current.game_state):
             if current.game_state.turn_number > self.max_turns:
                 value = 0
+                if self.solver:
+                    current.proven = value
                 break
-            children = current.expand()
-            unexplored = [child for child in children if child.stats is not None]
-            if unexplored:
-                current = random.choice(children)
-                value = self.playout(current,self.max_turns - current.game_state.turn_number)
-                break
+            if self.solver:
+                # the solver needs the tree to reach the end of the game, so
+                # it plays out from unvisited nodes and selects among the rest
+                if current.visits == 0:
+                    value = self.leaf_value(current)
+                    break
+                children = self.unproven(current)
+                if not children:
+                    # all of its moves have been proven, so it is too
+                    self.prove(current)
+                    value = current.proven
+                    break
+                unvisited = [child for child in children if child.visits == 0]
+                if unvisited:
+                    current = self.resolve_chance(random.choice(unvisited))
+                    continue
             else:
-                scores = [self.score(child) for child in children]
-                def key(i_s):
-                    return i_s[1]
-                i,_ = max(enumerate(scores, ), key=key)
-                current = children[i]
+                children = self.expand(current)
+                unexplored = [child for child in children if child.stats is not None]
+                if unexplored:
+                    current = self.resolve_chance(random.choice(children))
+                    value = self.playout(current,self.max_turns - current.game_state.turn_number)
+                    break
+            scores = [self.score(child) for child in children]
+            def key(i_s):
+                return i_s[1]
+            i,_ = max(enumerate(scores, ), key=key)
+            current = self.resolve_chance(children[i])
         else:
             value = 1.0 / current.game_state.turn_number
+            if self.solver:
+                current.proven = value
         self.backpropogate(current, value)
+        if self.solver:
+            self.propagate_proof(current.parent)
         assert current.stats is not None
         assert node.stats is not None
+        return value
 
-    def explore(self) -> List[HistoryNode]:
+    def explore(self, budget: Budget | None = None, progress: Callable[[SearchProgress], None] | None = None,
+                progress_interval: float = 1.0) -> List[HistoryNode]:
         """
         Run an iteration of MCTS to compute the best next move.
+
+        Stops when :budget: runs out (by default, after :self.iterations():
+        iterations); if it runs out early, some children of the root may
+        not have been visited. :progress: is called with a :SearchProgress:
+        every :progress_interval: seconds.
         """
-        children = self.root.expand()
+        budget = budget or Budget(self.iterations())
+        children = self.expand(self.root)
         for i,child in enumerate(children):
-            updated = self.explore_node(child)
-        assert all(child.stats is not None for child in children)
+            if child.visits == 0 and not budget.exhausted(self.n_nodes) and self.root.proven is None:
+                updated = self.explore_node(child)
 
         def key(i_s):
             return i_s[1]
 
-        for _ in range(self.n_iters):
-            scores = [self.score(child) for child in children]
-            i,_ = max(enumerate(scores, ), key=key)
-            self.explore_node(children[i])
+        n_iters = 0
+        next_report = budget.started + progress_interval
+        while not budget.exhausted(self.n_nodes, n_iters) and self.root.proven is None:
+            # with progressive widening, the root gets new children as it's visited
+            children = self.unproven(self.root) if self.solver else self.expand(self.root)
+            unvisited = [child for child in children if child.visits == 0]
+            if unvisited:
+                self.explore_node(unvisited[0])
+            else:
+                scores = [self.score(child) for child in children]
+                i,_ = max(enumerate(scores, ), key=key)
+                self.explore_node(children[i])
+            n_iters += 1
+            if progress is not None and time.monotonic() >= next_report:
+                progress(self.progress(budget, n_iters, children))
+                next_report += progress_interval
 
-        assert all(child.stats is not None for child in children)
-        return children
+        return self.root.children
+
+    def progress(self, budget: Budget, iterations: int, children: List[HistoryNode]) -> SearchProgress:
+        visits = [(child, child.visits) for child in children]
+        return SearchProgress(iterations, time.monotonic() - budget.started, self.best_child(children), visits)
 
 
-    def choose(self) -> HistoryNode:
+    def iterations(self) -> int | None:
+        """
+        How many iterations :explore(): should run after its first visit to
+        each child of the root: :self.n_iters:, less the visits an earlier
+        search already made through the root if the tree is being reused
+        """
+        if self.n_iters is None:
+            return None
+        if self.reuse:
+            return max(0, self.n_iters - self.root.visits)
+        return self.n_iters
+
+    def choose(self, deadline: float | None = None, max_nodes: int | None = None, max_bytes: int | None = None,
+               progress: Callable[[SearchProgress], None] | None = None, progress_interval: float = 1.0) -> HistoryNode:
         """
         Choose the best move to take from self.root.
 
@@ -213,19 +1065,110 @@ class MCTSSearcher:
         simulations, then selects the child of :self.root: that has been 
         visited the most times. Exception: we always prefer not ending the turn
         to ending the turn.
+
+        The search stops early, with the best move found so far, at
+        :deadline: (a :time.monotonic(): time), once the tree has
+        :max_nodes: nodes, or once it has taken up :max_bytes: more memory;
+        see :Budget:. :progress: is called with a :SearchProgress: every
+        :progress_interval: seconds meanwhile.
+        """
+        budget = Budget(self.iterations(), deadline, max_nodes, max_bytes)
+        choice = self._choose(budget, progress, progress_interval)
+        if self.reuse:
+            self.reroot(choice)
+        return choice
+
+    def advance(self, action: Action, choice: Any) -> HistoryNode:
+        """
+        Move the root to the state after taking :action: with :choice:, keeping
+        what the search knows about it, and return the new root
+        """
+        for child in self.root.children:
+            if child.action is action and child.choice == choice:
+                return self.reroot(child)
+        # the move may have been found some other way, but still lead to a
+        # state the search has been to
+        state = self.root.game_state.take_action(action, choice)
+        key = canonical_key(state)
+        for child in self.root.children:
+            if type(child.action) is type(action) and canonical_key(child.game_state) == key:
+                child._game_state = state
+                return self.reroot(child)
+        return self.reroot(HistoryNode(state, self.root, action, choice, cache=self.root.cache))
+
+    def reroot(self, node: HistoryNode) -> HistoryNode:
         """
-        children = self.root.expand()
+        Make :node:, a child of the root, the new root, and drop the rest of
+        the tree so that it can be freed
+        """
+        # the new root has no ancestors to recompute its state from
+        node.game_state
+        siblings = [child for child in self.root.children if child is not node]
+        if node.chance:
+            # the root's children are its moves, not the outcomes of reaching it
+            siblings.extend(node.children)
+            node.children = []
+            node.chance = False
+        self.root.children = []
+        node.parent = None
+        if node.cache is not None:
+            node.cache.forget(node)
+            stack = siblings
+            while stack:
+                dropped = stack.pop()
+                node.cache.forget(dropped)
+                stack.extend(dropped.children)
+        if node.stats is None:
+            node.stats = self.lookup(node)
+        self.root = node
+        self.n_nodes = 0
+        stack = [node]
+        while stack:
+            kept = stack.pop()
+            self.n_nodes += 1
+            stack.extend(kept.children)
+        return node
+
+    def _choose(self, budget: Budget, progress, progress_interval: float) -> HistoryNode:
+        children = self.expand(self.root)
         logger.debug("children: %s", children)
-        if len(children) == 1:
+        if len(children) == 1 and not self.root.pending:
             return children[0]
-        new_children = self.explore()
+        if self.root.proven is not None:
+            return self.best_child(children)
+        new_children = self.explore(budget, progress, progress_interval)
         assert len(children) == len(new_children)
         assert new_children == children
-        nvisits = [(child,child.stats.visits) for child in new_children]
+        choice = self.best_child(new_children)
+        print(f"visited {choice.visits} times")
+        return choice
+
+    def best_child(self, children: List[HistoryNode]) -> HistoryNode:
+        """
+        The child visited the most times, of those that were visited at all.
+
+        Proven children come first: the best of them if the root is proven,
+        or a proven win if no unproven child has done better on average; and
+        proven losses come last.
+        """
+        proven = [child for child in children if child.proven is not None]
+        if proven:
+            best = max(proven, key=lambda child: child.proven)
+            unproven = [child for child in children if child.proven is None]
+            if self.root.proven is not None or (best.proven > 0 and all(
+                    child.stats is None or child.stats.value / child.stats.visits <= best.proven
+                    for child in unproven)):
+                return best
+            if any(child.stats is not None for child in unproven):
+                children = unproven
+        # the statistics may be shared with other paths and earlier searches,
+        # so the visits that count are those through the child itself
+        nvisits = [(child,child.visits) for child in children if child.stats is not None]
+        if not nvisits:
+            return children[0]
         if len(nvisits) > 1:
             nvisits = [pair for pair in nvisits if pair[0].game_state is not END_TURN]
         choice, n= max(nvisits, key=lambda p: p[1])
-        print(f"visited {n} times")
         return choice
 
 
@@ -239,4 +1182,322 @@ class MCTSSearcher:
             records.append(current.to_record())
             nodes.extend(current.children)
         return records
-    
+
+
+def _explore_root(game_state: GameState, condition: Callable[[GameState], bool], C: float, max_turns: int,
+                  limits: tuple, transpositions: bool, chance_samples: int | None, payments: bool, seed: int):
+    """
+    Run one :RootParallelSearcher: worker's search, and return the value and
+    visits of the root, and of each of its children with the visits through it.
+    :limits: are the :Budget:'s, with the seconds left instead of a deadline.
+    """
+    random.seed(seed)
+    iterations, seconds, max_nodes, max_bytes = limits
+    deadline = None if seconds is None else time.monotonic() + seconds
+    searcher = MCTSSearcher(game_state, {} if transpositions else None, condition, C, max_turns,
+                            chance_samples=chance_samples, payments=payments)
+    children = searcher.explore(Budget(iterations, deadline, max_nodes, max_bytes))
+    root = searcher.root.stats
+    return (root.value, root.visits), [(0, 0, 0) if child.stats is None else
+                                       (child.stats.value, child.stats.visits, child.visits) for child in children]
+
+
+class RootParallelSearcher(MCTSSearcher):
+    """
+    Root-parallel MCTS: :explore(): runs :workers: independent searches from
+    the root, each in its own process with its own random seed, and adds up
+    the statistics they found for each child of the root, which :choose():
+    then picks from as usual. Each worker runs :n_iters: iterations, or
+    has the whole :Budget: to itself; progress is only reported at the end.
+
+    The root state is pickled to the workers (see :GameState.__reduce__:),
+    so :condition: has to be picklable too, e.g. a module-level function.
+    Workers start with an empty transposition table (or none, if
+    :statistics: is None); their results are added to :statistics:.
+    Pass an :executor: to reuse one pool of processes for many searches;
+    otherwise each search starts its own, with the 'spawn' start method.
+    """
+    def __init__(self, *args, workers: int | None = None, executor: Executor | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.widening is not None:
+            # the workers' roots would widen differently from this one's
+            raise ValueError("root-parallel search doesn't support progressive widening")
+        if self.solver:
+            raise ValueError("root-parallel search doesn't prove values")
+        self.workers = workers or os.cpu_count()
+        self.executor = executor
+
+    def explore(self, budget: Budget | None = None, progress: Callable[[SearchProgress], None] | None = None,
+                progress_interval: float = 1.0) -> List[HistoryNode]:
+        budget = budget or Budget(self.iterations())
+        children = self.expand(self.root)
+        seeds = [random.getrandbits(64) for _ in range(self.workers)]
+        seconds = None if budget.deadline is None else budget.deadline - time.monotonic()
+        limits = (budget.iterations, seconds, budget.max_nodes, budget.max_bytes)
+        job = functools.partial(_explore_root, self.root.game_state, self.condition, self.C,
+                                self.max_turns, limits, self.stats is not None, self.chance_samples, self.payments)
+        if self.executor is None:
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(job, seeds))
+        else:
+            results = list(self.executor.map(job, seeds))
+
+        root = self.root.stats
+        merged = set()
+        for (value, visits), _ in results:
+            root.value += value
+            root.visits += visits
+        for i, child in enumerate(children):
+            found = [child_results[i] for _, child_results in results if len(child_results) == len(children)]
+            if len(found) != len(results):
+                raise RuntimeError("a worker found different moves from the root")
+            if child.stats is None:
+                child.stats = self.lookup(child)
+            child.visits += sum(through for _, _, through in found)
+            # children that share statistics got the same ones from each worker
+            if id(child.stats) not in merged:
+                merged.add(id(child.stats))
+                child.stats.value += sum(value for value, _, _ in found)
+                child.stats.visits += sum(visits for _, visits, _ in found)
+        if progress is not None:
+            progress(self.progress(budget, budget.iterations or 0, children))
+        return children
+
+
+class ThreadedMCTSSearcher(MCTSSearcher):
+    """
+    Tree-parallel MCTS: :threads: threads run the iterations of :explore():
+    on one shared tree.
+
+    A thread that selects a node adds a virtual loss to it (a visit with no
+    value, :virtual_loss: times over) until it backs up its result, so that
+    the other threads look elsewhere meanwhile. Selection, expansion and
+    backups change the tree under :lock:; computing game states and
+    playouts, which is where the time goes, happen outside it. Threads only
+    run in parallel on free-threaded CPython, or when playouts release the GIL.
+    """
+    def __init__(self, *args, threads: int | None = None, virtual_loss: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.solver:
+            raise ValueError("tree-parallel search doesn't prove values")
+        self.threads = threads or os.cpu_count()
+        self.virtual_loss = virtual_loss
+        self.lock = threading.Lock()
+
+    def expand(self, node: HistoryNode) -> List[HistoryNode]:
+        """
+        :node:'s children, listing its moves outside the lock; if two threads
+        expand a node at once, both use the children that were stored first.
+        With progressive widening, the whole expansion is under the lock.
+        """
+        if self.widening is not None:
+            with self.lock:
+                return super().expand(node)
+        if node.children:
+            return node.children
+        moves = legal_moves(node.game_state, self.payments)
+        with self.lock:
+            if not node.children:
+                node.children = [HistoryNode(None, node, action, choice, cache=node.cache)
+                                 for action, choice in moves]
+                self.n_nodes += len(node.children)
+            return node.children
+
+    def add_virtual_loss(self, node: HistoryNode, losses: list):
+        """
+        Count :self.virtual_loss: visits with no value for :node:, and note
+        them in :losses: to take back later. Call with :lock: held.
+        """
+        node.visits += self.virtual_loss
+        if node.stats is not None:
+            node.stats.visits += self.virtual_loss
+        losses.append((node, node.stats))
+
+    def remove_virtual_loss(self, losses: list):
+        for node, info in losses:
+            node.visits -= self.virtual_loss
+            if info is not None:
+                info.visits -= self.virtual_loss
+
+    def select(self, children: List[HistoryNode], losses: list) -> HistoryNode:
+        """
+        The child to explore next, with a virtual loss added to it: the first
+        that hasn't been visited (as progressive widening adds them), if any
+        """
+        with self.lock:
+            unvisited = [i for i, child in enumerate(children) if child.visits == 0]
+            if unvisited:
+                i = unvisited[0]
+            else:
+                scores = [self.score(child) for child in children]
+                i, _ = max(enumerate(scores), key=lambda i_s: i_s[1])
+            self.add_virtual_loss(children[i], losses)
+        return children[i]
+
+    def explore_node(self, node: HistoryNode, losses: list | None = None):
+        """
+        :MCTSSearcher.explore_node(): with virtual loss; :losses: has the
+        virtual losses already added on the way to :node:, if any
+        """
+        losses = [] if losses is None else losses
+        with self.lock:
+            current = self.resolve_chance(node)
+        while not self.condition(current.game_state):
+            if current.game_state.turn_number > self.max_turns:
+                value = 0
+                break
+            children = self.expand(current)
+            if any(child.stats is not None for child in children):
+                current = random.choice(children)
+                with self.lock:
+                    self.add_virtual_loss(current, losses)
+                    current = self.resolve_chance(current)
+                value = self.playout(current, self.max_turns - current.game_state.turn_number)
+                break
+            current = self.select(children, losses)
+            with self.lock:
+                current = self.resolve_chance(current)
+        else:
+            value = 1.0 / current.game_state.turn_number
+        with self.lock:
+            self.remove_virtual_loss(losses)
+            self.backpropogate(current, value)
+
+    def explore(self, budget: Budget | None = None, progress: Callable[[SearchProgress], None] | None = None,
+                progress_interval: float = 1.0) -> List[HistoryNode]:
+        """
+        :MCTSSearcher.explore(): with its iterations split between :self.threads: threads
+        """
+        budget = budget or Budget(self.iterations())
+        children = self.expand(self.root)
+        started = 0
+        next_report = budget.started + progress_interval
+        counter_lock = threading.Lock()
+
+        def first(child: HistoryNode):
+            if not budget.exhausted(self.n_nodes):
+                self.explore_node(child)
+
+        def work():
+            nonlocal started, next_report
+            while True:
+                with counter_lock:
+                    if budget.exhausted(self.n_nodes, started):
+                        return
+                    started += 1
+                    if progress is not None and time.monotonic() >= next_report:
+                        with self.lock:
+                            report = self.progress(budget, started, children)
+                        progress(report)
+                        next_report += progress_interval
+                losses = []
+                self.explore_node(self.select(self.expand(self.root), losses), losses)
+
+        with ThreadPoolExecutor(self.threads) as pool:
+            list(pool.map(first, [child for child in children if child.visits == 0]))
+            for future in [pool.submit(work) for _ in range(self.threads)]:
+                future.result()
+        return children
+
+
+class ISMCTSSearcher(MCTSSearcher):
+    """
+    Information-set MCTS: an :MCTSSearcher: that doesn't know the order of
+    the library.
+
+    Each iteration is played in a determinization of the root, a copy of it
+    with the library shuffled (see :determinizations:) except for the cards
+    that the root's moves show. The determinizations are :HashKind.VISIBLE:,
+    so the transposition table keys the states below the root by their
+    :visible_key:, and what an iteration finds out about a state counts for
+    every ordering of the library that looks the same to the player.
+
+    The moves from :self.root: are the real state's, and an iteration through
+    one of them takes the same move in its determinization; the move's
+    statistics are those of every iteration through it, whichever library it
+    was played with.
+
+    Determinizations are sampled :batch_size: at a time, and each one keeps
+    its own tree for :iterations_per_determinization: iterations, so the
+    states on its paths are computed once for several iterations. One whose
+    moves from the root don't line up with the real ones is sampled again,
+    up to :resamples: times for a batch; if none line up, iterations are
+    dropped until the next batch.
+    """
+    def __init__(self, *args, batch_size: int = 8, iterations_per_determinization: int = 8, resamples: int = 3,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.widening is not None:
+            # the determinizations' moves from the root have to line up with the real ones
+            raise ValueError("information-set search doesn't support progressive widening")
+        if self.solver:
+            # a proof in one determinization doesn't hold for the others
+            raise ValueError("information-set search doesn't prove values")
+        self.batch_size = batch_size
+        self.resamples = resamples
+        self.iterations_per_determinization = iterations_per_determinization
+        self.batch: List[HistoryNode] = []  #: the roots of the determinizations' trees
+        self.batch_iterations = 0
+        self.move_index: Dict[int, int] = {}    #: id of a child of the root -> its index
+
+    def explore(self, budget: Budget | None = None, progress: Callable[[SearchProgress], None] | None = None,
+                progress_interval: float = 1.0) -> List[HistoryNode]:
+        # the root may have moved since the last search
+        self.drop_batch()
+        return super().explore(budget, progress, progress_interval)
+
+    def explore_node(self, node: HistoryNode):
+        if self.batch_iterations >= self.batch_size * self.iterations_per_determinization or not self.batch:
+            self.sample_batch()
+        if not self.batch:
+            # playing it with the real library would let it see the order
+            self.batch_iterations += 1
+            return 0
+        determinization = self.batch[self.batch_iterations % len(self.batch)]
+        self.batch_iterations += 1
+        # the determinization's root shares :self.root.stats:, so its
+        # backpropagation counts the visit to the root
+        value = super().explore_node(determinization.children[self.move_index[id(node)]])
+        self.root.visits += 1
+        node.visits += 1
+        if node.stats is None:
+            node.stats = MCTSInfo()
+        node.stats.value += value
+        node.stats.visits += 1
+        return value
+
+    def sample_batch(self):
+        """
+        Replace the determinizations with :self.batch_size: new ones
+        """
+        self.drop_batch()
+        children = self.expand(self.root)
+        self.move_index = {id(child): i for i, child in enumerate(children)}
+        moves = [(child.action, child.choice) for child in children]
+        fixed = revealed(moves)
+        for _ in range(self.resamples + 1):
+            needed = self.batch_size - len(self.batch)
+            if not needed:
+                break
+            for state in determinizations(self.root.game_state, needed, fixed):
+                root = HistoryNode(state, stats=self.root.stats, cache=self.root.cache)
+                children = self.expand(root)
+                if [type(child.action) for child in children] != [type(action) for action, _ in moves]:
+                    # its moves don't line up with the real ones
+                    self.n_nodes -= len(children)
+                    continue
+                self.batch.append(root)
+        self.batch_iterations = 0
+
+    def drop_batch(self):
+        """
+        Drop the determinizations' trees, so that they can be freed
+        """
+        stack = list(self.batch)
+        while stack:
+            dropped = stack.pop()
+            self.n_nodes -= len(dropped.children)
+            if dropped.cache is not None:
+                dropped.cache.forget(dropped)
+            stack.extend(dropped.children)
+        self.batch = []
@@ -1,11 +1,30 @@
-from dataclasses import dataclass
-from typing import Optional, TypeVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional, TypeVar
 
 
 Player = TypeVar('Player')
 
-@dataclass(slots=True)
-class Zone:
+
+class ZoneType(type):
+    """
+    Metaclass of Zone: zones are interned, so constructing the same kind of
+    zone with the same owner and position twice returns the same object.
+    """
+    def __call__(cls, owner=None, position=None):
+        key = (cls, owner, position)
+        try:
+            return _ZONES[key]
+        except KeyError:
+            # if two threads make the same zone at once, both use the first one stored
+            return _ZONES.setdefault(key, super().__call__(owner, position))
+
+
+#: (zone type, owner, position) -> the Zone for it
+_ZONES: Dict[tuple, 'Zone'] = {}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Zone(metaclass=ZoneType):
     """
     This class represents both the particular location a card is in 
     in the game, and a zone containing a set of cards
@@ -13,9 +32,16 @@ class Zone:
     Every zone except for the stack is owned by a particular player.
 
     The library and the stack have a fixed order.
+
+    Zones are immutable and interned (see :ZoneType:), so two zones are
+    equal exactly when they are the same object, and hash by identity.
     """
     owner: Optional[Player] = None
     position: Optional[int] = None
+    _matches: Dict[Optional['Zone'], bool] = field(init=False, repr=False) #: zone -> whether `contains` matches it
+
+    def __post_init__(self):
+        object.__setattr__(self, '_matches', {})
 
     def contains(self, card) -> bool:
         """
@@ -24,44 +50,46 @@ class Zone:
         If `self.owner` is None, it matches any player, and likewise 
         `self.position` matches any position when it is None.
         """
-        return (
-            type(self) is type(card.zone) 
-            and (self.owner is None or self.owner == card.zone.owner)
-            and (self.position is None or self.position == card.zone.position) 
-        )
+        zone = card.zone
+        if zone is self:
+            return True
+        try:
+            return self._matches[zone]
+        except KeyError:
+            matches = self._matches[zone] = (
+                type(self) is type(zone)
+                and (self.owner is None or self.owner == zone.owner)
+                and (self.position is None or self.position == zone.position)
+            )
+            return matches
     
     def __str__(self):
         return f"{type(self)}({self.owner})[{self.position}]"
 
     def copy(self):
-        return type(self)(self.owner, self.position)
-    
-    def __hash__(self):
-        return hash(
-            (type(self),
-            self.owner,
-            self.position)
-        )
+        return self
     
-    def __eq__(self, value):
-        return hash(self) == hash(value)
+    def __reduce__(self):
+        return (type(self), (self.owner, self.position))
 
 class Grave(Zone):
-    pass
+    __slots__ = ()
 
 class Hand(Zone):
-    pass
+    __slots__ = ()
 
 class Deck(Zone):
-    pass
+    __slots__ = ()
 
 class Field(Zone):
-    pass
+    __slots__ = ()
 
 class Stack(Zone):
-    pass
+    __slots__ = ()
 
 class Any(Zone):
+    __slots__ = ()
+
     def contains(self, card) -> bool:
         return True
 
@@ -0,0 +1,88 @@
+"""
+Tests for the NumPy-backed ArrayGameState. It must behave like a GameState,
+with per-card state stored in its CardColumns.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mtg_ai import game, actions, zones, mana, decklist
+from mtg_ai.game import canonical_key
+from mtg_ai.array_state import ArrayGameState, ArrayCardState, TAPPED, ZONE_KIND
+
+
+def test_cards_are_views():
+    gs = ArrayGameState([0])
+    (hand, deck) = decklist.build_deck(gs, 0, [decklist.Forest, decklist.Island, decklist.Plains], hand_size=1)
+    assert all(isinstance(card._state, ArrayCardState) for card in gs.objects)
+    assert [c.zone for c in deck] == [zones.Deck(0, 0), zones.Deck(0, 1)]
+    assert gs.columns.table[ZONE_KIND, hand[0].uid] != gs.columns.table[ZONE_KIND, deck[0].uid]
+
+
+def test_copy_is_independent():
+    gs = ArrayGameState([0])
+    roots = decklist.WallOfRoots(gs)
+    forest = decklist.Forest(gs)
+    roots.zone = zones.Field(0)
+    forest.zone = zones.Hand(0)
+
+    ability = roots.attrs.activated[0]
+    g1 = gs.take_action(ability, ability.get_choices(gs)[0])
+    g2 = g1.take_action(actions.PlayLand(forest), {})
+
+    assert g1.columns.table is not gs.columns.table
+    assert g2.get(roots).tapped and g2.get(roots).counters['-0/-1'] == 1
+    assert dict(g2.get(roots).counters) == {'-0/-1': 1}
+    assert not roots.tapped and roots.counters['-0/-1'] == 0
+    assert gs.columns.table[TAPPED, roots.uid] == 0
+    assert zones.Hand(0).contains(g1.get(forest))
+    assert zones.Field(0).contains(g2.get(forest))
+    assert g2.mana_pool == mana.Mana(green=1)
+
+
+def test_summoning_sickness():
+    gs = ArrayGameState([0])
+    b1 = decklist.Battlement(gs)
+    b1.zone = zones.Hand(0)
+    gs = gs.take_action(actions.Play(card=b1), {})
+    assert gs.get(b1) in gs.summoning_sick
+    assert list(gs.summoning_sick) == [gs.get(b1)]
+    assert not b1.attrs.activated[0].get_choices(gs)
+    gs = gs.take_action(actions.EndTurn(), {})
+    assert len(gs.summoning_sick) == 0
+    assert b1.attrs.activated[0].get_choices(gs)
+
+
+def test_arcades_matches_eager():
+    def run(make_state):
+        g0 = make_state([0])
+        deck = [decklist.Forest(g0), decklist.Forest(g0)]
+        for i, card in enumerate(deck):
+            card.zone = zones.Deck(0, i)
+        decklist.Arcades(g0).zone = zones.Field(0)
+        omens = decklist.WallOfOmens(g0)
+        omens.zone = zones.Hand(0)
+        g1 = g0.take_action(actions.Play(omens))
+        g1.stack_triggers()
+        g2 = g1.resolve_stack()
+        g3 = g2.resolve_stack()
+        return [canonical_key(state) for state in (g0, g1, g2, g3)]
+
+    assert run(ArrayGameState) == run(game.GameState)
+
+
+def test_coco_matches_eager():
+    def run(make_state):
+        g0 = make_state([0])
+        coco = decklist.CollectedCompany(g0)
+        coco.zone = zones.Hand(0)
+        deck = [decklist.Forest(g0) for _ in range(4)] + [decklist.Axebane(g0) for _ in range(2)]
+        for i, card in enumerate(deck):
+            card.zone = zones.Deck(0, i)
+        g0.mana_pool += mana.Mana(green=4)
+        casting = actions.CastSpell(coco)
+        g1 = g0.take_action(casting, casting.get_choices(g0)[0])
+        g2 = g1.resolve_stack()
+        return [canonical_key(state) for state in (g0, g1, g2)]
+
+    assert run(ArrayGameState) == run(game.GameState)
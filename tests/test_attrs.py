@@ -0,0 +1,77 @@
+"""
+Tests for the attribute values GameStates cache for cards affected by static
+effects: they must always agree with the effects that are active.
+"""
+from mtg_ai import game, zones, decklist
+from mtg_ai.cards import CardAttributes
+
+
+def anthem_state():
+    gs = game.GameState([0])
+    saruli, kaysa = decklist.Saruli(gs, owner=0), decklist.Kaysa(gs, owner=0)
+    saruli.zone = kaysa.zone = zones.Field(0)
+    return gs, saruli, kaysa
+
+
+def test_no_proxy_without_static_effects():
+    gs = game.GameState([0])
+    saruli = decklist.Saruli(gs, owner=0)
+    saruli.zone = zones.Field(0)
+    assert isinstance(saruli.attrs, CardAttributes)
+    assert (saruli.attrs.name, saruli.attrs.power, saruli.attrs.toughness) == ("Saruli Caretaker", 0, 3)
+    assert "defender" in saruli.attrs.keywords
+
+    kaysa = decklist.Kaysa(gs, owner=0)
+    kaysa.zone = zones.Field(0)
+    assert not isinstance(saruli.attrs, CardAttributes)
+    assert saruli.attrs is saruli.attrs
+    assert saruli.attrs.power == 1 and "defender" in saruli.attrs.keywords
+
+
+def test_cache_follows_effects_and_zones():
+    gs, saruli, kaysa = anthem_state()
+    assert saruli.attrs.power == 1
+    kaysa.zone = zones.Hand(0)
+    assert saruli.attrs.power == 0
+    kaysa.zone = zones.Field(0)
+    assert saruli.attrs.power == 1
+    saruli.zone = zones.Hand(0)
+    assert saruli.attrs.power == 0 and kaysa.attrs.power == 3
+
+
+def test_copies_dont_share_changes():
+    gs, saruli, kaysa = anthem_state()
+    assert saruli.attrs.toughness == 4
+    child = gs.copy()
+    child.get(saruli).zone = zones.Hand(0)
+    grandchild = child.copy()
+    grandchild.get(kaysa).zone = zones.Grave(0)
+    assert gs.get(saruli).attrs.toughness == 4 and gs.get(kaysa).attrs.power == 3
+    assert child.get(saruli).attrs.toughness == 3 and child.get(kaysa).attrs.power == 3
+    assert grandchild.get(kaysa).attrs.power == 2
+
+
+def test_copies_dont_share_new_entries():
+    gs, saruli, kaysa = anthem_state()
+    saruli.zone = zones.Hand(0)
+    assert kaysa.attrs.power == 3
+    # the child computes an attribute its parent hasn't, of a card it has moved
+    child = gs.copy()
+    child.get(saruli).zone = zones.Field(0)
+    assert child.get(saruli).attrs.power == 1 and child.get(saruli).attrs.toughness == 4
+    assert gs.get(saruli).attrs.power == 0 and gs.get(saruli).attrs.toughness == 3
+    # and adds to an entry it shares with its parent, for a card only the parent has moved
+    child = gs.copy()
+    gs.get(saruli).zone = zones.Field(0)
+    assert gs.get(saruli).attrs.power == 1
+    assert child.get(saruli).attrs.power == 0 and child.get(saruli).attrs.toughness == 3
+
+
+def test_undo_restores_effects():
+    gs, saruli, kaysa = anthem_state()
+    assert saruli.attrs.power == 1
+    mark = gs.mark()
+    kaysa.zone = zones.Hand(0)
+    assert saruli.attrs.power == 0
+    gs.undo(mark)
+    assert saruli.attrs.power == 1
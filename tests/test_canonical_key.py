@@ -148,7 +148,7 @@ def test_summoning_sick_vs_not():
     """
     g1, _ = fresh_state((decklist.Battlement, zones.Field(0)))
     [b] = g1.objects
-    g1.summoning_sick.add(b)  # summoning_sick stores Card objects, not UIDs
+    g1.summoning_sick.add(b)
 
     g2, _ = fresh_state((decklist.Battlement, zones.Field(0)))
     # summoning_sick is empty in g2
@@ -260,3 +260,27 @@ def test_card_order_in_hand_irrelevant():
     b2.zone = zones.Hand(0)
 
     assert canonical_key(g1) == canonical_key(g2)
+
+
+# ---------------------------------------------------------------------------
+# Visible keys: the order of a library is hidden
+# ---------------------------------------------------------------------------
+
+def test_library_order_hidden_from_visible_key():
+    g1, _ = fresh_state((decklist.Forest, zones.Deck(0, 0)), (decklist.WallOfOmens, zones.Deck(0, 1)))
+    g2, _ = fresh_state((decklist.Forest, zones.Deck(0, 1)), (decklist.WallOfOmens, zones.Deck(0, 0)))
+    assert canonical_key(g1) != canonical_key(g2)
+    assert game.visible_key(g1) == game.visible_key(g2)
+
+
+def test_library_contents_in_visible_key():
+    g1, _ = fresh_state((decklist.Forest, zones.Deck(0, 0)), (decklist.WallOfOmens, zones.Hand(0)))
+    g2, _ = fresh_state((decklist.Forest, zones.Hand(0)), (decklist.WallOfOmens, zones.Deck(0, 0)))
+    assert game.visible_key(g1) != game.visible_key(g2)
+
+
+def test_state_key_follows_hash_kind():
+    gs, _ = fresh_state((decklist.Forest, zones.Deck(0, 3)))
+    assert game.state_key(gs) == canonical_key(gs)
+    gs.hash_kind = game.HashKind.VISIBLE
+    assert game.state_key(gs) == game.visible_key(gs)
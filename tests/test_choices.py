@@ -0,0 +1,90 @@
+"""
+Tests for the lazy choice sets in mtg_ai.choices
+"""
+import random
+from collections import Counter
+from itertools import chain, combinations, product
+from mtg_ai import game, actions, choices, decklist, getters, zones, search
+
+
+def test_product():
+    parts = [[1, 2, 3], ['a', 'b'], [None]]
+    lazy = choices.Product(parts)
+    assert len(lazy) == 6
+    assert list(lazy) == list(product(*parts))
+    assert lazy[0] == (1, 'a', None) and lazy[5] == (3, 'b', None)
+    assert lazy == list(product(*parts))
+    assert len(choices.Product([[1, 2], []])) == 0
+    assert not choices.Product([[1, 2], []])
+
+
+def test_samples_are_uniform():
+    random.seed(0)
+    lazy = choices.Product([range(4), choices.Mapped(range(3), str)])
+    counts = Counter(lazy.sample() for _ in range(12000))
+    assert set(counts) == set(lazy)
+    assert all(800 < count < 1200 for count in counts.values())
+
+
+def test_subsets_match_old_up_to():
+    items = list(range(6))
+    for n in (1, 2, 3, 8):
+        lazy = choices.Subsets(items, n)
+        old = list(chain(chain.from_iterable(combinations(items, n - i) for i in range(n)), [{}]))
+        assert list(lazy) == old
+        assert len(lazy) == len(old)
+
+    random.seed(1)
+    lazy = choices.Subsets(items, 2)
+    counts = Counter(str(lazy.sample()) for _ in range(22000))
+    assert len(counts) == len(lazy) == 22
+    assert all(700 < count < 1300 for count in counts.values())
+
+
+def test_up_to_filters():
+    up_to = getters.UpTo(2, lambda n: n % 2 == 0)
+    assert list(up_to(range(7))) == [(0, 2), (0, 4), (0, 6), (2, 4), (2, 6), (4, 6), (0,), (2,), (4,), (6,), {}]
+
+
+def test_collected_company_samples_without_listing():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.WallOfRoots] * 10)
+    company = decklist.CollectedCompany(gs, owner=0)
+    company.zone = zones.Hand(0)
+    search_action = company.effect.actions[-1]
+    assert isinstance(search_action, actions.Search)
+    options = search_action.get_choices(gs)
+    # every card it looks at is a creature: any pair of them, any one, or nothing
+    seen = len(options[0]['found']) + len(options[0]['rest'])
+    assert len(options) == seen * (seen - 1) // 2 + seen + 1
+    assert len(list(options)) == len(options)
+    random.seed(0)
+    for _ in range(20):
+        choice = choices.sample(options)
+        assert len(choice['found']) + len(choice['rest']) == seen
+        assert choice in options
+
+
+def test_saruli_choices():
+    gs = game.GameState([0])
+    saruli = decklist.Saruli(gs)
+    saruli.zone = zones.Field(0)
+    for _ in range(5):
+        decklist.WallOfOmens(gs).zone = zones.Field(0)
+    options = saruli.attrs.activated[0].get_choices(gs)
+    assert isinstance(options, choices.LazyChoices)
+    assert len(options) == 5
+    random.seed(0)
+    tapped = {choices.sample(options)['costs_choice']['choices'][1]['card'].uid for _ in range(200)}
+    assert len(tapped) == 5
+
+
+def test_playout_samples_moves():
+    random.seed(0)
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 20 + [decklist.WallOfRoots] * 20, shuffle=True)
+    for _ in range(30):
+        action, options = random.choice(search.actions_with_choices(gs))
+        choice = choices.sample(options)
+        assert choice in action.get_choices(gs)
+        gs = gs.take_action(action, choice).resolve_stack()
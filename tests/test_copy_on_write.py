@@ -0,0 +1,86 @@
+"""
+Tests for copy-on-write GameStates (GameState(copy_on_write=True)).
+
+A copy-on-write state must behave exactly like an eagerly copied one, while
+only copying the objects an action actually touches.
+"""
+import random
+from mtg_ai import game, actions, zones, mana, decklist, search
+from mtg_ai.game import canonical_key
+
+
+def build(copy_on_write, types, hand_size, field=()):
+    gs = game.GameState([0], copy_on_write=copy_on_write)
+    decklist.build_deck(gs, 0, types, hand_size=hand_size)
+    for ty in field:
+        ty(gs, owner=0).zone = zones.Field(0)
+    return gs
+
+
+def test_untouched_cards_are_shared():
+    gs = build(True, [decklist.Forest, decklist.Island, decklist.Plains, decklist.Forest], hand_size=1)
+    [forest] = gs.in_zone(zones.Hand(0))
+    g1 = gs.take_action(actions.PlayLand(forest), {})
+
+    assert isinstance(g1.objects, game.ObjectTable)
+    assert g1.objects.items[forest.uid].game_state is g1
+    for card in gs.in_zone(zones.Deck(0)):
+        assert g1.objects.items[card.uid] is card
+    # looking a card up gives a card that belongs to the new state, sharing the old card's state
+    island = gs.in_zone(zones.Deck(0))[0]
+    assert g1.get(island) is not island
+    assert g1.get(island)._state is island._state
+
+
+def test_parent_unchanged():
+    gs = build(True, [decklist.Forest], hand_size=0, field=[decklist.WallOfRoots, decklist.Forest])
+    roots, forest = gs.in_zone(zones.Field(0))
+    before = canonical_key(gs)
+
+    ability = roots.attrs.activated[0]
+    g1 = gs.take_action(ability, ability.get_choices(gs)[0])
+    ability = forest.attrs.activated[0]
+    g2 = g1.take_action(ability, ability.get_choices(g1)[0])
+
+    assert canonical_key(gs) == before
+    assert not roots.tapped and not roots.counters['-0/-1']
+    assert g2.get(roots).tapped and g2.get(roots).counters['-0/-1'] == 1
+    assert g2.get(forest).tapped and not g1.get(forest).tapped
+    assert g2.mana_pool == mana.Mana(green=2)
+
+
+def test_coco_matches_eager():
+    keys = []
+    for copy_on_write in (False, True):
+        gs = game.GameState([0], copy_on_write=copy_on_write)
+        coco = decklist.CollectedCompany(gs)
+        coco.zone = zones.Hand(0)
+        deck = [decklist.Forest(gs) for _ in range(4)] + [decklist.WallOfOmens(gs), decklist.Axebane(gs)]
+        for i, card in enumerate(deck):
+            card.zone = zones.Deck(0, i)
+        gs.mana_pool += mana.Mana(green=4)
+        g1 = gs.take_action(actions.CastSpell(coco), {'mana': gs.mana_pool})
+        g2 = g1.resolve_stack()
+        g2.stack_triggers()
+        g3 = g2.resolve_stack()
+        keys.append([canonical_key(state) for state in (gs, g1, g2, g3)])
+    assert keys[0] == keys[1]
+
+
+def test_random_playouts_match_eager():
+    for seed in range(5):
+        keys = []
+        for copy_on_write in (False, True):
+            random.seed(seed)
+            gs = build(copy_on_write, [decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.Saruli,
+                                       decklist.Battlement, decklist.WallOfOmens, decklist.Forest,
+                                       decklist.Axebane, decklist.Staff, decklist.Forest], hand_size=5)
+            trace = []
+            while gs.turn_number < 4:
+                possible = actions.possible_actions(gs) or [search.END_TURN]
+                action = random.choice(possible)
+                choice = random.choice(action.choices(gs))
+                gs = gs.take_action(action, choice).resolve_stack()
+                trace.append(canonical_key(gs))
+            keys.append(trace)
+        assert keys[0] == keys[1]
@@ -0,0 +1,71 @@
+import pytest
+from mtg_ai import decklist, frontier, game, search
+from mtg_ai.game import canonical_key
+
+
+def test_node_table():
+    table = frontier.NodeTable()
+    assert table.append(frontier.ROOT, frontier.ROOT) == 0
+    assert table.append(0, 3) == 1
+    assert table[1] == (0, 3)
+    assert len(table) == 2 and not table.spilled
+    with pytest.raises(IndexError):
+        table[2]
+
+
+def test_node_table_spills():
+    table = frontier.NodeTable(max_in_memory=4)
+    for i in range(100):
+        table.append(i - 1, i)
+    assert table.spilled
+    assert len(table) == 100
+    assert [table[i] for i in range(100)] == [(i - 1, i) for i in range(100)]
+    table.close()
+    assert len(table) == 0
+
+
+def forests():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest, decklist.WallOfRoots, decklist.Forest], hand_size=3)
+    return gs
+
+
+def test_replayer():
+    table = frontier.NodeTable()
+    table.append(frontier.ROOT, frontier.ROOT)
+    replayer = frontier.Replayer(forests(), table, search._advance_and_list, capacity=1)
+    _, moves = replayer.expansion(0)
+    child = table.append(0, len(moves) - 1)
+    grandchild = table.append(child, 0)
+
+    expected = forests()
+    expected = search.advance(expected)
+    expected = expected.take_action(*search.legal_moves(expected)[-1])
+    expected = search.advance(expected)
+    expected = expected.take_action(*search.legal_moves(expected)[0])
+    assert canonical_key(replayer.state(grandchild)) == canonical_key(expected)
+    path = replayer.path(grandchild)
+    assert [move for move, _ in path][0] is None
+    assert canonical_key(path[-1][1]) == canonical_key(expected)
+
+
+def test_bfs_path():
+    def condition(gs):
+        return gs.mana_pool.green == 1
+    result = search.bfs(forests(), condition, 100, max_in_memory=2)
+    node = result.final_state
+    assert condition(node.game_state)
+    # every node on the way has the state its move led to
+    while node.parent is not None:
+        assert node.parent.game_state is not None and node.action is not None
+        node = node.parent
+    assert all(isinstance(pending, search.HistoryNode) for pending in result.remaining)
+
+
+def test_bfs_canonical_keys():
+    hashed = search.bfs(forests(), lambda state: False, 50)
+    exact = search.bfs(forests(), lambda state: False, 50, key=canonical_key)
+    assert hashed.n_iters == exact.n_iters
+    assert [canonical_key(node.game_state) for node in hashed.remaining] == \
+           [canonical_key(node.game_state) for node in exact.remaining]
+
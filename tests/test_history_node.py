@@ -0,0 +1,76 @@
+"""
+Tests for HistoryNode's lazily computed game states and the StateCache that
+can drop them
+"""
+from mtg_ai import game, decklist, search, zones
+from mtg_ai.game import canonical_key
+
+
+def start():
+    gs = game.GameState([0])
+    for card in (decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.Battlement):
+        card(gs).zone = zones.Hand(0)
+    decklist.build_deck(gs, 0, [decklist.Axebane, decklist.WallOfOmens, decklist.Forest])
+    return gs
+
+
+def line(root: search.HistoryNode, depth: int):
+    """
+    The first child of the first child of... :root:, :depth: times
+    """
+    nodes = [root]
+    for _ in range(depth):
+        nodes.append(nodes[-1].expand()[0])
+        nodes[-1].game_state
+    return nodes
+
+
+def test_children_computed_on_first_use():
+    gs = start()
+    root = search.HistoryNode(gs)
+    children = root.expand()
+    assert children and not any(child.materialized for child in children)
+    child = children[-1]
+    assert canonical_key(child.game_state) == canonical_key(gs.take_action(child.action, child.choice))
+    assert child.materialized
+    assert child.game_state is child.game_state
+    assert sum(other.materialized for other in children) == 1
+
+
+def test_replay_from_nearest_ancestor():
+    root = search.HistoryNode(start())
+    nodes = line(root, 4)
+    keys = [canonical_key(node.game_state) for node in nodes]
+    for node in nodes[2:]:
+        node._game_state = None
+    assert canonical_key(nodes[-1].game_state) == keys[-1]
+    assert all(node.materialized for node in nodes)
+    assert [canonical_key(node.game_state) for node in nodes] == keys
+
+
+def test_state_cache_drops_coldest():
+    keys = [canonical_key(node.game_state) for node in line(search.HistoryNode(start()), 4)]
+    root = search.HistoryNode(start(), cache=search.StateCache(2))
+    nodes = line(root, 4)
+    # the root always keeps its state; of the rest, only the two latest do
+    assert [node.materialized for node in nodes] == [True, False, False, True, True]
+    assert len(root.cache) == 2
+
+    # replaying to nodes[2] computes nodes[1] on the way, and they become the latest
+    assert canonical_key(nodes[2].game_state) == keys[2]
+    assert [node.materialized for node in nodes] == [True, True, True, False, False]
+    assert all(canonical_key(node.game_state) == key for node, key in zip(nodes, keys))
+
+
+def test_mcts_with_max_states():
+    gs = game.GameState([0])
+    decklist.build_deck(
+        gs, 0,
+        [decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.WallOfRoots, decklist.Battlement,
+         decklist.Axebane, decklist.WallOfOmens, decklist.Staff, decklist.Forest],
+        hand_size=5,
+    )
+    searcher = search.MCTSSearcher(gs, {}, search.staff_victory, 1.2, n_iters=20, max_states=10)
+    result = searcher.choose()
+    assert result.stats is not None
+    assert len(searcher.root.cache) <= 10
@@ -0,0 +1,83 @@
+"""
+Tests for actions.legal_moves, which caches the moves available in a state
+and hands them down to its copies.
+"""
+import random
+from mtg_ai import game, actions, zones, decklist, search
+from mtg_ai.game import canonical_key
+from experiments.full_game import DECK
+
+
+def fresh_moves(gs):
+    """
+    legal_moves for a copy of :gs: that starts with no cached moves
+    """
+    fresh = gs.copy()
+    fresh.move_cache = {}
+    fresh._land_drops = gs.land_drops
+    return actions.legal_moves(fresh)
+
+
+def outcomes(gs, moves):
+    return sorted(canonical_key(gs.take_action(action, choice)) for action, choice in moves)
+
+
+def test_cached_moves_match_fresh_ones():
+    for seed in range(4):
+        random.seed(seed)
+        gs = game.GameState([0], copy_on_write=seed % 2 == 1)
+        decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+        for _ in range(40):
+            moves = actions.legal_moves(gs)
+            assert outcomes(gs, moves) == outcomes(gs, fresh_moves(gs))
+            action, choice = random.choice(search.legal_moves(gs))
+            gs = gs.take_action(action, choice).resolve_stack()
+
+
+def test_moves_match_possible_actions():
+    random.seed(0)
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+    moves = actions.legal_moves(gs)
+    expected = [(action, choice) for action in actions.possible_actions(gs)
+                for choice in action.choices(gs)]
+    assert [str(action) for action, _ in moves] == [str(action) for action, _ in expected]
+    assert outcomes(gs, moves) == outcomes(gs, expected)
+
+
+def test_unchanged_state_reuses_cache():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 10, hand_size=3)
+    actions.legal_moves(gs)
+    cached = gs.move_cache
+    assert cached and not gs.changed_inputs
+    actions.legal_moves(gs)
+    assert gs.move_cache is cached
+    # a copy starts with the cache of the state it was copied from
+    assert gs.copy().move_cache is cached
+
+
+def test_land_drop_invalidates_lands():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 10, hand_size=3)
+    forest = gs.in_zone(zones.Hand(0))[0]
+    assert len(actions.legal_moves(gs)) == 3
+    child = gs.take_action(actions.PlayLand(forest))
+    assert 'land_drops' in child.changed_inputs
+    names = [str(action) for action, _ in actions.legal_moves(child)]
+    # the forest on the field can tap for mana, but no more lands can be played
+    assert len(names) == 1 and 'PlayLand' not in names[0]
+
+
+def test_mana_and_undo():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 5, hand_size=0)
+    omens = decklist.WallOfOmens(gs, owner=0)
+    omens.zone = zones.Hand(0)
+    assert actions.legal_moves(gs) == []
+
+    mark = gs.mark()
+    gs.mana_pool = gs.mana_pool + omens.attrs.cost
+    assert [type(action) for action, _ in actions.legal_moves(gs)] == [actions.CastSpell]
+    gs.undo(mark)
+    assert actions.legal_moves(gs) == []
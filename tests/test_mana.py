@@ -0,0 +1,65 @@
+"""
+Tests for the packed-int Mana: fields must read and write like the attributes
+they used to be, and paying must behave as it did field by field.
+"""
+import pytest
+from mtg_ai.mana import Mana, FIELDS
+
+
+def test_fields_read_and_write():
+    cost = Mana(green=2, generic=1)
+    assert (cost.green, cost.generic, cost.white) == (2, 1, 0)
+    cost.white = 2
+    cost.green -= 3
+    assert cost.as_tuple() == (2, 0, 0, 0, -1, 0, 0, 1)
+    assert cost == Mana(white=2, green=-1, generic=1)
+    for i, field in enumerate(FIELDS):
+        mana = Mana(**{field: -5})
+        assert getattr(mana, field) == -5
+        assert mana.as_tuple() == tuple(-5 if j == i else 0 for j in range(len(FIELDS)))
+
+
+def test_arithmetic():
+    pool = Mana(green=2, gold=1)
+    pool += Mana(green=1, colorless=2)
+    assert pool == Mana(green=3, gold=1, colorless=2)
+    assert pool.mana_value == 6
+    assert Mana(green=1) * 3 == Mana(green=3)
+    assert Mana(red=1) + Mana(red=-1) == Mana()
+    assert str(Mana(green=1, generic=2)) == 'Mana(green=1,generic=2)'
+
+
+def test_copy_and_hash():
+    pool = Mana(blue=1)
+    copy = pool.copy()
+    copy.blue += 1
+    assert pool.blue == 1 and copy.blue == 2
+    assert hash(Mana(blue=1)) == hash(pool)
+    assert len({Mana(), Mana(), pool, copy}) == 3
+    assert Mana() != (0,) * len(FIELDS)
+
+
+@pytest.mark.parametrize("pool,cost,payable", [
+    (Mana(green=2), Mana(green=1, generic=1), True),
+    (Mana(green=1), Mana(green=1, generic=1), False),
+    (Mana(green=1, colorless=1), Mana(green=2), False),
+    (Mana(green=1, gold=2), Mana(green=2), True),
+    # gold pays for missing colors, but must be left over afterwards
+    (Mana(gold=1), Mana(green=1), False),
+    (Mana(white=1, gold=2), Mana(white=1, blue=1, red=1), False),
+    (Mana(white=1, gold=3), Mana(white=1, blue=1, red=1), True),
+    (Mana(colorless=3), Mana(generic=3), True),
+])
+def test_can_pay(pool, cost, payable):
+    assert pool.can_pay(cost) == payable
+    assert pool.can_pay_many([cost, Mana(), cost]) == [payable, True, payable]
+
+
+def test_pay():
+    pool = Mana(green=2, colorless=1, gold=1)
+    pool -= Mana(green=1, generic=2)
+    # generic costs are paid with colorless mana first, then colors, then gold
+    assert pool == Mana(gold=1)
+    pool = Mana(white=1, gold=1)
+    pool -= Mana(white=1)
+    assert pool == Mana(gold=1)
@@ -0,0 +1,108 @@
+"""
+Tests for the mana payment solver and the PayWith macro-actions built on it.
+"""
+from mtg_ai import game, actions, zones, decklist, payment
+from mtg_ai.mana import Mana
+
+
+def state_with(hand, field):
+    gs = game.GameState([0])
+    for card_type in field:
+        card_type(gs, owner=0).zone = zones.Field(0)
+    for card_type in hand:
+        card_type(gs, owner=0).zone = zones.Hand(0)
+    return gs
+
+
+def tapped(gs):
+    return sorted(card.attrs.name for card in gs.in_zone(zones.Field(0)) if card.tapped)
+
+
+def pay(gs, paid):
+    for ability, choice in paid:
+        gs = gs.take_action(ability, choice)
+    return gs
+
+
+def test_orders_and_identical_cards_collapse():
+    gs = state_with([], [decklist.Forest] * 3)
+    paid = payment.payments(gs, Mana(green=1, generic=1))
+    assert len(paid) == 1 and len(paid[0]) == 2
+    assert payment.payments(gs, Mana(green=1)) == payment.payments(gs, Mana(generic=1))
+    assert pay(gs, paid[0]).mana_pool == Mana(green=2)
+
+
+def test_pool_and_unpayable_costs():
+    gs = state_with([], [decklist.Forest])
+    assert payment.payments(gs, Mana(green=2)) == []
+    assert payment.payments(gs, Mana(blue=1)) == []
+    gs.mana_pool += Mana(green=1)
+    assert payment.payments(gs, Mana(green=1)) == [()]
+
+
+def test_dominated_payments_are_left_out():
+    gs = state_with([], [decklist.Forest, decklist.Saruli, decklist.Battlement])
+    # Saruli tapping Battlement taps more than Battlement alone, for less mana
+    results = sorted(tapped(pay(gs, paid)) for paid in payment.payments(gs, Mana(green=1)))
+    assert results == [['Forest'], ['Overgrown Battlement']]
+    results = sorted(tapped(pay(gs, paid)) for paid in payment.payments(gs, Mana(green=3)))
+    assert results == [['Forest', 'Overgrown Battlement']]
+
+
+def test_many_identical_sources():
+    gs = state_with([], [decklist.Saruli] * 4 + [decklist.WallOfOmens] * 2)
+    results = sorted(tapped(pay(gs, paid)) for paid in payment.payments(gs, Mana(green=2)))
+    assert results == [['Saruli Caretaker'] * 4,
+                       ['Saruli Caretaker'] * 3 + ['Wall of Omens'],
+                       ['Saruli Caretaker'] * 2 + ['Wall of Omens'] * 2]
+    # gold mana has to be left over after standing in for a color, so one
+    # green takes two abilities
+    gs = state_with([], [decklist.SylvanCaryatid] * 2)
+    [paid] = payment.payments(gs, Mana(green=1))
+    assert len(paid) == 2
+
+
+def test_memoized_up_to_identical_cards():
+    gs = state_with([], [decklist.Forest, decklist.Forest, decklist.Plains])
+    payment.payments(gs, Mana(white=1, generic=1))
+    cached = len(payment._PAYMENTS)
+    other = state_with([], [decklist.Plains, decklist.Forest, decklist.Forest])
+    paid = payment.payments(other, Mana(white=1, generic=1))
+    assert len(payment._PAYMENTS) == cached
+    assert [tapped(pay(other, p)) for p in paid] == [['Forest', 'Plains']]
+
+
+def test_pay_with_casts_the_spell():
+    gs = state_with([decklist.WallOfRoots], [decklist.Forest, decklist.Forest, decklist.Forest])
+    possible = actions.possible_actions(gs, payments=True)
+    assert all(not payment.is_mana_ability(action) for action in possible)
+    [cast] = possible
+    assert isinstance(cast, actions.PayWith) and isinstance(cast.action, actions.CastSpell)
+    [choice] = cast.get_choices(gs)
+    child = gs.take_action(cast, choice)
+    assert tapped(child) == ['Forest', 'Forest']
+    assert len(child.in_zone(zones.Stack())) == 1 and child.mana_pool == Mana()
+    assert tapped(gs) == [] and len(gs.in_zone(zones.Hand(0))) == 1
+    # the payment can't be used again once its cards are tapped
+    assert cast.get_choices(child) == []
+
+
+def test_payments_reach_states_reachable_one_ability_at_a_time():
+    gs = state_with([decklist.WallOfOmens, decklist.Axebane],
+                    [decklist.Forest, decklist.Plains, decklist.Saruli, decklist.WallOfRoots])
+    one_at_a_time = set()
+
+    def activate(state):
+        for action in actions.possible_actions(state):
+            for choice in action.get_choices(state):
+                child = state.take_action(action, choice)
+                if payment.is_mana_ability(action):
+                    activate(child)
+                elif isinstance(action, actions.CastSpell):
+                    one_at_a_time.add(child)
+
+    activate(gs)
+    with_payments = {gs.take_action(action, choice)
+                     for action in actions.possible_actions(gs, payments=True)
+                     for choice in action.get_choices(gs)}
+    assert with_payments and with_payments < one_at_a_time
@@ -0,0 +1,80 @@
+"""
+Tests for pickling GameState, which rebuilds the cards in a new state
+instead of pickling their abilities
+"""
+import pickle
+import random
+import pytest
+from mtg_ai import game, actions, zones, mana, decklist, search
+from mtg_ai.game import canonical_key
+from experiments.full_game import DECK
+
+
+def round_trip(gs):
+    return pickle.loads(pickle.dumps(gs))
+
+
+def outcomes(gs):
+    return sorted(canonical_key(gs.take_action(action, choice)) for action, choice in search.legal_moves(gs))
+
+
+def test_round_trip_during_play():
+    for seed in range(6):
+        random.seed(seed)
+        gs = game.GameState([0], copy_on_write=seed % 2 == 1)
+        decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+        for _ in range(10 * seed):
+            action, choice = random.choice(search.legal_moves(gs))
+            gs = gs.take_action(action, choice).resolve_stack()
+        if gs.triggers:
+            continue
+        copy = round_trip(gs)
+        assert type(copy) is type(gs) and copy.copy_on_write == gs.copy_on_write
+        assert canonical_key(copy) == canonical_key(gs)
+        assert hash(copy) == hash(gs)
+        assert [type(obj) for obj in copy.objects] == [type(obj) for obj in gs.objects]
+        assert len(copy.active_triggers) == len(gs.active_triggers)
+        assert outcomes(copy) == outcomes(gs)
+
+
+def test_round_trip_keeps_targets():
+    g0 = game.GameState([0])
+    ([unsummon], [saruli, steel]) = decklist.build_deck(
+        g0, 0, [decklist.Unsummon, decklist.Saruli, decklist.SteelWall], hand_size=1)
+    saruli.zone = zones.Field(0)
+    steel.zone = zones.Field(0)
+    g0.mana_pool += mana.Mana(blue=1)
+    cast = actions.CastSpell(unsummon)
+    for choice in cast.get_choices(g0):
+        g1 = round_trip(g0.take_action(cast, choice))
+        assert len(g1.in_zone(zones.Stack())) == 1
+        assert len(g1.get(unsummon).effect.get_choices(g1)) == 1
+        g2 = g1.resolve_stack()
+        [bounced] = g2.in_zone(zones.Hand())
+        assert bounced.uid == choice['effect_choices']['choices'][1]['targets'][0]['target'].uid
+
+
+def test_pending_triggers_are_refused():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 4)
+    decklist.Arcades(gs, owner=0).zone = zones.Field(0)
+    omens = decklist.WallOfOmens(gs, owner=0)
+    omens.zone = zones.Hand(0)
+    child = gs.take_action(actions.Play(omens))
+    assert child.triggers
+    with pytest.raises(pickle.PicklingError):
+        pickle.dumps(child)
+
+
+def test_array_state_round_trip():
+    pytest.importorskip("numpy")
+    from mtg_ai.array_state import ArrayGameState
+    gs = ArrayGameState([0])
+    roots = decklist.WallOfRoots(gs)
+    roots.zone = zones.Field(0)
+    decklist.Forest(gs).zone = zones.Hand(0)
+    gs = gs.take_action(roots.attrs.activated[0], roots.attrs.activated[0].get_choices(gs)[0])
+    copy = round_trip(gs)
+    assert isinstance(copy, ArrayGameState)
+    assert canonical_key(copy) == canonical_key(gs)
+    assert copy.get(roots).counters == gs.get(roots).counters
@@ -1,6 +1,9 @@
+import random
+import time
+import tracemalloc
 import pytest
 from mtg_ai.game import HashKind
-from mtg_ai import actions, decklist, game, search, zones
+from mtg_ai import actions, decklist, game, mana, payment, search, zones
 
 
 def test_possible():
@@ -200,3 +203,495 @@ def test_mcts_fetch2():
     assert len(gy) == 1
     assert gy[0].attrs.name == "Windswept Heath"
 
+
+
+def forests_in_play():
+    gs = game.GameState([0])
+    for _ in range(2):
+        decklist.Forest(gs).zone = zones.Field(0)
+    decklist.WallOfRoots(gs).zone = zones.Hand(0)
+    decklist.build_deck(gs, 0, [decklist.Forest] * 3)
+    return gs
+
+
+def test_mcts_transpositions():
+    """
+    tapping either of two identical forests leads to the same state, so
+    the nodes for them share their statistics
+    """
+    statistics = {}
+    searcher = search.MCTSSearcher(forests_in_play(), statistics, search.staff_victory, 1.2, n_iters=20)
+    searcher.choose()
+    taps = [child for child in searcher.root.children if isinstance(child.action, actions.ActivatedAbility)]
+    assert len(taps) == 2
+    assert taps[0].stats is taps[1].stats
+    assert taps[0].stats.visits == taps[0].visits + taps[1].visits
+    assert statistics[game.canonical_key(taps[0].game_state)] is taps[0].stats
+
+    # a later search starts from what this one found
+    later = search.MCTSSearcher(taps[1].game_state, statistics, search.staff_victory, 1.2, n_iters=5)
+    assert later.root.stats is taps[0].stats
+
+
+def test_mcts_without_table():
+    searcher = search.MCTSSearcher(forests_in_play(), None, search.staff_victory, 1.2, n_iters=20)
+    searcher.choose()
+    taps = [child for child in searcher.root.children if isinstance(child.action, actions.ActivatedAbility)]
+    assert taps[0].stats is not taps[1].stats
+    assert all(child.stats.visits == child.visits for child in searcher.root.children)
+
+
+def test_root_parallel():
+    gs = opening_hand()
+    single = search.MCTSSearcher(gs, None, search.staff_victory, 1.2, n_iters=5)
+    single.explore()
+    searcher = search.RootParallelSearcher(gs, {}, search.staff_victory, 1.2, n_iters=5, workers=2)
+    children = searcher.explore()
+    # each worker ran as many iterations as the single search
+    assert searcher.root.stats.visits == 2 * single.root.stats.visits
+    assert sum(child.visits for child in children) == searcher.root.stats.visits
+    assert searcher.choose() in children
+
+
+def test_threaded_mcts():
+    gs = opening_hand()
+    searcher = search.ThreadedMCTSSearcher(gs, {}, search.staff_victory, 1.2, n_iters=20, threads=4)
+    children = searcher.explore()
+    # every iteration was backed up once, and every virtual loss taken back
+    assert searcher.root.stats.visits == len(children) + 20
+    assert sum(child.visits for child in children) == searcher.root.stats.visits
+    assert all(child.stats.visits >= child.visits > 0 for child in children)
+    assert searcher.choose() in children
+
+
+def test_mcts_reuse():
+    gs = opening_hand()
+    searcher = search.MCTSSearcher(gs, {}, search.staff_victory, 1.2, n_iters=30, max_states=20, reuse=True)
+    old_root = searcher.root
+    choice = searcher.choose()
+    assert searcher.root is choice
+    assert choice.parent is None and old_root.children == []
+    assert choice.materialized
+    # only the chosen subtree is left in the cache
+    kept = set()
+    stack = [choice]
+    while stack:
+        node = stack.pop()
+        kept.add(id(node))
+        stack.extend(node.children)
+    assert set(searcher.root.cache.nodes) <= kept
+
+    # the next search only tops the root up to n_iters visits
+    carried = choice.visits
+    assert carried > 0
+    new_children = [child for child in choice.expand() if child.visits == 0]
+    assert searcher.iterations() == max(0, 30 - carried)
+    searcher.explore()
+    assert choice.visits == carried + len(new_children) + max(0, 30 - carried)
+
+
+def test_mcts_advance():
+    statistics = {}
+    searcher = search.MCTSSearcher(forests_in_play(), statistics, search.staff_victory, 1.2, n_iters=10)
+    searcher.explore()
+    tap = next(child for child in searcher.root.children if isinstance(child.action, actions.ActivatedAbility))
+    assert searcher.advance(tap.action, tap.choice) is tap
+    assert searcher.root is tap and tap.stats is not None
+
+    # a move the search never made becomes a new root
+    searcher = search.MCTSSearcher(forests_in_play(), statistics, search.staff_victory, 1.2, n_iters=10)
+    action = next(action for action in actions.possible_actions(searcher.root.game_state)
+                  if isinstance(action, actions.ActivatedAbility))
+    root = searcher.advance(action, action.get_choices(searcher.root.game_state)[0])
+    assert root.parent is None and root.game_state.mana_pool.green == 1
+    # and it shares statistics with the node for the same state in the first search
+    assert root.stats is tap.stats
+
+
+def opening_hand():
+    gs = game.GameState([0])
+    decklist.build_deck(
+        gs, 0,
+        [decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.WallOfRoots, decklist.Battlement,
+         decklist.Axebane, decklist.WallOfOmens, decklist.Staff, decklist.Forest],
+        hand_size=5,
+    )
+    return gs
+
+
+def tree_size(root):
+    stack, size = [root], 0
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+
+def test_budget_needs_a_limit():
+    with pytest.raises(ValueError):
+        search.Budget()
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=None)
+    with pytest.raises(ValueError):
+        searcher.choose()
+
+
+def test_choose_deadline():
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=None)
+    start = time.monotonic()
+    choice = searcher.choose(deadline=start + 0.5)
+    # the deadline is only checked between iterations
+    assert time.monotonic() - start < 2
+    assert choice in searcher.root.children
+
+
+def test_choose_max_nodes():
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=None)
+    searcher.choose(max_nodes=40)
+    assert searcher.n_nodes == tree_size(searcher.root) >= 40
+    # an iteration can expand many nodes on its way down, but the search stops
+    # after the one that went over
+    assert searcher.root.stats.visits == 1
+
+
+def test_choose_max_bytes():
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=1000)
+    tracemalloc.start()
+    try:
+        searcher.choose(max_bytes=1)
+    finally:
+        tracemalloc.stop()
+    # out of memory as soon as anything was allocated: no children were visited
+    assert searcher.root.stats.visits <= 1
+
+
+def test_choose_progress():
+    reports = []
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=10)
+    choice = searcher.choose(progress=reports.append, progress_interval=0)
+    assert [report.iterations for report in reports] == list(range(1, 11))
+    assert reports[-1].best is choice
+    assert [child for child, _ in reports[-1].visits] == searcher.root.children
+    assert all(earlier.elapsed <= later.elapsed for earlier, later in zip(reports, reports[1:]))
+
+
+def test_threaded_budget():
+    searcher = search.ThreadedMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=None, threads=2)
+    searcher.choose(max_nodes=40)
+    assert searcher.n_nodes == tree_size(searcher.root)
+
+
+def test_bfs_deadline():
+    result = search.bfs(opening_hand(), search.staff_victory, deadline=time.monotonic())
+    assert result.final_state is None and result.n_iters == 0
+
+
+def test_dfpn():
+    result = search.dfpn(opening_hand(), search.staff_victory, 6)
+    assert result.win
+    final = result.final_state
+    assert search.staff_victory(final.game_state) and final.game_state.turn_number <= 6
+    # replaying the line from the opening hand wins too
+    line = []
+    while final.parent is not None:
+        line.append(final)
+        final = final.parent
+    state = final.game_state
+    for node in reversed(line):
+        state = state.take_action(node.action, node.choice)
+        # every step of the line is a proven win too
+        assert search.dfpn(state, search.staff_victory, 6).win
+    assert search.staff_victory(state)
+
+
+def test_dfpn_disproof():
+    # bfs's earliest win is on turn 6
+    result = search.dfpn(opening_hand(), search.staff_victory, 5)
+    assert result.win is False and result.final_state is None
+    assert search.bfs(opening_hand(), search.staff_victory).final_state.game_state.turn_number == 6
+
+
+def test_dfpn_budget():
+    result = search.dfpn(opening_hand(), search.staff_victory, 5, max_nodes=20)
+    assert result.win is None and result.n_nodes < 100
+    assert search.dfpn(opening_hand(), search.staff_victory, 5, deadline=time.monotonic()).win is None
+
+
+def summary(result: search.SearchResult):
+    final = result.final_state
+    return (result.n_iters, final and game.canonical_key(final.game_state),
+            [game.canonical_key(node.game_state) for node in result.remaining])
+
+
+@pytest.mark.parametrize('timeout', [3000, 200])
+def test_parallel_bfs_matches_bfs(timeout):
+    serial = search.bfs(opening_hand(), search.staff_victory, timeout)
+    parallel = search.parallel_bfs(opening_hand(), search.staff_victory, timeout, workers=2, batch_size=16)
+    assert summary(parallel) == summary(serial)
+
+
+def test_determinizations():
+    gs = opening_hand()
+    library = gs.in_zone(zones.Deck())
+    fixed = frozenset({library[0].uid})
+    samples = search.determinizations(gs, 4, fixed)
+    assert len(samples) == 4
+    for sample in samples:
+        assert sample.hash_kind is HashKind.VISIBLE
+        assert game.visible_key(sample) == game.visible_key(gs)
+        assert sample.get(library[0]).zone is library[0].zone
+    # the original keeps its order
+    assert gs.in_zone(zones.Deck()) == library
+
+
+def test_revealed():
+    gs = game.GameState([0])
+    library = [decklist.Forest(gs), decklist.WallOfOmens(gs)]
+    for position, card in enumerate(library):
+        card.zone = zones.Deck(0, position)
+    decklist.WindsweptHeath(gs).zone = zones.Field(0)
+    decklist.Forest(gs).zone = zones.Hand(0)
+    # cracking the fetch looks through the library; playing the forest doesn't
+    assert search.revealed(search.legal_moves(gs)) == {card.uid for card in library}
+    assert search.revealed([move for move in search.legal_moves(gs)
+                            if isinstance(move[0], actions.PlayLand)]) == set()
+
+
+def test_ismcts():
+    searcher = search.ISMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=100,
+                                     batch_size=4, iterations_per_determinization=4)
+    result = searcher.choose()
+    assert result.stats is not None and result.stats.value > 0
+    assert searcher.root.visits == sum(child.visits for child in searcher.root.children)
+    # the statistics below the root don't depend on the library's order
+    keys = {key for key in searcher.stats if key != game.canonical_key(searcher.root.game_state)}
+    assert keys and all(
+        all(card[3] == -1 for card in key[-1] if card[1] == 'Deck') for key in keys)
+
+
+def test_ismcts_drops_mismatched_determinizations(monkeypatch):
+    def mismatched(gs, n, fixed=frozenset(), hash_kind=HashKind.VISIBLE):
+        samples = []
+        for _ in range(n):
+            sample = gs.copy()
+            sample.hash_kind = hash_kind
+            decklist.Forest(sample).zone = zones.Hand(0)
+            samples.append(sample)
+        return samples
+    monkeypatch.setattr(search, "determinizations", mismatched)
+    searcher = search.ISMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=10,
+                                     batch_size=2, iterations_per_determinization=2)
+    searcher.explore()
+    # no iteration was played with the real library instead
+    assert searcher.root.visits == 0
+    assert all(child.stats is None for child in searcher.root.children)
+
+
+def end_of_turn():
+    """
+    a state where the only move is to end the turn and draw, from a library
+    of four Forests and two Walls of Omens
+    """
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 4 + [decklist.WallOfOmens] * 2)
+    return gs
+
+
+def test_chance_outcomes():
+    random.seed(0)
+    searcher = search.MCTSSearcher(end_of_turn(), {}, search.staff_victory, 1.2, n_iters=20,
+                                   max_turns=3, chance_samples=300)
+    searcher.explore()
+    [draw] = searcher.root.children
+    assert draw.chance
+    weights = {outcome.game_state.in_zone(zones.Hand(0))[0].attrs.name: outcome.weight
+               for outcome in draw.children}
+    assert set(weights) == {"Forest", "Wall of Omens"}
+    assert weights["Forest"] == pytest.approx(4 / 6, abs=0.1)
+    assert sum(weights.values()) == pytest.approx(1)
+    # every visit went through one of the outcomes
+    assert draw.visits == sum(outcome.visits for outcome in draw.children)
+
+
+def test_chance_outcomes_cached():
+    random.seed(0)
+    searcher = search.MCTSSearcher(end_of_turn(), {}, search.staff_victory, 1.2, n_iters=20,
+                                   max_turns=3, chance_samples=50)
+    searcher.explore()
+    cached = dict(searcher.outcomes)
+    # a new node for the same move gets the same outcomes
+    [draw] = searcher.root.children
+    node = search.HistoryNode(None, searcher.root, draw.action, draw.choice)
+    searcher.root.children = [node]
+    searcher.resolve_chance(node)
+    assert searcher.outcomes == cached
+    assert [outcome.game_state for outcome in node.children] == [state for _, state in cached[next(iter(cached))]]
+
+
+def test_chance_reuse():
+    random.seed(0)
+    searcher = search.MCTSSearcher(end_of_turn(), {}, search.staff_victory, 1.2, n_iters=20,
+                                   max_turns=3, chance_samples=20, reuse=True)
+    searcher.explore()
+    [choice] = searcher.root.children
+    assert choice.chance
+    searcher.reroot(choice)
+    # the new root's children are its moves again
+    assert searcher.root is choice and not choice.chance
+    assert all(child.action is not None for child in searcher.expand(choice))
+
+
+def test_chance_next_to_fetch():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 3 + [decklist.WallOfRoots] * 4)
+    decklist.WindsweptHeath(gs).zone = zones.Field(0)
+    decklist.WallOfOmens(gs, owner=0).zone = zones.Hand(0)
+    gs.mana_pool = mana.Mana(white=1, green=1)
+    # cast Wall of Omens and resolve it, leaving its draw trigger on the stack
+    for move_type in (actions.CastSpell, actions.ResolveStack, actions.StackTriggers):
+        [move] = [(action, choice) for action, choice in search.legal_moves(gs) if isinstance(action, move_type)]
+        gs = gs.take_action(*move)
+    searcher = search.MCTSSearcher(gs, {}, search.staff_victory, 1.2, chance_samples=20)
+    children = searcher.expand(searcher.root)
+    [draw] = [child for child in children if isinstance(child.action, actions.ResolveStack)]
+    fetches = [child for child in children if child is not draw]
+    # the uncracked fetch next to it doesn't make the draw known
+    assert fetches and searcher.is_chance(draw)
+    assert not any(searcher.is_chance(fetch) for fetch in fetches)
+
+
+def test_threaded_chance_mid_visit():
+    searcher = search.ThreadedMCTSSearcher(end_of_turn(), {}, search.staff_victory, 1.2, n_iters=20,
+                                           max_turns=3, chance_samples=20, threads=2)
+    searcher.explore()
+    node = search.HistoryNode(None, searcher.root, search.END_TURN, searcher.root.children[0].choice)
+    searcher.root.children = [node]
+    # another thread scores a chance node between its virtual loss and its first backup
+    searcher.add_virtual_loss(node, [])
+    assert searcher.resolve_chance(node) in node.children and node.stats.visits == 0
+    assert searcher.score(node) > 0
+
+
+def test_mcts_with_chance():
+    random.seed(0)
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=100, chance_samples=16)
+    result = searcher.choose()
+    assert result.stats is not None and result.stats.value > 0
+
+
+def test_move_prior():
+    card = object()
+    assert search.move_prior(search.END_TURN, {}) < search.move_prior(actions.Draw(), {})
+    one = {'costs_choice': {}, 'effects_choice': {'found': [card], 'rest': (card,)}}
+    two = {'choices': ({'found': [card, card], 'rest': ()}, {})}
+    assert search.move_prior(actions.Draw(), two) > search.move_prior(actions.Draw(), one) > 0
+
+
+def test_progressive_widening():
+    random.seed(0)
+    gs = opening_hand()
+    for land in (decklist.Forest, decklist.Forest, decklist.WindsweptHeath):
+        land(gs).zone = zones.Field(0)
+    searcher = search.MCTSSearcher(gs, {}, search.staff_victory, 1.2, n_iters=30, widening=(0.5, 0.5))
+    moves = search.legal_moves(searcher.root.game_state)
+    assert len(moves) > 3
+    children = searcher.explore()
+    # the root only has the children its visits allow; the rest are still just moves
+    assert 1 < len(children) == int(0.5 * searcher.root.visits ** 0.5) < len(moves)
+    assert len(children) + len(searcher.root.pending) == len(moves)
+    assert all(isinstance(move, tuple) for move in searcher.root.pending)
+    # and they were made children best first
+    priors = [searcher.prior(child.action, child.choice) for child in children]
+    priors += [searcher.prior(*move) for move in reversed(searcher.root.pending)]
+    assert priors == sorted(priors, reverse=True)
+
+
+def test_progressive_widening_starts_narrow():
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, widening=(1, 0.5))
+    assert len(searcher.expand(searcher.root)) == 1
+    assert searcher.n_nodes == 2
+
+
+def test_mcts_with_widening():
+    random.seed(0)
+    searcher = search.MCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=100, widening=(2, 0.5))
+    result = searcher.choose()
+    assert result.stats is not None and result.stats.value > 0
+
+
+def test_threaded_widening():
+    random.seed(0)
+    searcher = search.ThreadedMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, n_iters=30,
+                                           widening=(1, 0.5), threads=2)
+    children = searcher.explore()
+    assert len(children) > 1 and all(child.visits > 0 for child in children)
+
+
+def test_mcts_with_payments():
+    random.seed(0)
+    gs = opening_hand()
+    for land in (decklist.Forest, decklist.Forest, decklist.Forest):
+        land(gs).zone = zones.Field(0)
+    searcher = search.MCTSSearcher(gs, {}, search.staff_victory, 1.2, n_iters=50, payments=True)
+    children = searcher.expand(searcher.root)
+    # mana is only spent by the moves that need it
+    assert not any(payment.is_mana_ability(child.action) for child in children)
+    assert any(isinstance(child.action, actions.PayWith) for child in children)
+    result = searcher.choose()
+    assert result.stats is not None
+
+
+def test_widening_unsupported():
+    with pytest.raises(ValueError):
+        search.ISMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, widening=(1, 0.5))
+
+
+def test_solver_proves_win():
+    gs = game.GameState([0])
+    forest = decklist.Forest(gs)
+    forest.zone = zones.Field(0)
+    decklist.Forest(gs).zone = zones.Hand(0)
+    decklist.Forest(gs).zone = zones.Deck(0)
+    searcher = search.MCTSSearcher(gs, {}, lambda gs: gs.mana_pool.green == 1, 1.2, n_iters=1000, solver=True)
+    result = searcher.choose()
+    assert result.action == forest.attrs.activated[0]
+    # winning on the first turn can't be beaten, so the search stopped as soon as it found it
+    assert result.proven == searcher.root.proven == 1
+    assert searcher.root.visits < 10
+
+
+def test_solver_agrees_with_dfpn():
+    gs = game.GameState([0])
+    forest = decklist.Forest(gs)
+    forest.zone = zones.Hand(0)
+    decklist.Plains(gs).zone = zones.Hand(0)
+    decklist.Forest(gs).zone = zones.Deck(0)
+    def condition(gs):
+        return gs.mana_pool.green == 1
+    # a win on turn max_turns is still a win
+    assert search.dfpn(gs, condition, 1).win
+    searcher = search.MCTSSearcher(gs, {}, condition, 1.2, n_iters=1000, max_turns=1, solver=True)
+    result = searcher.choose()
+    assert result.action.card.uid == forest.uid
+    assert result.proven == searcher.root.proven == 1
+
+
+def test_solver_proves_chance_loss():
+    random.seed(0)
+    searcher = search.MCTSSearcher(end_of_turn(), {}, search.staff_victory, 1.2, n_iters=100,
+                                   max_turns=1, chance_samples=50, solver=True)
+    searcher.explore()
+    [draw] = searcher.root.children
+    # a chance node is proven once all of its outcomes are
+    assert draw.chance and all(outcome.proven == 0 for outcome in draw.children)
+    assert draw.proven == searcher.root.proven == 0
+    assert searcher.root.visits == len(draw.children)
+
+
+def test_solver_unsupported():
+    with pytest.raises(ValueError):
+        search.RootParallelSearcher(opening_hand(), {}, search.staff_victory, 1.2, solver=True)
+    with pytest.raises(ValueError):
+        search.ThreadedMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, solver=True)
+    with pytest.raises(ValueError):
+        search.ISMCTSSearcher(opening_hand(), {}, search.staff_victory, 1.2, solver=True)
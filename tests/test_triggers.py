@@ -0,0 +1,43 @@
+"""
+Tests for GameState.triggers_for, which looks up the triggered effects
+waiting for each type of action.
+"""
+from mtg_ai import game, actions, zones, decklist
+
+
+class PlayFaceDown(actions.Play):
+    pass
+
+
+def omens_board():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 4)
+    arcades = decklist.Arcades(gs, owner=0)
+    arcades.zone = zones.Field(0)
+    omens, forest = decklist.WallOfOmens(gs, owner=0), decklist.Forest(gs, owner=0)
+    omens.zone = forest.zone = zones.Hand(0)
+    return gs, arcades, omens, forest
+
+
+def test_lookup_by_action_type():
+    gs, arcades, omens, forest = omens_board()
+    assert gs.triggers_for(actions.Play) == tuple(gs.active_triggers)
+    assert gs.triggers_for(actions.TapSymbol) == ()
+    # subclasses of the action a trigger waits for trigger it too
+    assert gs.triggers_for(PlayFaceDown) == gs.triggers_for(actions.Play)
+    assert len(gs.take_action(PlayFaceDown(omens)).triggers) == 2
+    assert len(gs.take_action(actions.PlayLand(forest)).triggers) == 0
+
+
+def test_table_follows_active_effects():
+    gs, arcades, omens, forest = omens_board()
+    assert len(gs.triggers_for(actions.Play)) == 1
+    child = gs.take_action(actions.Play(omens))
+    assert len(child.triggers_for(actions.Play)) == 2
+    assert len(gs.triggers_for(actions.Play)) == 1
+
+    mark = child.mark()
+    child.get(arcades).zone = zones.Hand(0)
+    assert len(child.triggers_for(actions.Play)) == 1
+    child.undo(mark)
+    assert len(child.triggers_for(actions.Play)) == 2
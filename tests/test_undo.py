@@ -0,0 +1,87 @@
+"""
+Tests for the undo journal: changes made in place after GameState.mark()
+must be rolled back exactly by GameState.undo().
+"""
+import random
+import pytest
+from mtg_ai import game, actions, zones, mana, decklist, search
+from mtg_ai.game import canonical_key
+
+DECK = [decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.Saruli,
+        decklist.Battlement, decklist.WallOfOmens, decklist.Forest,
+        decklist.Axebane, decklist.Staff, decklist.Forest, decklist.Arcades,
+        decklist.CollectedCompany, decklist.Forest, decklist.Axebane]
+
+
+def snapshot(gs):
+    return (canonical_key(gs), gs.zobrist_hash(), len(gs.objects), list(gs.triggers),
+            set(gs.active_effects), {key: list(uids) for key, uids in gs.zone_index.items() if uids},
+            [obj.params.copy() for obj in gs.objects if isinstance(obj, actions.Target)])
+
+
+def state_types():
+    types = [game.GameState, lambda players: game.GameState(players, copy_on_write=True)]
+    try:
+        from mtg_ai.array_state import ArrayGameState
+        types.append(ArrayGameState)
+    except ImportError:
+        pass
+    return types
+
+
+@pytest.mark.parametrize("make_state", state_types())
+def test_random_playout_undoes_exactly(make_state):
+    for seed in range(5):
+        random.seed(seed)
+        gs = make_state([0])
+        decklist.build_deck(gs, 0, DECK, shuffle=True, hand_size=7)
+        gs.mana_pool += mana.Mana(green=2)
+        history = []
+        while gs.turn_number < 5:
+            history.append((gs.mark(), snapshot(gs)))
+            possible = actions.possible_actions(gs) or [search.END_TURN]
+            action = random.choice(possible)
+            choice = random.choice(action.get_choices(gs))
+            assert gs.take_action(action, choice, copy=False) is gs
+            assert gs.resolve_stack(copy=False) is gs
+        for mark, before in reversed(history):
+            gs.undo(mark)
+            assert snapshot(gs) == before
+
+
+def test_undo_to_earlier_mark():
+    gs = game.GameState([0])
+    roots = decklist.WallOfRoots(gs)
+    roots.zone = zones.Field(0)
+    forest = decklist.Forest(gs)
+    forest.zone = zones.Hand(0)
+    before = snapshot(gs)
+
+    mark = gs.mark()
+    ability = roots.attrs.activated[0]
+    gs.take_action(ability, ability.get_choices(gs)[0], copy=False)
+    gs.take_action(actions.PlayLand(forest), {}, copy=False)
+    gs.take_action(search.END_TURN, search.END_TURN.get_choices(gs)[0], copy=False)
+    assert gs.turn_number == 2 and roots.counters['-0/-1'] == 1
+    assert zones.Field(0).contains(forest)
+
+    gs.undo(mark)
+    assert snapshot(gs) == before
+    assert gs.mana_pool == mana.Mana() and gs.land_drops == 1
+    assert not roots.tapped and roots.counters['-0/-1'] == 0
+    assert zones.Hand(0).contains(forest)
+
+
+def test_not_recording_by_default():
+    gs = game.GameState([0])
+    forest = decklist.Forest(gs)
+    forest.zone = zones.Field(0)
+    ability = forest.attrs.activated[0]
+    gs.take_action(ability, ability.get_choices(gs)[0], copy=False)
+    assert gs.journal is None
+    mark = gs.mark()
+    child = gs.copy()
+    child.get(forest).tapped = False
+    assert gs.journal == [] and child.journal is None
+    gs.undo(mark)
+    assert gs.get(forest).tapped
@@ -0,0 +1,93 @@
+"""
+Tests for GameState.zobrist_hash and GameState equality.
+
+The hash is kept up to date incrementally, so it must always agree with a
+hash computed from scratch, and states with equal canonical keys must hash
+and compare equal.
+"""
+import random
+from mtg_ai import game, actions, zones, mana, decklist, search
+from mtg_ai.game import canonical_key
+
+DECK = [decklist.Forest, decklist.Forest, decklist.WallOfRoots, decklist.Saruli,
+        decklist.Battlement, decklist.WallOfOmens, decklist.Forest,
+        decklist.Axebane, decklist.Staff, decklist.Forest]
+
+
+def playout(seed, copy_on_write=False, hash_every_step=True):
+    random.seed(seed)
+    gs = game.GameState([0], copy_on_write=copy_on_write)
+    decklist.build_deck(gs, 0, DECK, hand_size=5)
+    if hash_every_step:
+        gs.zobrist_hash()
+    while gs.turn_number < 4:
+        possible = actions.possible_actions(gs) or [search.END_TURN]
+        action = random.choice(possible)
+        choice = random.choice(action.choices(gs))
+        gs = gs.take_action(action, choice).resolve_stack()
+        if hash_every_step:
+            gs.zobrist_hash()
+    return gs
+
+
+def test_transpositions_are_equal():
+    gs = game.GameState([0])
+    f1, f2 = decklist.Forest(gs), decklist.Forest(gs)
+    f1.zone = f2.zone = zones.Hand(0)
+    g1 = gs.take_action(actions.PlayLand(f1), {})
+    g2 = gs.take_action(actions.PlayLand(f2), {})
+
+    assert g1 is not g2 and g1 == g2
+    assert hash(g1) == hash(g2)
+    assert len({gs, g1, g2}) == 2
+
+
+def test_state_changes_change_hash():
+    gs = game.GameState([0])
+    b1, b2 = decklist.Battlement(gs), decklist.Battlement(gs)
+    b1.zone = b2.zone = zones.Field(0)
+    before = gs.zobrist_hash()
+
+    g1 = gs.copy()
+    g1.get(b1).tapped = True
+    g2 = gs.copy()
+    g2.summoning_sick.add(g2.get(b1))
+    g3 = gs.copy()
+    g3.mana_pool += mana.Mana(green=1)
+    g4 = gs.copy()
+    g4.get(b2).add_counter('-0/-1')
+
+    hashes = {state.zobrist_hash() for state in (gs, g1, g2, g3, g4)}
+    assert len(hashes) == 5
+    assert gs.zobrist_hash() == before
+    g1.get(b1).tapped = False
+    assert g1.zobrist_hash() == before and g1 == gs
+
+
+def test_incremental_matches_from_scratch():
+    for seed in range(5):
+        incremental = playout(seed)
+        from_scratch = playout(seed, hash_every_step=False)
+        assert canonical_key(incremental) == canonical_key(from_scratch)
+        assert incremental.zobrist_hash() == from_scratch.zobrist_hash()
+        assert playout(seed, copy_on_write=True).zobrist_hash() == incremental.zobrist_hash()
+
+
+def test_hash_is_uid_independent():
+    g1, g2 = game.GameState([0]), game.GameState([0])
+    decklist.build_deck(g1, 0, DECK, hand_size=5)
+    decklist.build_deck(g2, 0, list(reversed(DECK)), hand_size=0)
+    for card in g2.in_zone(zones.Deck(0)):
+        card.zone = zones.Grave(0)
+    for card in g1.in_zone(zones.Deck(0)) + g1.in_zone(zones.Hand(0)):
+        card.zone = zones.Grave(0)
+    assert canonical_key(g1) == canonical_key(g2)
+    assert g1.zobrist_hash() == g2.zobrist_hash() and g1 == g2
+
+
+def test_bfs_skips_seen_states():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest] * 4, hand_size=4)
+    result = search.bfs(gs, lambda state: False, timeout=1)
+    # playing any one of the four forests leads to the same state
+    assert len(result.remaining) == 1
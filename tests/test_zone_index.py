@@ -0,0 +1,80 @@
+"""
+Tests for GameState.zone_index: in_zone must agree with a linear scan of
+gs.objects no matter how cards got into their zones.
+"""
+from mtg_ai import game, actions, zones, mana, decklist
+from mtg_ai.cards import Card
+
+
+def scan(gs, zone):
+    """The pre-index implementation of GameState.in_zone"""
+    return sorted([c for c in gs.objects if zone.contains(c)],
+                  key=lambda card: card.zone.position or float('-inf'))
+
+
+ZONES = [zones.Field(), zones.Field(0), zones.Hand(), zones.Hand(0), zones.Deck(),
+         zones.Deck(0), zones.Deck(0, 2), zones.Grave(0), zones.Stack()]
+
+
+def assert_consistent(gs):
+    for zone in ZONES:
+        assert gs.in_zone(zone) == scan(gs, zone)
+        assert all(a is b for a, b in zip(gs.in_zone(zone), scan(gs, zone)))
+
+
+def test_build_deck():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest, decklist.Saruli, decklist.Island,
+                                decklist.WallOfOmens, decklist.Forest], hand_size=2)
+    assert_consistent(gs)
+    assert [c.zone.position for c in gs.in_zone(zones.Deck(0))] == [0, 1, 2]
+
+
+def test_copy_is_independent():
+    g0 = game.GameState([0])
+    (_, deck) = decklist.build_deck(g0, 0, [decklist.Forest, decklist.Island])
+    g1 = g0.take_action(actions.Draw(0), {'player': 0})
+    assert_consistent(g0)
+    assert_consistent(g1)
+    assert len(g0.in_zone(zones.Hand(0))) == 0
+    assert g1.in_zone(zones.Hand(0)) == [g1.get(deck[-1])]
+
+
+def test_move_to_bottom_renumbers():
+    gs = game.GameState([0])
+    decklist.build_deck(gs, 0, [decklist.Forest, decklist.Island, decklist.Plains])
+    target = decklist.Forest(gs)
+    target.zone = zones.Hand(0)
+    g1 = gs.take_action(actions.MoveTo(zones.Deck(0, zones.BOTTOM), target), {'card': target})
+    assert_consistent(g1)
+    assert g1.in_zone(zones.Deck(0))[0] is g1.get(target)
+
+
+def test_stack_and_cleanup():
+    g0 = game.GameState([0])
+    arc = decklist.Arcades(g0)
+    omens = decklist.WallOfOmens(g0)
+    decklist.Forest(g0).zone = zones.Deck(0, 0)
+    decklist.Forest(g0).zone = zones.Deck(0, 1)
+    arc.zone = zones.Field(0)
+    omens.zone = zones.Hand(0)
+
+    g1 = g0.take_action(actions.Play(omens))
+    g1.stack_triggers()
+    assert_consistent(g1)
+    assert len(g1.in_zone(zones.Stack())) == 2
+    g2 = g1.resolve_stack()
+    assert_consistent(g2)
+    g3 = g2.resolve_stack()
+    assert_consistent(g3)
+    assert g3.in_zone(zones.Stack()) == []
+
+
+def test_zone_in_constructor():
+    gs = game.GameState([0])
+    card = decklist.Forest(gs)
+    spell = Card("Test Spell", gs, 0, zone=zones.Hand(0),
+                 cost=mana.Mana(generic=1), types=(game.CardType.Sorcery,))
+    card.zone = zones.Hand(0)
+    assert gs.in_zone(zones.Hand(0)) == [card, spell]
+    assert_consistent(gs)
@@ -0,0 +1,46 @@
+"""
+Tests for interned zones: constructing a zone returns the one shared
+instance for its kind, owner and position.
+"""
+import dataclasses
+import pickle
+import pytest
+from mtg_ai import game, zones, decklist, actions
+
+
+def test_zones_are_interned():
+    assert zones.Hand(0) is zones.Hand(owner=0)
+    assert zones.Deck(0, 3) is zones.Deck(owner=0, position=3)
+    assert zones.Deck(0) is not zones.Deck(0, 0)
+    assert zones.Hand(0) is not zones.Field(0)
+    assert zones.Hand(0) == zones.Hand(0) and zones.Hand(0) != zones.Hand(1)
+    assert zones.Hand(0).copy() is zones.Hand(0)
+    assert pickle.loads(pickle.dumps(zones.Stack(None, 2))) is zones.Stack(None, 2)
+
+
+def test_zones_are_immutable():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        zones.Hand(0).owner = 1
+
+
+def test_contains():
+    gs = game.GameState([0, 1])
+    card = decklist.Forest(gs)
+    card.zone = zones.Deck(1, 4)
+    assert zones.Deck(1, 4).contains(card)
+    assert zones.Deck(1).contains(card) and zones.Deck().contains(card)
+    assert not zones.Deck(0).contains(card) and not zones.Deck(1, 5).contains(card)
+    assert not zones.Hand(1).contains(card)
+    assert zones.Any().contains(card)
+    card.zone = None
+    assert not zones.Deck().contains(card)
+
+
+def test_move_to_bottom_reuses_zones():
+    gs = game.GameState([0])
+    deck = [decklist.Forest(gs) for _ in range(3)]
+    for i, card in enumerate(deck):
+        card.zone = zones.Deck(0, i)
+    gs = gs.take_action(actions.MoveTo(zones.Deck(0, zones.BOTTOM)), {'card': deck[2]})
+    assert [gs.get(card).zone for card in deck] == [zones.Deck(0, 1), zones.Deck(0, 2), zones.Deck(0, 0)]
+    assert gs.get(deck[0]).zone is zones.Deck(0, 1)